@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Run the backup_diff module in the controller process. See plugins/plugin_utils/in_process.py.
+
+# Internal Imports
+from ansible_collections.karcadia.harness.plugins.plugin_utils.in_process import ActionModule  # noqa: F401
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = r"""
+---
+name: harness_metrics
+type: aggregate
+version_added: 0.10.0
+short_description: Sum up the Harness API calls of every task
+description:
+  - Collect the harness_metrics every karcadia.harness module returns with its result, and add them up per task,
+    per module and per endpoint.
+  - At the end of the playbook, print the API calls, bytes, time, retries and throttled requests per module, the
+    tasks that made the most calls, and the p50, p95 and p99 latency of the busiest endpoints.
+  - Optionally write the totals in the Prometheus text format, for the node_exporter textfile collector.
+  - Latency percentiles are read off histogram buckets, so they are the upper bound of the bucket they fall in.
+author:
+  - Justin McCormick (@karcadia)
+requirements:
+  - Enable the callback with C(callbacks_enabled = karcadia.harness.harness_metrics) in ansible.cfg.
+options:
+  textfile:
+    description: Write the totals to this file in the Prometheus text format.
+    required: False
+    type: path
+    env:
+      - name: HARNESS_METRICS_TEXTFILE
+    ini:
+      - section: callback_harness_metrics
+        key: textfile
+  top:
+    description: Number of tasks and endpoints to list in the summary.
+    default: 10
+    type: int
+    env:
+      - name: HARNESS_METRICS_TOP
+    ini:
+      - section: callback_harness_metrics
+        key: top
+"""
+
+# Internal Imports
+from ansible.plugins.callback import CallbackBase
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import LATENCY_BUCKETS
+
+# Stdlib Imports
+from os import chmod, replace
+from os.path import abspath, dirname
+from tempfile import NamedTemporaryFile
+
+COUNTERS = ('calls', 'bytes_sent', 'bytes_received', 'retries', 'throttled', 'seconds')
+
+def new_counters():
+  return dict.fromkeys(COUNTERS, 0)
+
+def add_counters(target, metrics):
+  for name in COUNTERS:
+    target[name] += metrics.get(name, 0)
+
+def percentile(buckets, fraction):
+  # The upper bound of the bucket the given fraction of calls falls in, or None past the last bound.
+  wanted = fraction * sum(buckets)
+  seen = 0
+  for index, count in enumerate(buckets):
+    seen += count
+    if count and seen >= wanted:
+      return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else None
+  return None
+
+def format_seconds(seconds):
+  if seconds is None:
+    return f'>{LATENCY_BUCKETS[-1]:g}s'
+  if seconds < 1:
+    return f'{seconds * 1000:g}ms'
+  return f'{seconds:g}s'
+
+def format_bytes(size):
+  for unit in ('B', 'KiB', 'MiB'):
+    if size < 1024:
+      return f'{size:.0f}{unit}'
+    size /= 1024
+  return f'{size:.1f}GiB'
+
+def label(value):
+  return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class CallbackModule(CallbackBase):
+
+  CALLBACK_VERSION = 2.0
+  CALLBACK_TYPE = 'aggregate'
+  CALLBACK_NAME = 'karcadia.harness.harness_metrics'
+  CALLBACK_NEEDS_ENABLED = True
+
+  def __init__(self):
+    super(CallbackModule, self).__init__()
+    self.tasks = {}
+    self.modules = {}
+    self.endpoints = {}
+
+  def v2_runner_on_ok(self, result):
+    self._collect(result)
+
+  def v2_runner_on_failed(self, result, ignore_errors=False):
+    self._collect(result)
+
+  def _collect(self, result):
+    # A looped task reports every item once more in results, so only those are counted.
+    results = result._result.get('results')
+    if not isinstance(results, list):
+      results = [result._result]
+    for item_result in results:
+      metrics = item_result.get('harness_metrics') if isinstance(item_result, dict) else None
+      if not metrics:
+        continue
+      module_name = result._task.resolved_action or result._task.action
+      task = self.tasks.setdefault(result._task._uuid, dict(new_counters(), name=result._task.get_name(), module=module_name))
+      add_counters(task, metrics)
+      add_counters(self.modules.setdefault(module_name, new_counters()), metrics)
+      for endpoint, endpoint_metrics in metrics.get('endpoints', {}).items():
+        counters = self.endpoints.setdefault((module_name, endpoint), dict(new_counters(), buckets=[0] * (len(LATENCY_BUCKETS) + 1)))
+        add_counters(counters, endpoint_metrics)
+        for index, count in enumerate(endpoint_metrics.get('buckets', [])[:len(counters['buckets'])]):
+          counters['buckets'][index] += count
+
+  def v2_playbook_on_stats(self, stats):
+    if not self.modules:
+      return
+    top = self.get_option('top')
+    display = self._display.display
+    display('HARNESS API CALLS', color='bright blue')
+    display(f"{'module':<40} {'calls':>8} {'sent':>10} {'received':>10} {'time':>10} {'retries':>8} {'throttled':>9}")
+    for module_name, counters in sorted(self.modules.items(), key=lambda item: -item[1]['seconds']):
+      display(
+        f"{module_name:<40} {counters['calls']:>8} {format_bytes(counters['bytes_sent']):>10} {format_bytes(counters['bytes_received']):>10}"
+        f" {counters['seconds']:>9.1f}s {counters['retries']:>8} {counters['throttled']:>9}"
+      )
+
+    display('Busiest tasks, by API time:')
+    for task in sorted(self.tasks.values(), key=lambda task: -task['seconds'])[:top]:
+      display(f"  {task['seconds']:>8.1f}s {task['calls']:>7} calls  {task['name']} ({task['module']})")
+
+    display('Busiest endpoints, by API time:')
+    for (module_name, endpoint), counters in sorted(self.endpoints.items(), key=lambda item: -item[1]['seconds'])[:top]:
+      latencies = ' '.join(f'p{int(fraction * 100)}={format_seconds(percentile(counters["buckets"], fraction))}' for fraction in (0.5, 0.95, 0.99))
+      display(f"  {counters['calls']:>7} calls  {latencies}  {endpoint} ({module_name})")
+
+    if self.get_option('textfile'):
+      self._write_textfile(self.get_option('textfile'))
+
+  def _write_textfile(self, path):
+    lines = []
+    for name, help_text in (
+      ('calls', 'Harness API calls.'),
+      ('bytes_sent', 'Bytes sent to the Harness API.'),
+      ('bytes_received', 'Bytes received from the Harness API.'),
+      ('retries', 'Harness API calls sent again.'),
+      ('throttled', 'Harness API calls answered with 429.'),
+    ):
+      lines.append(f'# HELP harness_api_{name}_total {help_text}')
+      lines.append(f'# TYPE harness_api_{name}_total counter')
+      for (module_name, endpoint), counters in sorted(self.endpoints.items()):
+        lines.append(f'harness_api_{name}_total{{module="{label(module_name)}",endpoint="{label(endpoint)}"}} {counters[name]}')
+
+    lines.append('# HELP harness_api_request_duration_seconds Latency of Harness API calls.')
+    lines.append('# TYPE harness_api_request_duration_seconds histogram')
+    for (module_name, endpoint), counters in sorted(self.endpoints.items()):
+      labels = f'module="{label(module_name)}",endpoint="{label(endpoint)}"'
+      cumulative = 0
+      for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), counters['buckets']):
+        cumulative += count
+        lines.append(f'harness_api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+      lines.append(f"harness_api_request_duration_seconds_sum{{{labels}}} {counters['seconds']:.6f}")
+      lines.append(f"harness_api_request_duration_seconds_count{{{labels}}} {counters['calls']}")
+
+    # Write next to the file and rename over it, so that the collector never reads half a file.
+    try:
+      with NamedTemporaryFile('w', dir=dirname(abspath(path)), prefix='.harness-metrics-', delete=False) as fw:
+        fw.write('\n'.join(lines) + '\n')
+      # The collector usually runs as another user.
+      chmod(fw.name, 0o644)
+      replace(fw.name, path)
+    except OSError as error:
+      self._display.warning(f'Could not write the Harness metrics textfile {path}: {error}')
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = r"""
+---
+name: harness
+version_added: 0.10.0
+short_description: Harness orgs, projects, environments and infrastructures as an inventory
+description:
+  - Build an inventory from the Org, Project, Environment and Infrastructure Definition hierarchy of a Harness Account.
+  - Every Project Environment becomes a host, or every Infrastructure Definition with I(hosts_from=infrastructure).
+    Hosts are grouped by Org, Project and Environment type, and run with the local connection.
+  - Each level of the hierarchy is listed for all its parents at once, several requests at a time.
+  - Supports the inventory cache, so that a warm run builds the inventory without calling Harness.
+  - The configuration file name must end in harness.yml or harness.yaml.
+author:
+  - Justin McCormick (@karcadia)
+extends_documentation_fragment:
+  - constructed
+  - inventory_cache
+options:
+  plugin:
+    description: The name of this plugin.
+    required: True
+    choices:
+      - karcadia.harness.harness
+    type: str
+  api_key:
+    description: Harness API key.
+    required: False
+    type: str
+    env:
+      - name: HARNESS_API_KEY
+  account_id:
+    description: Harness Account ID.
+    required: False
+    type: str
+    env:
+      - name: HARNESS_ACCOUNT_ID
+  orgs:
+    description: Identifiers of the Harness Organizations to crawl. All of them when left empty.
+    default: []
+    type: list
+    elements: str
+  projects:
+    description: Identifiers of the Harness Projects to crawl, in any of the crawled Organizations. All of them when left empty.
+    default: []
+    type: list
+    elements: str
+  include_infrastructures:
+    description: List the Infrastructure Definitions of every Environment into the harness_infrastructures host variable.
+    default: True
+    type: bool
+  hosts_from:
+    description:
+      - Whether a host is a Harness Environment or an Infrastructure Definition.
+      - Infrastructure hosts are also grouped by their Environment.
+    choices:
+      - environment
+      - infrastructure
+    default: environment
+    type: str
+  workers:
+    description: Number of requests to send to Harness at the same time.
+    default: 8
+    type: int
+"""
+
+EXAMPLES = r"""
+# harness.yml
+plugin: karcadia.harness.harness
+orgs:
+  - my_demo_org
+cache: True
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.cache/harness-inventory
+cache_timeout: 3600
+keyed_groups:
+  - key: harness_tags
+    prefix: tag
+
+# Then act on every production environment of a project.
+# - hosts: harness_project_my_demo_org_my_demo_project:&harness_type_Production
+#   tasks:
+#     - karcadia.harness.override:
+#         org: "{{ harness_org }}"
+#         project: "{{ harness_project }}"
+#         environment: "{{ harness_environment }}"
+"""
+
+# Internal Imports
+from ansible.errors import AnsibleParserError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+from ansible_collections.karcadia.harness.plugins.module_utils.api import HarnessAccount, HarnessApiError, paginate, paginate_ng, scope_query
+
+# Stdlib Imports
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+def _summary(harness_object):
+  # The fields kept for the inventory and its cache. The YAML bodies are left out.
+  return {
+    'identifier': harness_object['identifier'],
+    'name': harness_object.get('name'),
+    'description': harness_object.get('description'),
+    'tags': harness_object.get('tags') or {},
+  }
+
+def list_orgs(account):
+  return [_summary(entry['org']) for entry in paginate(account, 'https://app.harness.io/v1/orgs', title='Harness Org')]
+
+def list_projects(account, org):
+  url = f"https://app.harness.io/v1/orgs/{org['identifier']}/projects"
+  return [_summary(entry['project']) for entry in paginate(account, url, title='Harness Project')]
+
+def list_environments(account, org, project):
+  query = urlencode(scope_query(account, org['identifier'], project['identifier']))
+  url = f'https://app.harness.io/ng/api/environmentsV2?{query}'
+  environments = []
+  for entry in paginate_ng(account, url, page_param='page', size_param='size', title='Harness Environment'):
+    environment = _summary(entry['environment'])
+    environment['type'] = entry['environment'].get('type')
+    environments.append(environment)
+  return environments
+
+def list_infrastructures(account, org, project, environment):
+  query = scope_query(account, org['identifier'], project['identifier']) + [('environmentIdentifier', environment['identifier'])]
+  url = f'https://app.harness.io/ng/api/infrastructures?{urlencode(query)}'
+  infrastructures = []
+  for entry in paginate_ng(account, url, page_param='page', size_param='size', title='Harness Infrastructure'):
+    infrastructure = _summary(entry['infrastructure'])
+    infrastructure['type'] = entry['infrastructure'].get('type')
+    infrastructure['deployment_type'] = entry['infrastructure'].get('deploymentType')
+    infrastructures.append(infrastructure)
+  return infrastructures
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+  NAME = 'karcadia.harness.harness'
+
+  def verify_file(self, path):
+    if not super(InventoryModule, self).verify_file(path):
+      return False
+    return path.endswith(('harness.yml', 'harness.yaml'))
+
+  def parse(self, inventory, loader, path, cache=True):
+    super(InventoryModule, self).parse(inventory, loader, path)
+    self._read_config_data(path)
+
+    cache_key = self.get_cache_key(path)
+    use_cache = self.get_option('cache') and cache
+    update_cache = self.get_option('cache') and not cache
+    orgs = None
+    if use_cache:
+      try:
+        orgs = self._cache[cache_key]
+      except KeyError:
+        update_cache = True
+    if orgs is None:
+      orgs = self.crawl()
+    if update_cache:
+      self._cache[cache_key] = orgs
+
+    self.populate(orgs)
+
+  def crawl(self):
+    # List the hierarchy one level at a time. Every level is listed for all its parents at once.
+    api_key = self.get_option('api_key')
+    account_id = self.get_option('account_id')
+    if not api_key or not account_id:
+      raise AnsibleParserError('The Harness inventory needs api_key and account_id, or HARNESS_API_KEY and HARNESS_ACCOUNT_ID in the environment.')
+    if self.get_option('workers') < 1:
+      raise AnsibleParserError('workers must be at least 1.')
+    account = HarnessAccount(api_key, account_id)
+    wanted_orgs = set(self.get_option('orgs'))
+    wanted_projects = set(self.get_option('projects'))
+    with_infrastructures = self.get_option('include_infrastructures') or self.get_option('hosts_from') == 'infrastructure'
+
+    try:
+      with ThreadPoolExecutor(max_workers=self.get_option('workers')) as executor:
+        orgs = [org for org in list_orgs(account) if not wanted_orgs or org['identifier'] in wanted_orgs]
+        for org, projects in zip(orgs, executor.map(lambda org: list_projects(account, org), orgs)):
+          org['projects'] = [project for project in projects if not wanted_projects or project['identifier'] in wanted_projects]
+
+        projects = [(org, project) for org in orgs for project in org['projects']]
+        for (org, project), environments in zip(projects, executor.map(lambda pair: list_environments(account, *pair), projects)):
+          project['environments'] = environments
+
+        if with_infrastructures:
+          environments = [(org, project, environment) for org, project in projects for environment in project['environments']]
+          for (org, project, environment), infrastructures in zip(environments, executor.map(lambda triple: list_infrastructures(account, *triple), environments)):
+            environment['infrastructures'] = infrastructures
+    except HarnessApiError as error:
+      raise AnsibleParserError(f'Harness inventory crawl has failed. {error}')
+    return orgs
+
+  def populate(self, orgs):
+    strict = self.get_option('strict')
+    self.inventory.add_group('harness')
+    for org in orgs:
+      org_group = self.inventory.add_group(self._sanitize_group_name(f"harness_org_{org['identifier']}"))
+      self.inventory.add_child('harness', org_group)
+      for project in org['projects']:
+        project_group = self.inventory.add_group(self._sanitize_group_name(f"harness_project_{org['identifier']}_{project['identifier']}"))
+        self.inventory.add_child(org_group, project_group)
+        for environment in project['environments']:
+          host_vars = {
+            'ansible_connection': 'local',
+            'harness_org': org['identifier'],
+            'harness_project': project['identifier'],
+            'harness_environment': environment['identifier'],
+            'harness_environment_name': environment['name'],
+            'harness_environment_type': environment['type'],
+            'harness_tags': environment['tags'],
+          }
+          if 'infrastructures' in environment:
+            host_vars['harness_infrastructures'] = environment['infrastructures']
+          type_group = self.inventory.add_group(self._sanitize_group_name(f"harness_type_{environment['type']}"))
+          environment_name = f"{org['identifier']}.{project['identifier']}.{environment['identifier']}"
+
+          if self.get_option('hosts_from') == 'environment':
+            self._add_host(environment_name, host_vars, (project_group, type_group), strict)
+            continue
+          environment_group = self.inventory.add_group(self._sanitize_group_name(f"harness_environment_{org['identifier']}_{project['identifier']}_{environment['identifier']}"))
+          self.inventory.add_child(project_group, environment_group)
+          for infrastructure in environment['infrastructures']:
+            infrastructure_vars = dict(host_vars)
+            infrastructure_vars['harness_infrastructure'] = infrastructure['identifier']
+            infrastructure_vars['harness_infrastructure_name'] = infrastructure['name']
+            infrastructure_vars['harness_deployment_type'] = infrastructure['deployment_type']
+            infrastructure_vars['harness_tags'] = infrastructure['tags']
+            self._add_host(f"{environment_name}.{infrastructure['identifier']}", infrastructure_vars, (environment_group, type_group), strict)
+
+  def _add_host(self, host_name, host_vars, groups, strict):
+    self.inventory.add_host(host_name)
+    for group in groups:
+      self.inventory.add_child(group, host_name)
+    for key, value in host_vars.items():
+      self.inventory.set_variable(host_name, key, value)
+    self._set_composite_vars(self.get_option('compose'), host_vars, host_name, strict=strict)
+    self._add_host_to_composed_groups(self.get_option('groups'), host_vars, host_name, strict=strict)
+    self._add_host_to_keyed_groups(self.get_option('keyed_groups'), host_vars, host_name, strict=strict)
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = r"""
+---
+name: harness
+version_added: 0.10.0
+short_description: Read Harness objects from templates and conditionals
+description:
+  - Return the Harness objects with the given identifiers, in the order given, or None for an object that does not exist.
+  - Every object is read once per Ansible worker process, so a lookup repeated across the items of a loop or the
+    templates of a task costs one read.
+  - With I(cache_ttl), objects are also kept on disk for that many seconds and shared between tasks, forks and runs.
+  - When given many identifiers, Connectors, Environments and Service Accounts are read through their list endpoints,
+    many per request. Other types are read several at a time.
+author:
+  - Justin McCormick (@karcadia)
+options:
+  _terms:
+    description: Identifiers of the Harness objects.
+    required: True
+    type: list
+    elements: str
+  object_type:
+    description: Type of the Harness objects.
+    choices:
+      - secret
+      - service
+      - connector
+      - variable
+      - environment
+      - pipeline
+      - role
+      - resource_group
+      - service_account
+    required: True
+    type: str
+  org:
+    description: Identifier of the Harness Organization to which the objects belong.
+    required: False
+    type: str
+  project:
+    description: Identifier of the Harness Project to which the objects belong.
+    required: False
+    type: str
+  api_key:
+    description: Harness API key.
+    required: False
+    type: str
+    env:
+      - name: HARNESS_API_KEY
+  account_id:
+    description: Harness Account ID.
+    required: False
+    type: str
+    env:
+      - name: HARNESS_ACCOUNT_ID
+  cache_ttl:
+    description:
+      - Keep objects on disk for this many seconds, under HARNESS_CACHE_DIR or a directory of the user's own under
+        the system temp dir. Nothing is kept when that directory is not owned by the user or is open to other users.
+      - A value of 0 turns the disk cache off.
+    default: 0
+    type: int
+  batch_size:
+    description: Identifiers resolved per request by the list endpoints.
+    default: 100
+    type: int
+  workers:
+    description: Number of reads to send to Harness at the same time.
+    default: 8
+    type: int
+"""
+
+EXAMPLES = r"""
+- name: Show the YAML of a service.
+  ansible.builtin.debug:
+    msg: "{{ lookup('karcadia.harness.harness', 'my_service', object_type='service', org='my_demo_org', project='my_demo_project').yaml }}"
+
+- name: Only deploy when the connector exists.
+  karcadia.harness.pipeline:
+    identifier: deploy
+    org: my_demo_org
+    project: my_demo_project
+    pipeline_yaml: "{{ lookup('file', 'deploy.yaml') }}"
+  when: lookup('karcadia.harness.harness', 'my_k8s', object_type='connector', org='my_demo_org') is not none
+
+- name: Read many variables with one request per hundred, then keep them for ten minutes.
+  ansible.builtin.set_fact:
+    org_variables: "{{ query('karcadia.harness.harness', *variable_ids, object_type='variable', org='my_demo_org', cache_ttl=600) }}"
+"""
+
+RETURN = r"""
+_list:
+  description: The Harness objects, or None for each identifier that does not exist.
+  type: list
+  elements: dict
+"""
+
+# Internal Imports
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+from ansible_collections.karcadia.harness.plugins.module_utils.api import HarnessAccount, HarnessApiError, request, scope_query
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import batch_read
+from ansible_collections.karcadia.harness.plugins.module_utils.cache import private_cache_dir
+
+# Stdlib Imports
+from os import replace
+from os.path import join
+from json import dump, load, loads
+from time import time
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+# How to read each type. v1 reads answer with the object, some of them inside an envelope named after the type.
+# ng reads answer with the object under data, inside an envelope. batch names the type in module_utils/batch.py
+# for the types that can be read many at a time.
+LOOKUP_TYPES = {
+  'secret': {'api': 'v1', 'path': 'secrets', 'envelope': 'secret'},
+  'service': {'api': 'v1', 'path': 'services', 'envelope': 'service'},
+  'pipeline': {'api': 'v1', 'path': 'pipelines'},
+  'role': {'api': 'v1', 'path': 'roles'},
+  'resource_group': {'api': 'v1', 'path': 'resource-groups'},
+  'connector': {'api': 'ng', 'path': 'connectors', 'envelope': 'connector', 'batch': 'connector'},
+  'variable': {'api': 'ng', 'path': 'variables', 'envelope': 'variable'},
+  'environment': {'api': 'ng', 'path': 'environmentsV2', 'envelope': 'environment', 'batch': 'environment'},
+  'service_account': {'api': 'ng', 'path': 'serviceaccount', 'batch': 'serviceaccount'},
+}
+
+# Objects this worker process has read, by account, type, scope and identifier.
+_memo = {}
+
+def read_url(account, object_type, org_id, project_id, identifier):
+  spec = LOOKUP_TYPES[object_type]
+  if spec['api'] == 'ng':
+    query = scope_query(account, org_id, project_id)
+    if object_type == 'service_account':
+      return f"https://app.harness.io/ng/api/{spec['path']}?{urlencode(query + [('identifiers', identifier)])}"
+    return f"https://app.harness.io/ng/api/{spec['path']}/{identifier}?{urlencode(query)}"
+  if project_id:
+    return f"https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/{spec['path']}/{identifier}"
+  if org_id:
+    return f"https://app.harness.io/v1/orgs/{org_id}/{spec['path']}/{identifier}"
+  return f"https://app.harness.io/v1/{spec['path']}/{identifier}"
+
+def unwrap(object_type, identifier, harness_response):
+  # The object in a read response, or None when it does not exist. Raises HarnessApiError.
+  if harness_response.status_code == 404:
+    return None
+  if harness_response.status_code == 400 and 'RESOURCE_NOT_FOUND' in harness_response.text:
+    return None
+  if harness_response.status_code != 200:
+    raise HarnessApiError(f'Harness {object_type} {identifier} Response was unexpected. Status Code: {harness_response.status_code} {harness_response.text}')
+  spec = LOOKUP_TYPES[object_type]
+  body = loads(harness_response.text)
+  if spec['api'] == 'ng':
+    body = body['data']
+  if isinstance(body, list):
+    # The service account read goes through a filter, which answers with a list.
+    return body[0] if body else None
+  return body[spec['envelope']] if 'envelope' in spec else body
+
+def _disk_path(directory, key):
+  return join(directory, sha256('\0'.join(key).encode('utf-8')).hexdigest() + '.json')
+
+def disk_get(key, ttl):
+  # An object read within the last ttl seconds. Returns whether we had one and the object.
+  # Only a cache dir of our own is read, see module_utils/cache.py.
+  directory = private_cache_dir('lookup')
+  if directory is None:
+    return False, None
+  try:
+    with open(_disk_path(directory, key)) as fr:
+      entry = load(fr)
+  except (OSError, ValueError):
+    return False, None
+  if entry['fetched'] + ttl < time():
+    return False, None
+  return True, entry['object']
+
+def disk_put(key, harness_object):
+  directory = private_cache_dir('lookup')
+  if directory is None:
+    return
+  try:
+    with NamedTemporaryFile('w', dir=directory, prefix='.lookup-', delete=False) as fw:
+      dump({'fetched': time(), 'object': harness_object}, fw)
+    replace(fw.name, _disk_path(directory, key))
+  except OSError:
+    # The disk cache only saves time, a read only temp dir must not fail the lookup.
+    pass
+
+class LookupModule(LookupBase):
+
+  def run(self, terms, variables=None, **kwargs):
+    self.set_options(var_options=variables, direct=kwargs)
+    object_type = self.get_option('object_type')
+    org_id = self.get_option('org')
+    project_id = self.get_option('project')
+    api_key = self.get_option('api_key')
+    account_id = self.get_option('account_id')
+    if not api_key or not account_id:
+      raise AnsibleError('The Harness lookup needs api_key and account_id, or HARNESS_API_KEY and HARNESS_ACCOUNT_ID in the environment.')
+    if project_id and not org_id:
+      raise AnsibleError('Org ID must be provided when project is provided.')
+    if object_type == 'pipeline' and not project_id:
+      raise AnsibleError('Harness Pipelines can only be looked up in a project.')
+
+    identifiers = [str(term) for term in terms]
+    keys = {identifier: (account_id, object_type, org_id or '', project_id or '', identifier) for identifier in identifiers}
+
+    # Answer what we can from memory, then from disk, and read the rest.
+    ttl = self.get_option('cache_ttl')
+    missing = []
+    for identifier in dict.fromkeys(identifiers):
+      key = keys[identifier]
+      if key in _memo:
+        continue
+      if ttl:
+        found, harness_object = disk_get(key, ttl)
+        if found:
+          _memo[key] = harness_object
+          continue
+      missing.append(identifier)
+
+    if missing:
+      account = HarnessAccount(api_key, account_id)
+      try:
+        fetched = self.fetch(account, object_type, org_id, project_id, missing)
+      except HarnessApiError as error:
+        raise AnsibleError(str(error))
+      for identifier, harness_object in fetched.items():
+        _memo[keys[identifier]] = harness_object
+        if ttl:
+          disk_put(keys[identifier], harness_object)
+
+    return [_memo[keys[identifier]] for identifier in identifiers]
+
+  def fetch(self, account, object_type, org_id, project_id, identifiers):
+    # Read identifiers of one type and scope. Types with an identifier filter are read many per request
+    # when there is more than one to read, the others one per request on a worker pool.
+    spec = LOOKUP_TYPES[object_type]
+    if 'batch' in spec and len(identifiers) > 1:
+      account.object_type = spec['batch']
+      responses = batch_read(account, identifiers, org_id, project_id, self.get_option('batch_size'))
+      return {identifier: unwrap(object_type, identifier, responses[identifier]) for identifier in identifiers}
+
+    def read(identifier):
+      url = read_url(account, object_type, org_id, project_id, identifier)
+      return unwrap(object_type, identifier, request("GET", url, headers=account.headers))
+
+    with ThreadPoolExecutor(max_workers=max(1, self.get_option('workers'))) as executor:
+      return dict(zip(identifiers, executor.map(read, identifiers)))
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Shared helpers for talking to the Harness API from several threads at once.
+# Worker threads must never call module.fail_json, so failures are raised as HarnessApiError
+# and turned into a module failure by whoever waits on the workers.
+# Every request goes through one session per process. A module run keeps its connection to
+# Harness open between requests, and module runs in the controller process (plugins/action) share it.
+# Requests Harness throttles are retried after the wait it asks for, and every call is counted in
+# module_utils/metrics.py.
+# HARNESS_HTTP_BACKEND picks what sends the requests for a run: requests, the default, or urls, which
+# needs nothing beyond Python and Ansible (module_utils/urls_session.py). Either is imported on the
+# first request, so a module run that fails before talking to Harness never pays for the import.
+
+# Internal Imports
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import record_call
+
+# Stdlib Imports
+from os import getenv
+from json import dumps, loads
+from time import monotonic
+
+# Connections kept open per host. The threaded modules run up to this many requests at once.
+POOL_SIZE = 32
+
+# Times a throttled request is sent again. A 429 means Harness did not act on the request, so this is
+# safe for writes too. Connection failures are retried, failures after the request was sent are not.
+THROTTLE_RETRIES = 3
+
+HTTP_BACKENDS = ('requests', 'urls')
+
+# Sessions of this process, by backend.
+_sessions = {}
+
+class HarnessApiError(Exception):
+  pass
+
+class HarnessAccount(object):
+  # Stands in for the module in the helpers below, for plugins that talk to Harness without an AnsibleModule.
+  def __init__(self, api_key, account_id):
+    self.api_key = api_key
+    self.account_id = account_id
+    self.headers = {'x-api-key': api_key, 'Harness-Account': account_id, 'Content-Type': 'application/json'}
+
+def http_backend():
+  # Read on every request, so that runs in the controller process follow their own task's environment.
+  backend = (getenv('HARNESS_HTTP_BACKEND') or 'requests').lower()
+  if backend not in HTTP_BACKENDS:
+    raise HarnessApiError(f"HARNESS_HTTP_BACKEND must be one of {', '.join(HTTP_BACKENDS)}, not {backend}.")
+  return backend
+
+def session():
+  # The session of this process for the selected backend, created on first use.
+  backend = http_backend()
+  if backend not in _sessions:
+    if backend == 'urls':
+      from ansible_collections.karcadia.harness.plugins.module_utils.urls_session import UrlsSession
+      _sessions[backend] = UrlsSession(THROTTLE_RETRIES)
+    else:
+      _sessions[backend] = _requests_session()
+  return _sessions[backend]
+
+def _requests_session():
+  from requests import Session
+  from requests.adapters import HTTPAdapter
+  from http.cookiejar import DefaultCookiePolicy
+  requests_session = Session()
+  # Each request stands on its own, as it did with requests.request. Keep no cookies between them.
+  requests_session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+  requests_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=_retry_policy()))
+  return requests_session
+
+def reset_session():
+  # Drop the sessions of this process without closing them, for a forked child whose parent still uses their connections.
+  _sessions.clear()
+
+def _retry_policy():
+  from urllib3.util.retry import Retry
+  settings = dict(total=THROTTLE_RETRIES, read=0, status_forcelist=(429,), backoff_factor=1, respect_retry_after_header=True, raise_on_status=False)
+  try:
+    return Retry(allowed_methods=None, **settings)
+  except TypeError:
+    # urllib3 before 1.26 names the option method_whitelist.
+    return Retry(method_whitelist=False, **settings)
+
+def request(method, url, **kwargs):
+  # Takes the same arguments as requests.request.
+  started = monotonic()
+  harness_response = session().request(method, url, **kwargs)
+  seconds = monotonic() - started
+
+  data = kwargs.get('data')
+  sent = len(data) if isinstance(data, (str, bytes)) else 0
+  if kwargs.get('stream'):
+    # The body of a download has not been read yet, so go by what the server announced.
+    received = int(harness_response.headers.get('Content-Length') or 0)
+  else:
+    received = len(harness_response.content)
+  retry_statuses = getattr(harness_response, 'retry_statuses', None)
+  if retry_statuses is None:
+    history = getattr(getattr(harness_response.raw, 'retries', None), 'history', None) or ()
+    retry_statuses = [attempt.status for attempt in history]
+  throttled = retry_statuses.count(429) + (harness_response.status_code == 429)
+  record_call(method, url, seconds, sent, received, len(retry_statuses), throttled)
+  return harness_response
+
+def scope_query(module, org_id=None, project_id=None):
+  # The ng query parameters naming an account, org or project scope.
+  query = [('accountIdentifier', module.account_id)]
+  if org_id:
+    query.append(('orgIdentifier', org_id))
+  if project_id:
+    query.append(('projectIdentifier', project_id))
+  return query
+
+def get_json(module, url, title='Harness'):
+  # GET one url and return its decoded body.
+  harness_response = request("GET", url, headers=module.headers)
+  if harness_response.status_code != 200:
+    raise HarnessApiError(f'{title} Response was unexpected. Status Code: {harness_response.status_code} {harness_response.text}')
+  return loads(harness_response.text)
+
+def download(module, url, title='Harness'):
+  # Start a streaming GET for a file download. The caller reads the body a chunk at a time.
+  # Content encoding is turned off so that Content-Length is the size of the file itself.
+  headers = dict(module.headers)
+  headers['Accept-Encoding'] = 'identity'
+  harness_response = request("GET", url, headers=headers, stream=True)
+  if harness_response.status_code != 200:
+    harness_response.close()
+    raise HarnessApiError(f'{title} Download was unexpected. Status Code: {harness_response.status_code}')
+  return harness_response
+
+def paginate(module, url, page_limit=20, title='Harness'):
+  # Walk every page of a v1 list endpoint, which returns a bare list per page.
+  # X-Total-Elements tells us when to stop. Without it we stop at the first short page.
+  separator = '&' if '?' in url else '?'
+  items = []
+  page = 0
+  while True:
+    harness_response = request("GET", f'{url}{separator}page={page}&limit={page_limit}', headers=module.headers)
+    if harness_response.status_code != 200:
+      raise HarnessApiError(f'{title} List Response was unexpected. Status Code: {harness_response.status_code} {harness_response.text}')
+    page_items = loads(harness_response.text)
+    items.extend(page_items)
+    total_elements = harness_response.headers.get('X-Total-Elements')
+    if total_elements is not None:
+      if len(items) >= int(total_elements) or not page_items:
+        return items
+    elif len(page_items) < page_limit:
+      return items
+    page += 1
+
+def paginate_ng(module, url, page_limit=20, page_param='pageIndex', size_param='pageSize', title='Harness'):
+  # Walk every page of an ng list endpoint, which wraps each page as data.content with data.totalPages.
+  separator = '&' if '?' in url else '?'
+  items = []
+  page = 0
+  while True:
+    harness_response = request("GET", f'{url}{separator}{page_param}={page}&{size_param}={page_limit}', headers=module.headers)
+    if harness_response.status_code != 200:
+      raise HarnessApiError(f'{title} List Response was unexpected. Status Code: {harness_response.status_code} {harness_response.text}')
+    data = loads(harness_response.text)['data']
+    items.extend(data['content'])
+    page += 1
+    if page >= data.get('totalPages', 0) or not data['content']:
+      return items
+
+def upsert(module, body):
+  # Write an object without reading it first. A PUT on read_url updates it in place. When the API
+  # answers that there is nothing there to update, the object is created with a POST on push_url.
+  data = dumps(body)
+  harness_response = request("PUT", module.read_url, headers=module.headers, data=data)
+  not_found = harness_response.status_code == 404
+  if harness_response.status_code == 400 and 'RESOURCE_NOT_FOUND' in harness_response.text:
+    not_found = True
+  if not_found:
+    harness_response = request("POST", module.push_url, headers=module.headers, data=data)
+  return harness_response
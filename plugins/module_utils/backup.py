@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Shared helpers for writing karcadia.harness backup archives.
+
+# Stdlib Imports
+from os import walk
+from os.path import join, relpath, getsize, basename, isfile
+from json import dumps, loads
+from hashlib import sha256
+from io import BytesIO
+from gzip import GzipFile
+from tarfile import open as tar_open, TarInfo
+from threading import Lock
+from time import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+SPOOL_SIZE = 16 * 1024 * 1024
+
+class HashingReader(object):
+  # Wrap a readable file object and hash everything read through it.
+  def __init__(self, file_obj):
+    self.file_obj = file_obj
+    self.digest = sha256()
+
+  def read(self, size=-1):
+    chunk = self.file_obj.read(size)
+    self.digest.update(chunk)
+    return chunk
+
+class ChunkReader(object):
+  # Present an iterator of byte chunks, such as a streaming download, as a readable file object.
+  # Reads return exactly the amount asked for until the chunks run out, which is what tarfile expects,
+  # and no more than one chunk is held at a time.
+  def __init__(self, chunks):
+    self.chunks = iter(chunks)
+    self.buffer = b''
+
+  def read(self, size=-1):
+    while size < 0 or len(self.buffer) < size:
+      chunk = next(self.chunks, None)
+      if chunk is None:
+        break
+      self.buffer += chunk
+    if size < 0:
+      size = len(self.buffer)
+    data, self.buffer = self.buffer[:size], self.buffer[size:]
+    return data
+
+class HashingWriter(object):
+  # Wrap a writable file object and hash and count everything written through it.
+  def __init__(self, file_obj):
+    self.file_obj = file_obj
+    self.digest = sha256()
+    self.size = 0
+
+  def write(self, data):
+    self.digest.update(data)
+    self.size += len(data)
+    return self.file_obj.write(data)
+
+  def flush(self):
+    self.file_obj.flush()
+
+def archive_base(dest):
+  # Strip the tarball extension from a destination to build sibling file names.
+  for extension in ('.tar.gz', '.tgz'):
+    if dest.endswith(extension):
+      return dest[:-len(extension)]
+  return dest
+
+def shard_base(location):
+  # Work out the base name shared by the shards of a backup from its manifest or tarball location.
+  suffix = '.' + MANIFEST_NAME
+  if location.endswith(suffix):
+    return location[:-len(suffix)]
+  return archive_base(location)
+
+def read_manifest(location):
+  # Load the manifest of a local backup. Sharded backups keep it beside the shards, so it is read without
+  # touching them. A single tarball carries it as its last member, so the tarball is read through once.
+  if location.endswith('.json'):
+    with open(location, 'r') as file_reader:
+      return loads(file_reader.read())
+  sidecar = f'{shard_base(location)}.{MANIFEST_NAME}'
+  if isfile(sidecar):
+    return read_manifest(sidecar)
+  with tar_open(location, mode='r|gz') as tar:
+    for tar_info in tar:
+      if tar_info.name == MANIFEST_NAME or tar_info.name.endswith('/' + MANIFEST_NAME):
+        return loads(tar.extractfile(tar_info).read())
+  raise ValueError(f'{location} does not contain a backup manifest.')
+
+def read_members(location, members, root=None):
+  # Read just the given members, returning their content by path. Only the tarballs that hold them are opened,
+  # and each one is read only as far as its last wanted member, so unchanged shards are never decompressed.
+  by_file = {}
+  for member in members:
+    if member.get('shard'):
+      file_name = f'{shard_base(location)}.{member["shard"]}.tar.gz'
+    else:
+      file_name = location
+    by_file.setdefault(file_name, set()).add(member['path'])
+  contents = {}
+  for file_name, wanted in by_file.items():
+    with tar_open(file_name, mode='r|gz') as tar:
+      for tar_info in tar:
+        if root is not None:
+          path = tar_info.name[len(root) + 1:] if tar_info.name.startswith(root + '/') else None
+        else:
+          path = next((candidate for candidate in wanted if tar_info.name.endswith('/' + candidate)), None)
+        if path in wanted:
+          contents[path] = tar.extractfile(tar_info).read()
+          wanted.discard(path)
+          if not wanted:
+            break
+  return contents
+
+def list_members(work_dir):
+  # Walk the work dir and return every file in it, sorted by path.
+  members = []
+  for dir_path, dir_names, file_names in walk(work_dir):
+    for file_name in file_names:
+      full_path = join(dir_path, file_name)
+      members.append({'path': relpath(full_path, work_dir), 'size': getsize(full_path)})
+  members.sort(key=lambda member: member['path'])
+  return members
+
+def plan_shards(members, shard_by, shard_size):
+  # Split the members into named shards, either by top level object type or by accumulated size.
+  shards = []
+  if shard_by == 'type':
+    by_type = {}
+    for member in members:
+      object_type = member['path'].split('/')[0]
+      if object_type not in by_type:
+        by_type[object_type] = []
+        shards.append((object_type, by_type[object_type]))
+      by_type[object_type].append(member)
+  elif shard_by == 'size':
+    size_limit = shard_size * 1024 * 1024
+    current = []
+    current_size = 0
+    for member in members:
+      if current and current_size + member['size'] > size_limit:
+        shards.append((f'part{len(shards) + 1:04d}', current))
+        current = []
+        current_size = 0
+      current.append(member)
+      current_size += member['size']
+    if current:
+      shards.append((f'part{len(shards) + 1:04d}', current))
+  else:
+    shards.append(('all', members))
+  return shards
+
+def canonical_yaml(content):
+  # Re-serialize YAML with sorted keys and fixed formatting, so equal objects always produce equal bytes.
+  # Content that does not parse is kept as it came from the API.
+  from yaml import safe_load, dump, YAMLError
+  try:
+    return dump(safe_load(content), sort_keys=True, default_flow_style=False, allow_unicode=True, width=4096)
+  except YAMLError:
+    return content
+
+def new_manifest(org_id, project_id, root, reproducible=False):
+  # Start a manifest describing one backup.
+  # Reproducible manifests leave out the creation time, since it would differ between otherwise identical backups.
+  manifest = {
+    'version': MANIFEST_VERSION,
+    'org': org_id,
+    'project': project_id,
+    'root': root,
+  }
+  if not reproducible:
+    manifest['created'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+  return manifest
+
+class ArchiveShard(object):
+  # One streaming tarball. Members are written one at a time under the shard lock,
+  # so different shards can be compressed by different threads at the same time.
+  # The gzip header carries mtime and no file name, so a fixed mtime gives a byte for byte stable stream.
+  def __init__(self, name, sink, mtime):
+    self.name = name
+    self.sink = sink
+    self.mtime = mtime
+    self.hashing_sink = HashingWriter(sink)
+    self.gzip = GzipFile(filename='', mode='wb', fileobj=self.hashing_sink, mtime=mtime)
+    self.tar = tar_open(fileobj=self.gzip, mode='w|')
+    self.lock = Lock()
+    self.members = 0
+    self.content_size = 0
+
+  def add(self, name, file_obj, size):
+    tar_info = TarInfo(name=name)
+    tar_info.size = size
+    tar_info.mtime = self.mtime
+    reader = HashingReader(file_obj)
+    with self.lock:
+      self.tar.addfile(tar_info, reader)
+      self.members += 1
+      self.content_size += size
+    return reader.digest.hexdigest()
+
+  def close(self):
+    self.tar.close()
+    self.gzip.close()
+    self.sink.close()
+    return {
+      'name': self.name,
+      'file': basename(self.sink.name),
+      'size': self.hashing_sink.size,
+      'sha256': self.hashing_sink.digest.hexdigest(),
+      'members': self.members,
+    }
+
+  def abort(self):
+    if hasattr(self.sink, 'abort'):
+      self.sink.abort()
+    else:
+      self.sink.close()
+
+class ArchiveWriter(object):
+  # Write backup members into one tarball, or into shards tied together by a manifest.
+  # open_sink(name) must return a writable binary file object with a name attribute,
+  # either a local file or an object storage upload, so archives can be produced without
+  # ever landing on local disk.
+  # Reproducible archives use a fixed mtime and hold streamed members until close, so they
+  # can be written sorted by path whatever order they were fetched in.
+  def __init__(self, open_sink, dest, root, manifest, shard_by=None, shard_size=512, reproducible=False):
+    self.open_sink = open_sink
+    self.dest = dest
+    self.base = archive_base(dest)
+    self.root = root.lstrip('/')
+    self.manifest = manifest
+    self.shard_by = shard_by
+    self.shard_size = shard_size
+    self.shards = {}
+    self.current_shard = None
+    self.members = []
+    self.reproducible = reproducible
+    self.mtime = 0 if reproducible else int(time())
+    self.pending = []
+    # Members and bytes promised to each size shard, counted when the shard is picked rather than
+    # when the member is written, so that members added at the same time cannot overfill a shard.
+    self.reserved = {}
+    self.lock = Lock()
+
+  def _shard(self, name):
+    # Find or open the named shard.
+    with self.lock:
+      if name not in self.shards:
+        if self.shard_by:
+          sink = self.open_sink(f'{self.base}.{name}.tar.gz')
+        else:
+          sink = self.open_sink(self.dest)
+        self.shards[name] = ArchiveShard(name, sink, self.mtime)
+      return self.shards[name]
+
+  def _pick_shard(self, path, size):
+    # Choose the shard for a member when the caller has not already planned one.
+    if self.shard_by == 'type':
+      return path.split('/')[0]
+    if self.shard_by == 'size':
+      with self.lock:
+        reserved = self.reserved.get(self.current_shard)
+        if reserved is None or (reserved['members'] and reserved['size'] + size > self.shard_size * 1024 * 1024):
+          self.current_shard = f'part{len(self.reserved) + 1:04d}'
+          reserved = self.reserved[self.current_shard] = {'members': 0, 'size': 0}
+        reserved['members'] += 1
+        reserved['size'] += size
+        return self.current_shard
+    return 'all'
+
+  def add_file(self, path, file_obj, size, shard=None):
+    # Stream a member into its shard, hashing it on the way through.
+    shard_name = shard or self._pick_shard(path, size)
+    digest = self._shard(shard_name).add(self.root + '/' + path, file_obj, size)
+    member = {'path': path, 'size': size, 'sha256': digest}
+    if self.shard_by:
+      member['shard'] = shard_name
+    with self.lock:
+      self.members.append(member)
+    return member
+
+  def add_bytes(self, path, content, shard=None):
+    return self.add_spooled(path, BytesIO(content), len(content), shard=shard)
+
+  def add_spooled(self, path, file_obj, size, shard=None):
+    # Add a member whose content can be held until close, either in memory or in a spool file.
+    # Reproducible archives hold it so every member can be written sorted by path.
+    if self.reproducible:
+      with self.lock:
+        self.pending.append((path, file_obj, size, shard))
+      return None
+    member = self.add_file(path, file_obj, size, shard=shard)
+    file_obj.close()
+    return member
+
+  def add_work_dir(self, work_dir, workers):
+    # Archive a staged work dir. Planned shards are compressed in parallel, one worker per shard.
+    shards = plan_shards(list_members(work_dir), self.shard_by, self.shard_size)
+
+    def add_shard(shard_name, shard_members):
+      for member in shard_members:
+        with open(join(work_dir, member['path']), 'rb') as file_reader:
+          self.add_file(member['path'], file_reader, member['size'], shard=shard_name)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+      futures = [executor.submit(add_shard, shard_name, shard_members) for shard_name, shard_members in shards]
+      for future in futures:
+        future.result()
+
+  def close(self):
+    # Finish every shard and write the manifest, embedded in a single tarball or beside the shards.
+    pending = sorted(self.pending, key=lambda item: item[0])
+    self.pending = []
+    for path, file_obj, size, shard in pending:
+      self.add_file(path, file_obj, size, shard=shard)
+      file_obj.close()
+    self.members.sort(key=lambda member: member['path'])
+    self.manifest['members'] = self.members
+    if not self.shard_by:
+      shard = self._shard('all')
+      content = dumps(self.manifest, indent=2, sort_keys=True).encode('utf-8')
+      shard.add(self.root + '/' + MANIFEST_NAME, BytesIO(content), len(content))
+      shard.close()
+      return self.dest
+    self.manifest['shard_by'] = self.shard_by
+    self.manifest['shards'] = [self.shards[name].close() for name in sorted(self.shards)]
+    manifest_location = f'{self.base}.{MANIFEST_NAME}'
+    sink = self.open_sink(manifest_location)
+    sink.write(dumps(self.manifest, indent=2, sort_keys=True).encode('utf-8'))
+    sink.close()
+    return manifest_location
+
+  def abort(self):
+    # Give up on every shard, discarding any object storage uploads in flight.
+    for path, file_obj, size, shard in self.pending:
+      file_obj.close()
+    self.pending = []
+    for name in self.shards:
+      self.shards[name].abort()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Batched existence and read lookups.
+# Several Harness list endpoints take a filter on identifiers, so many objects of one type can be
+# resolved with a single request instead of one GET on read_url per object. The results are shaped
+# exactly like the single GET would have returned them. They reach ensure_present and ensure_absent
+# through the existing option (see bulk_existing), which read_object answers from.
+
+# Internal Imports
+from ansible_collections.karcadia.harness.plugins.module_utils.api import HarnessApiError, request, scope_query
+from ansible_collections.karcadia.harness.plugins.module_utils.cache import SCOPE_LISTERS, scope_cache
+
+# Stdlib Imports
+from json import dumps, loads
+from urllib.parse import urlencode
+
+# Identifiers resolved per request. Identifiers travel in the query string for some types,
+# so this also keeps the url well below common length limits.
+BATCH_SIZE = 100
+
+# Identifiers in one scope from which listing the whole scope is worth it for types without a batch read.
+# One listing page holds 20 objects, so below this the single GETs cost no more.
+LISTING_THRESHOLD = 20
+
+class PrefetchedResponse(object):
+  # Stands in for a requests response in the ensure functions, which only look at these fields.
+  def __init__(self, status_code, body):
+    self.status_code = status_code
+    self.text = dumps(body)
+    self.reason = 'OK' if status_code == 200 else 'Bad Request'
+
+# What the ng single GET answers for an identifier that does not exist.
+NG_NOT_FOUND = {'status': 'ERROR', 'code': 'RESOURCE_NOT_FOUND_EXCEPTION', 'message': 'Resource not found'}
+
+def _check(harness_response, title):
+  if harness_response.status_code != 200:
+    raise HarnessApiError(f'{title} Batch Read was unexpected. Status Code: {harness_response.status_code} {harness_response.text}')
+  return loads(harness_response.text)['data']
+
+def _read_service_accounts(module, scope, identifiers):
+  # serviceaccount takes a comma separated identifiers filter and answers with a bare list.
+  query = scope + [('identifiers', ','.join(identifiers))]
+  harness_response = request("GET", f'https://app.harness.io/ng/api/serviceaccount?{urlencode(query)}', headers=module.headers)
+  found = {item['identifier']: item for item in _check(harness_response, 'Serviceaccount')}
+  # The single GET goes through the same filter, so an absent account is an empty list.
+  responses = {}
+  for identifier in identifiers:
+    data = [found[identifier]] if identifier in found else []
+    responses[identifier] = PrefetchedResponse(200, {'status': 'SUCCESS', 'data': data})
+  return responses
+
+def _read_connectors(module, scope, identifiers):
+  # connectors/listV2 takes a filter body. Every entry has the shape of the single GET's data.
+  query = scope + [('pageIndex', 0), ('pageSize', len(identifiers))]
+  body = {'filterType': 'Connector', 'connectorIdentifiers': identifiers}
+  harness_response = request("POST", f'https://app.harness.io/ng/api/connectors/listV2?{urlencode(query)}', headers=module.headers, data=dumps(body))
+  found = {item['connector']['identifier']: item for item in _check(harness_response, 'Connector')['content']}
+  return _ng_responses(identifiers, found)
+
+def _read_environments(module, scope, identifiers):
+  # environmentsV2 takes envIdentifiers once per identifier.
+  query = scope + [('envIdentifiers', identifier) for identifier in identifiers] + [('page', 0), ('size', len(identifiers))]
+  harness_response = request("GET", f'https://app.harness.io/ng/api/environmentsV2?{urlencode(query)}', headers=module.headers)
+  found = {item['environment']['identifier']: item for item in _check(harness_response, 'Environment')['content']}
+  return _ng_responses(identifiers, found)
+
+def _ng_responses(identifiers, found):
+  responses = {}
+  for identifier in identifiers:
+    if identifier in found:
+      responses[identifier] = PrefetchedResponse(200, {'status': 'SUCCESS', 'data': found[identifier]})
+    else:
+      responses[identifier] = PrefetchedResponse(400, NG_NOT_FOUND)
+  return responses
+
+# Batch readers by module.object_type. The v1 connector module also calls itself 'connector',
+# so connectors are only batched for read urls on the ng api.
+BATCH_READERS = {
+  'serviceaccount': _read_service_accounts,
+  'connector': _read_connectors,
+  'environment': _read_environments,
+}
+
+def can_batch(module):
+  return module.object_type in BATCH_READERS and '/ng/api/' in module.read_url
+
+def batch_read(module, identifiers, org_id=None, project_id=None, batch_size=BATCH_SIZE):
+  # Resolve identifiers of the module's object type in one scope, batch_size per request.
+  # Returns a response for every identifier, present or not. Raises HarnessApiError.
+  reader = BATCH_READERS[module.object_type]
+  scope = scope_query(module, org_id, project_id)
+  identifiers = list(dict.fromkeys(identifiers))
+  responses = {}
+  for start in range(0, len(identifiers), batch_size):
+    responses.update(reader(module, scope, identifiers[start:start + batch_size]))
+  return responses
+
+def bulk_existing(module, identifiers, org_id=None, project_id=None):
+  # The value of the existing option for each identifier, read with as few requests as the type allows:
+  # batch reads where the type has them, otherwise one listing of the scope when there are enough
+  # identifiers to pay for it. Returns None when neither applies. Raises HarnessApiError.
+  if can_batch(module):
+    responses = batch_read(module, identifiers, org_id, project_id)
+    # An absent object answers 400 on the ng types, and an empty list with a 200 on service accounts.
+    return {identifier: loads(response.text) if response.status_code == 200 else {} for identifier, response in responses.items()}
+  if module.object_type in SCOPE_LISTERS and len(set(identifiers)) >= LISTING_THRESHOLD:
+    objects = dict(SCOPE_LISTERS[module.object_type](module, scope_query(module, org_id, project_id)))
+    return {identifier: objects.get(identifier) or {} for identifier in identifiers}
+  return None
+
+def absent_response(module):
+  # What the single GET answers for an object that does not exist. The ensure functions check
+  # for a 404 first, and the ng ones also accept the RESOURCE_NOT_FOUND code in the body.
+  if module.object_type == 'serviceaccount':
+    return PrefetchedResponse(200, {'status': 'SUCCESS', 'data': []})
+  return PrefetchedResponse(404, NG_NOT_FOUND)
+
+def existing_response(module, existing):
+  # Wrap an object handed to the module through the existing option as the single GET would answer.
+  # Either the whole GET body or one entry of the type's list endpoint is accepted.
+  if not existing:
+    return absent_response(module)
+  if module.object_type == 'serviceaccount':
+    if 'data' not in existing:
+      existing = {'status': 'SUCCESS', 'data': [existing]}
+  elif '/ng/api/' in module.read_url and 'data' not in existing:
+    existing = {'status': 'SUCCESS', 'data': existing}
+  return PrefetchedResponse(200, existing)
+
+def read_object(module):
+  # The existence check of ensure_present/ensure_absent.
+  # Answer from the existing option or the scope cache when we have one, otherwise GET read_url.
+  if module.params.get('existing') is not None:
+    return existing_response(module, module.params['existing'])
+  cache = scope_cache(module)
+  if cache is not None:
+    try:
+      cached = cache.lookup(module.params['identifier'])
+    except HarnessApiError:
+      # A failed listing leaves the answer to the single GET, which reports its own errors.
+      cached = None
+    if cached is not None:
+      present, entry = cached
+      return existing_response(module, entry) if present else absent_response(module)
+  return request("GET", module.read_url, headers=module.headers)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A listing of a whole scope, shared between module runs through a file on the host running them.
+# A loop over hundreds of objects of one type in one org or project otherwise GETs every object.
+# The first run for a type and scope lists the scope once and writes it down. Later runs, in the
+# same loop or in other forks, answer their existence check from the file, including for objects
+# that are not there. Every file is guarded by an flock so that only one fork lists a scope.
+# Whatever is in the cache dir is believed, so it is only used when it belongs to the user running the
+# module and nobody else can read or write it. Otherwise the cache is off and every run reads Harness.
+
+# Internal Imports
+from ansible_collections.karcadia.harness.plugins.module_utils.api import get_json, paginate, paginate_ng, scope_query
+
+# Stdlib Imports
+from os import getenv, getuid, lstat, makedirs, open as os_open, fdopen, replace, stat, O_CREAT, O_NOFOLLOW, O_RDWR
+from os.path import join
+from json import dump, load
+from time import time
+from fcntl import flock, LOCK_EX, LOCK_UN
+from stat import S_ISDIR
+from hashlib import sha256
+from tempfile import gettempdir, NamedTemporaryFile
+from urllib.parse import urlencode
+
+def _v1_collection(module, scope):
+  # v1 list entries carry the same envelope as the single GET.
+  return [(entry[module.object_type]['identifier'], entry) for entry in paginate(module, module.push_url, title=module.object_title)]
+
+def _variables(module, scope):
+  url = f'https://app.harness.io/ng/api/variables?{urlencode(scope)}'
+  return [(entry['variable']['identifier'], entry) for entry in paginate_ng(module, url, title=module.object_title)]
+
+def _environments(module, scope):
+  url = f'https://app.harness.io/ng/api/environmentsV2?{urlencode(scope)}'
+  items = paginate_ng(module, url, page_param='page', size_param='size', title=module.object_title)
+  return [(entry['environment']['identifier'], entry) for entry in items]
+
+def _ng_connectors(module, scope):
+  url = f'https://app.harness.io/ng/api/connectors?{urlencode(scope)}'
+  return [(entry['connector']['identifier'], entry) for entry in paginate_ng(module, url, title=module.object_title)]
+
+def _service_accounts(module, scope):
+  url = f'https://app.harness.io/ng/api/serviceaccount?{urlencode(scope)}'
+  return [(entry['identifier'], entry) for entry in get_json(module, url, title=module.object_title)['data']]
+
+def _connectors(module, scope):
+  if '/ng/api/' in module.read_url:
+    return _ng_connectors(module, scope)
+  return _v1_collection(module, scope)
+
+# Scope listers by module.object_type. Only types whose list entries hold the whole object are here.
+# Pipeline and template listings are summaries without the YAML, so those keep their single GET.
+SCOPE_LISTERS = {
+  'secret': _v1_collection,
+  'service': _v1_collection,
+  'connector': _connectors,
+  'variable': _variables,
+  'environment': _environments,
+  'serviceaccount': _service_accounts,
+}
+
+def cache_dir():
+  # Every user gets a directory of their own under the system temp dir.
+  return getenv('HARNESS_CACHE_DIR') or join(gettempdir(), f'karcadia-harness-cache-{getuid()}')
+
+def _private(path):
+  # A directory, not a symlink, owned by us and closed to everyone else.
+  status = lstat(path)
+  return S_ISDIR(status.st_mode) and status.st_uid == getuid() and not status.st_mode & 0o077
+
+def private_cache_dir(*parts):
+  # The cache dir, or a directory under it, created when missing. None when it or the cache dir
+  # belongs to someone else or is open to others, for example because another user created it first.
+  path = join(cache_dir(), *parts)
+  try:
+    # makedirs only gives the last directory the mode, so the cache dir is made on its own first.
+    makedirs(cache_dir(), mode=0o700, exist_ok=True)
+    makedirs(path, mode=0o700, exist_ok=True)
+    if _private(cache_dir()) and _private(path):
+      return path
+  except OSError:
+    pass
+  return None
+
+def _cache_path(module, directory):
+  # The v1 and ng connector modules share an object type but not a response shape.
+  api = 'ng' if '/ng/api/' in module.read_url else 'v1'
+  scope = (module.account_id, api, module.object_type, module.params.get('org') or '', module.params.get('project') or '')
+  return join(directory, 'list-' + sha256('\0'.join(scope).encode('utf-8')).hexdigest() + '.json')
+
+# Listings this process has already parsed, by path, with the mtime and size of the file they were read from.
+# Module runs in the controller process (plugins/action) answer a whole loop from one parse.
+_parsed = {}
+
+class ScopeCache(object):
+  # One file per account, object type and scope, holding every object of the scope by identifier.
+  # Identifiers written since the listing are kept in stale, and go to the API until the next listing.
+  def __init__(self, module, ttl, directory):
+    self.module = module
+    self.ttl = ttl
+    self.directory = directory
+    self.path = _cache_path(module, directory)
+
+  def _locked(self):
+    lock = fdopen(os_open(self.path + '.lock', O_CREAT | O_RDWR | O_NOFOLLOW, 0o600), 'r+')
+    flock(lock, LOCK_EX)
+    return lock
+
+  def _load(self):
+    try:
+      version = stat(self.path)
+      version = (version.st_mtime_ns, version.st_size)
+      if self.path in _parsed and _parsed[self.path][0] == version:
+        entry = _parsed[self.path][1]
+      else:
+        with open(self.path) as fr:
+          entry = load(fr)
+        _parsed[self.path] = (version, entry)
+    except (OSError, ValueError):
+      return None
+    if entry.get('created', 0) + self.ttl < time():
+      return None
+    return entry
+
+  def _save(self, entry):
+    # Write next to the cache file and rename over it, so that readers never see half a file.
+    with NamedTemporaryFile('w', dir=self.directory, prefix='.list-', delete=False) as fw:
+      dump(entry, fw)
+    replace(fw.name, self.path)
+
+  def lookup(self, identifier):
+    # Answer one existence check, listing the scope first when there is no fresh listing.
+    # Returns whether the object exists and its list entry, or None when the object was written
+    # since the listing and must be read from the API. Raises HarnessApiError when the listing fails.
+    lock = self._locked()
+    try:
+      entry = self._load()
+      if entry is None:
+        scope = scope_query(self.module, self.module.params.get('org'), self.module.params.get('project'))
+        objects = dict(SCOPE_LISTERS[self.module.object_type](self.module, scope))
+        entry = {'created': time(), 'objects': objects, 'stale': []}
+        self._save(entry)
+    finally:
+      flock(lock, LOCK_UN)
+      lock.close()
+    if identifier in entry['stale']:
+      return None
+    if identifier in entry['objects']:
+      return True, entry['objects'][identifier]
+    return False, None
+
+  def forget(self, identifier):
+    # Mark an object as written, so that its next existence check goes back to the API.
+    lock = self._locked()
+    try:
+      entry = self._load()
+      if entry is not None and identifier not in entry['stale']:
+        entry['objects'].pop(identifier, None)
+        entry['stale'].append(identifier)
+        self._save(entry)
+    finally:
+      flock(lock, LOCK_UN)
+      lock.close()
+
+def scope_cache(module):
+  # The cache for this module run, or None when the cache_ttl option is off, the type cannot be listed
+  # or the cache dir cannot be trusted.
+  ttl = module.params.get('cache_ttl')
+  if not ttl or module.object_type not in SCOPE_LISTERS:
+    return None
+  directory = private_cache_dir()
+  if directory is None:
+    return None
+  return ScopeCache(module, ttl, directory)
+
+def forget_object(module):
+  # Called after every write, successful or not.
+  cache = scope_cache(module)
+  if cache is not None:
+    cache.forget(module.params['identifier'])
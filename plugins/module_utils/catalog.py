@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A local SQLite catalog of backup_project runs and the objects each archive holds.
+# Every member hash from the backup manifest is indexed by object type and identifier,
+# so object history can be answered without opening a single tarball.
+
+# Stdlib Imports
+from sqlite3 import connect
+from datetime import datetime, timezone
+
+CATALOG_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  org TEXT NOT NULL,
+  project TEXT NOT NULL,
+  created TEXT NOT NULL,
+  location TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS objects (
+  backup_id INTEGER NOT NULL REFERENCES backups (id) ON DELETE CASCADE,
+  object_type TEXT NOT NULL,
+  identifier TEXT NOT NULL,
+  path TEXT NOT NULL,
+  sha256 TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  shard TEXT
+);
+CREATE INDEX IF NOT EXISTS backups_by_project ON backups (org, project, created);
+CREATE INDEX IF NOT EXISTS objects_by_identifier ON objects (object_type, identifier, backup_id);
+CREATE INDEX IF NOT EXISTS objects_by_backup ON objects (backup_id);
+"""
+
+def member_object(path):
+  # Work out the object type and identifier of an archive member from its path.
+  # Object directories come in type/identifier pairs, for example services/a/a.yaml or
+  # environments/e/infrastructures/i/i.yaml. A trailing type directory holds its objects as
+  # plain files, for example environments/e/overrides/o.yaml. Parent identifiers are kept
+  # in front so that nested objects stay unique, giving e/i and e/o for the examples above.
+  parts = path.split('/')
+  dirs = parts[:-1]
+  stem = parts[-1].rsplit('.', 1)[0]
+  if not dirs:
+    return '', stem
+  if len(dirs) % 2:
+    object_type = dirs[-1]
+    identifiers = dirs[1:-1:2] + [stem]
+  else:
+    object_type = dirs[-2]
+    identifiers = dirs[1::2]
+  return object_type, '/'.join(identifiers)
+
+class BackupCatalog(object):
+  def __init__(self, path):
+    self.path = path
+    # Wait out other writers instead of failing, backups of several projects may finish together.
+    self.connection = connect(path, timeout=30)
+    self.connection.execute('PRAGMA foreign_keys = ON')
+    version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+    if version < CATALOG_VERSION:
+      with self.connection:
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f'PRAGMA user_version = {CATALOG_VERSION}')
+
+  def close(self):
+    self.connection.close()
+
+  def record_backup(self, org_id, project_id, location, members, created=None):
+    # Record one backup and every member hash from its manifest in a single transaction.
+    if not created:
+      created = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    with self.connection:
+      cursor = self.connection.execute(
+        'INSERT INTO backups (org, project, created, location) VALUES (?, ?, ?, ?)',
+        (org_id, project_id, created, location)
+      )
+      backup_id = cursor.lastrowid
+      rows = []
+      for member in members:
+        object_type, identifier = member_object(member['path'])
+        rows.append((backup_id, object_type, identifier, member['path'], member['sha256'], member['size'], member.get('shard')))
+      self.connection.executemany(
+        'INSERT INTO objects (backup_id, object_type, identifier, path, sha256, size, shard) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        rows
+      )
+    return backup_id
+
+  def forget_backup(self, backup_id):
+    # Drop a backup and its objects, for example once the archive itself has been deleted.
+    with self.connection:
+      self.connection.execute('DELETE FROM backups WHERE id = ?', (backup_id,))
+
+  def backups(self, org_id=None, project_id=None):
+    # List the recorded backups, oldest first.
+    query = 'SELECT id, org, project, created, location FROM backups WHERE 1 = 1'
+    args = []
+    if org_id:
+      query += ' AND org = ?'
+      args.append(org_id)
+    if project_id:
+      query += ' AND project = ?'
+      args.append(project_id)
+    query += ' ORDER BY created, id'
+    return [_backup_dict(row) for row in self.connection.execute(query, args)]
+
+  def backup(self, backup_id):
+    # Look up one recorded backup.
+    row = self.connection.execute('SELECT id, org, project, created, location FROM backups WHERE id = ?', (backup_id,)).fetchone()
+    return _backup_dict(row) if row else None
+
+  def members(self, backup_id):
+    # The members of one backup, in the same form as the manifest lists them.
+    rows = self.connection.execute('SELECT path, sha256, size, shard FROM objects WHERE backup_id = ? ORDER BY path', (backup_id,))
+    members = []
+    for path, digest, size, shard in rows:
+      member = {'path': path, 'sha256': digest, 'size': size}
+      if shard:
+        member['shard'] = shard
+      members.append(member)
+    return members
+
+  def object_history(self, object_type, identifier, org_id=None, project_id=None):
+    # Every backup holding the object, oldest first, with the hash it had in that backup.
+    # Each entry notes whether the object changed since the previous backup of the same project.
+    query = (
+      'SELECT b.id, b.org, b.project, b.created, b.location, o.path, o.sha256, o.size, o.shard '
+      'FROM objects o JOIN backups b ON b.id = o.backup_id '
+      'WHERE o.object_type = ? AND o.identifier = ?'
+    )
+    args = [object_type, identifier]
+    if org_id:
+      query += ' AND b.org = ?'
+      args.append(org_id)
+    if project_id:
+      query += ' AND b.project = ?'
+      args.append(project_id)
+    query += ' ORDER BY b.created, b.id'
+    history = []
+    last_hash = {}
+    for row in self.connection.execute(query, args):
+      entry = _backup_dict(row[:5])
+      entry.update({'path': row[5], 'sha256': row[6], 'size': row[7], 'shard': row[8]})
+      scope = (entry['org'], entry['project'])
+      entry['changed'] = last_hash.get(scope) != entry['sha256']
+      last_hash[scope] = entry['sha256']
+      history.append(entry)
+    return history
+
+def _backup_dict(row):
+  return {'id': row[0], 'org': row[1], 'project': row[2], 'created': row[3], 'location': row[4]}
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Schema driven comparison of a desired object against the one Harness returned.
+# Both objects are walked once, side by side, and neither is copied or modified. A per-type schema says
+# which fields the server manages and never match what we send, which defaults the server fills in,
+# which lists are unordered collections, and under which paths keys only the server has count as changes.
+# The result is every path that differs, so a module can report all of them rather than the last one.
+#
+# Schema patterns are dotted paths from the root of the compared objects, with * for any list entry,
+# for example spec.variables.*.required.
+#   ignore     server managed fields, never compared
+#   defaults   the value a field has when one side leaves it out
+#   unordered  lists compared as collections, regardless of order
+#   exact      subtrees in which keys only the server has are changes, everywhere else a key the
+#              desired object leaves out is not managed by the module
+#   optional   keys inside an exact subtree that are only compared when the desired object sets them
+
+# Stdlib Imports
+from json import dumps
+from hashlib import sha256
+from collections import Counter
+from difflib import SequenceMatcher
+
+SCHEMAS = {
+  'secret': {
+    'ignore': {'secret.spec.value', 'secret.spec.additional_metadata', 'created', 'updated'},
+    'exact': {'secret.spec', 'secret.tags'},
+  },
+  'variable': {
+    'ignore': {'variable.spec.allowedValues', 'variable.spec.defaultValue', 'variable.spec.value', 'createdAt', 'lastModifiedAt'},
+    'exact': {'variable.spec'},
+  },
+  'connector': {
+    'ignore': {'created', 'updated'},
+    'exact': {'connector.spec', 'connector.tags'},
+    'optional': {'connector.spec.branch', 'connector.spec.delegate_selectors', 'connector.spec.execute_on_delegate', 'connector.spec.proxy'},
+  },
+  'role': {
+    'ignore': {'created', 'updated', 'harness_managed'},
+    'exact': {'tags'},
+    'unordered': {'permissions'},
+  },
+  # Keyed by module.object_type, which for Resource Groups is their path in the API.
+  'resource-group': {
+    # The module sends the scope as orgIdentifier and projectIdentifier, the API answers with org and project.
+    'ignore': {'created', 'updated', 'harness_managed', 'orgIdentifier', 'projectIdentifier'},
+    'exact': {'tags'},
+    'unordered': {'included_scope', 'resource_filter', 'resource_filter.*.identifiers'},
+  },
+  'override': {
+    'exact': {'spec'},
+    'defaults': {
+      'spec.variables': [],
+      'spec.variables.*.required': False,
+      'spec.configFiles': [],
+      'spec.manifests': [],
+    },
+  },
+}
+
+def _join(path, key):
+  return f'{path}.{key}' if path else str(key)
+
+def _digest(item):
+  return sha256(dumps(item, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+class StructuralDiff(object):
+  def __init__(self, schema):
+    self.ignore = schema.get('ignore', set())
+    self.defaults = schema.get('defaults', {})
+    self.unordered = schema.get('unordered', set())
+    self.exact = schema.get('exact', set())
+    self.optional = schema.get('optional', set())
+
+  def changed_paths(self, desired, existing, path=''):
+    # Every path at which existing differs from desired, in the order the desired object lists them.
+    return [change[0] for change in self.changes(desired, existing, path)]
+
+  def changes(self, desired, existing, path=''):
+    # Every difference as a (path, desired value, existing value) tuple. A value is None where that side has nothing.
+    changed = []
+    self._walk(desired, existing, path, path, path in self.exact, changed)
+    return changed
+
+  def _walk(self, desired, existing, path, pattern, exact, changed):
+    if isinstance(desired, dict) and isinstance(existing, dict):
+      keys = list(desired)
+      if exact:
+        keys += sorted(key for key in existing if key not in desired)
+      for key in keys:
+        child_pattern = _join(pattern, key)
+        if child_pattern in self.ignore:
+          continue
+        wanted = desired.get(key)
+        current = existing.get(key)
+        if wanted is None:
+          wanted = self.defaults.get(child_pattern)
+        if current is None:
+          current = self.defaults.get(child_pattern)
+        if wanted is None:
+          # Left out of the desired object. Only a change where the server's extra keys count.
+          if exact and current is not None and child_pattern not in self.optional:
+            changed.append((_join(path, key), None, current))
+          continue
+        self._walk(wanted, current, _join(path, key), child_pattern, exact or child_pattern in self.exact, changed)
+    elif isinstance(desired, list) and isinstance(existing, list):
+      if pattern in self.unordered:
+        if not self._same_collection(desired, existing, _join(pattern, '*')):
+          changed.append((path, desired, existing))
+        return
+      # Ordered lists are aligned on their identical entries first, so that an entry inserted or removed
+      # near the top is one change rather than a change to every entry after it. Entries in the ranges
+      # between are compared pairwise, and those only one side has are changes of their own.
+      matcher = SequenceMatcher(None, [_digest(item) for item in desired], [_digest(item) for item in existing], autojunk=False)
+      for tag, desired_start, desired_end, existing_start, existing_end in matcher.get_opcodes():
+        if tag == 'equal':
+          continue
+        paired = min(desired_end - desired_start, existing_end - existing_start)
+        for offset in range(paired):
+          index = desired_start + offset
+          self._walk(desired[index], existing[existing_start + offset], _join(path, index), _join(pattern, '*'), exact, changed)
+        for index in range(desired_start + paired, desired_end):
+          changed.append((_join(path, index), desired[index], None))
+        for index in range(existing_start + paired, existing_end):
+          changed.append((_join(path, index), None, existing[index]))
+    elif desired != existing:
+      changed.append((path, desired, existing))
+
+  def _same_collection(self, desired, existing, pattern):
+    if len(desired) != len(existing):
+      return False
+    # Lists of plain values compare as multisets.
+    if not any(isinstance(item, (dict, list)) for item in desired + existing):
+      return Counter(dumps(item, sort_keys=True) for item in desired) == Counter(dumps(item, sort_keys=True) for item in existing)
+    # Lists of objects pair every desired entry with an equal server entry. Equal follows the schema,
+    # so the pairing cannot be done by hashing, but these lists are short. A desired entry that leaves
+    # keys out can equal several server entries, so a pairing made earlier gives way when that frees
+    # an entry for a later one.
+    matches = []
+    for wanted in desired:
+      row = []
+      for current in existing:
+        probe = []
+        self._walk(wanted, current, '', pattern, pattern in self.exact, probe)
+        row.append(not probe)
+      matches.append(row)
+    paired = [None] * len(existing)
+
+    def pair(wanted_index, seen):
+      for current_index, equal in enumerate(matches[wanted_index]):
+        if equal and current_index not in seen:
+          seen.add(current_index)
+          if paired[current_index] is None or pair(paired[current_index], seen):
+            paired[current_index] = wanted_index
+            return True
+      return False
+
+    return all(pair(wanted_index, set()) for wanted_index in range(len(desired)))
+
+def structural_diff(object_type, desired, existing, path=''):
+  # Compare a desired object with the server's copy using the schema of its type.
+  return StructuralDiff(SCHEMAS.get(object_type, {})).changed_paths(desired, existing, path)
+
+# Diff output larger than this is cut short. A few changed stages of a large pipeline fit easily,
+# while a wholesale rewrite does not flood the controller's memory and terminal.
+DIFF_LIMIT = 64 * 1024
+
+def _parse_yaml(text):
+  # yaml is imported on first use, as most module runs never parse or show YAML. Raises YAMLError.
+  from yaml import load
+  try:
+    # libyaml parses large pipelines many times faster than the pure Python loader.
+    from yaml import CSafeLoader as SafeLoader
+  except ImportError:
+    from yaml import SafeLoader
+  return load(text, Loader=SafeLoader)
+
+def _load_yaml(text):
+  # Some modules hold a YAML field as the structure itself rather than its text.
+  if not isinstance(text, str):
+    return text
+  from yaml import YAMLError
+  try:
+    return _parse_yaml(text)
+  except YAMLError:
+    return text
+
+def _diff_lines(value, prefix):
+  if value is None:
+    return []
+  if isinstance(value, (dict, list)):
+    from yaml import dump
+    text = dump(value, default_flow_style=False, sort_keys=True, allow_unicode=True, width=4096)
+  else:
+    text = dumps(value)
+  return [prefix + line for line in text.splitlines()]
+
+def diff_result(module, before, after, yaml_fields=()):
+  # The diff to return with a module result, as keyword arguments for exit_json.
+  # Nothing is computed unless Ansible runs with --diff. The diff walks both objects once and shows
+  # only the paths that changed, with the YAML fields named in yaml_fields compared as documents,
+  # so a one line edit in a ten thousand line pipeline shows as one short hunk.
+  if not module._diff:
+    return {}
+  # The object follows its type's schema, as the update decision did. YAML documents are compared whole.
+  document_differ = StructuralDiff({'exact': {''}})
+  changes = []
+  if isinstance(before, dict) and isinstance(after, dict):
+    for field in yaml_fields:
+      if field in after:
+        changes += document_differ.changes(_load_yaml(after[field]), _load_yaml(before.get(field) or ''), field)
+    before = {key: value for key, value in before.items() if key not in yaml_fields}
+    after = {key: value for key, value in after.items() if key not in yaml_fields}
+  changes = StructuralDiff(SCHEMAS.get(module.object_type, {})).changes(after, before) + changes
+
+  lines = []
+  size = 0
+  for shown, (path, wanted, current) in enumerate(changes):
+    for line in [f'@@ {path} @@'] + _diff_lines(current, '-') + _diff_lines(wanted, '+'):
+      if size + len(line) > DIFF_LIMIT:
+        lines.append(f'@@ diff cut short, {len(changes) - shown} of {len(changes)} changed paths not fully shown @@')
+        return {'diff': {'prepared': '\n'.join(lines) + '\n'}}
+      lines.append(line)
+      size += len(line) + 1
+  return {'diff': {'prepared': '\n'.join(lines) + '\n'}}
+
+# Canonical digests by the sha256 of the text they were computed from, for this process only.
+_canonical_digests = {}
+
+def canonical_digest(text):
+  # sha256 of a YAML document's parsed content, so that whitespace, quoting, comments and key order
+  # do not count. Parsing a large pipeline costs far more than hashing it, so the digest is remembered
+  # under the sha256 of the text itself and a body seen before is not parsed again in this run.
+  raw_digest = sha256(text.encode('utf-8')).hexdigest()
+  if raw_digest in _canonical_digests:
+    return _canonical_digests[raw_digest]
+  from yaml import YAMLError
+  try:
+    digest = sha256(dumps(_parse_yaml(text), sort_keys=True, default=str).encode('utf-8')).hexdigest()
+  except YAMLError:
+    # Not YAML we can read, so only the very same text compares equal.
+    digest = raw_digest
+  _canonical_digests[raw_digest] = digest
+  return digest
+
+def same_yaml(desired, existing):
+  # Whether two YAML bodies hold the same document.
+  if desired == existing:
+    return True
+  if not desired or not existing:
+    return False
+  return canonical_digest(desired) == canonical_digest(existing)
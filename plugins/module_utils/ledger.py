@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A local SQLite ledger of the desired state last applied to each object.
+# A converged run otherwise reads every object in full just to learn that nothing changed.
+# With a ledger the module fingerprints its desired state and compares it with the fingerprint
+# recorded the last time the object was written or confirmed. A match younger than the ledger
+# TTL is trusted outright. An older match is trusted when the lastModifiedAt recorded alongside it
+# still matches the one in the scope listing of module_utils/cache.py, which costs no extra read.
+# write_mode upsert writes without reading, and records the modification time Harness answers
+# each write with, to tell from the next answer whether that write changed anything.
+
+# Internal Imports
+from ansible_collections.karcadia.harness.plugins.module_utils.api import HarnessApiError
+from ansible_collections.karcadia.harness.plugins.module_utils.cache import private_cache_dir, scope_cache
+
+# Stdlib Imports
+from sqlite3 import Error as SQLiteError, connect
+from os import makedirs
+from os.path import dirname, exists, join
+from json import dumps
+from time import time
+from hashlib import sha256
+
+LEDGER_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applied (
+  object_key TEXT PRIMARY KEY,
+  digest TEXT NOT NULL,
+  last_modified INTEGER,
+  confirmed REAL NOT NULL
+);
+"""
+
+# Options that say how to reach or read an object rather than what it should look like.
+NOT_DESIRED_STATE = ('api_key', 'account_id', 'state', 'existing', 'cache_ttl', 'ledger', 'ledger_ttl', 'write_mode', 'force_update')
+
+class DesiredStateLedger(object):
+  def __init__(self, path):
+    self.path = path
+    # Forks record their objects at the same time, so wait out other writers instead of failing.
+    self.connection = connect(path, timeout=30)
+    version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+    if version < LEDGER_VERSION:
+      with self.connection:
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f'PRAGMA user_version = {LEDGER_VERSION}')
+
+  def close(self):
+    self.connection.close()
+
+  def entry(self, object_key):
+    row = self.connection.execute('SELECT digest, last_modified, confirmed FROM applied WHERE object_key = ?', (object_key,)).fetchone()
+    if not row:
+      return None
+    return {'digest': row[0], 'last_modified': row[1], 'confirmed': row[2]}
+
+  def record(self, object_key, digest, last_modified):
+    with self.connection:
+      self.connection.execute(
+        'INSERT OR REPLACE INTO applied (object_key, digest, last_modified, confirmed) VALUES (?, ?, ?, ?)',
+        (object_key, digest, last_modified, time())
+      )
+
+  def confirm(self, object_key):
+    with self.connection:
+      self.connection.execute('UPDATE applied SET confirmed = ? WHERE object_key = ?', (time(), object_key))
+
+  def forget(self, object_key):
+    with self.connection:
+      self.connection.execute('DELETE FROM applied WHERE object_key = ?', (object_key,))
+
+def _open(module, path):
+  # The ledger at path, with the directories leading to it created. Fails the module when it cannot be opened.
+  try:
+    if dirname(path):
+      makedirs(dirname(path), exist_ok=True)
+    return DesiredStateLedger(path)
+  except (OSError, SQLiteError) as error:
+    module.fail_json(msg=f'Cannot open the ledger {path}: {error}')
+
+def object_key(module):
+  api = 'ng' if '/ng/api/' in module.read_url else 'v1'
+  parts = [module.account_id, api, module.object_type, module.params.get('org') or '', module.params.get('project') or '', module.params['identifier']]
+  # Every version of a template is an object of its own.
+  if getattr(module, 'version_label', None):
+    parts.append(module.version_label)
+  return '/'.join(parts)
+
+def desired_digest(module):
+  # The request body is built from the module options alone, so fingerprinting the options
+  # that shape it fingerprints the body without building it ahead of the read.
+  # Some ensure functions edit the options in place, so the digest is taken once, before they run.
+  if not hasattr(module, 'desired_digest'):
+    desired = {key: value for key, value in module.params.items() if key not in NOT_DESIRED_STATE}
+    module.desired_digest = sha256(dumps(desired, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+  return module.desired_digest
+
+def last_modified(body):
+  # lastModifiedAt of an ng object or updated of a v1 object, from a read, list entry or write response.
+  if isinstance(body, dict) and isinstance(body.get('data'), (dict, list)):
+    body = body['data']
+  if isinstance(body, list):
+    body = body[0] if body else {}
+  if not isinstance(body, dict):
+    return None
+  return body.get('lastModifiedAt') or body.get('updated')
+
+def _ledger(module):
+  if not module.params.get('ledger') or module.check_mode:
+    return None
+  return _open(module, module.params['ledger'])
+
+def ledger_converged(module):
+  # Whether the desired state is the one last applied, without reading the object itself.
+  if not module.params.get('ledger'):
+    return False
+  digest = desired_digest(module)
+  if module.params.get('force_update'):
+    return False
+  ledger = _open(module, module.params['ledger'])
+  try:
+    key = object_key(module)
+    entry = ledger.entry(key)
+    if not entry or entry['digest'] != digest:
+      return False
+    if entry['confirmed'] + module.params['ledger_ttl'] > time():
+      return True
+    # Past the TTL, confirm against the scope listing when the cache is on for this module.
+    cache = scope_cache(module)
+    if cache is None or entry['last_modified'] is None:
+      return False
+    try:
+      cached = cache.lookup(module.params['identifier'])
+    except HarnessApiError:
+      return False
+    if not cached or not cached[0] or last_modified(cached[1]) != entry['last_modified']:
+      return False
+    if not module.check_mode:
+      ledger.confirm(key)
+    return True
+  finally:
+    ledger.close()
+
+def record_applied(module, body):
+  # Called once the object is known to be in the desired state, with the object as the API returned it.
+  ledger = _ledger(module)
+  if ledger is None:
+    return
+  try:
+    ledger.record(object_key(module), desired_digest(module), last_modified(body))
+  finally:
+    ledger.close()
+
+def _upsert_ledger_path(module):
+  # Modules without a ledger option keep their upserts in a ledger in the private cache dir.
+  if module.params.get('ledger'):
+    return module.params['ledger']
+  directory = private_cache_dir()
+  if directory is None:
+    return None
+  return join(directory, 'upserts.db')
+
+def forget_applied(module):
+  # Called after a delete, successful or not.
+  ledger = _ledger(module)
+  if ledger is None:
+    # Without a ledger option, an upsert may still have left an entry behind.
+    path = None if module.check_mode else _upsert_ledger_path(module)
+    if path is None or not exists(path):
+      return
+    ledger = _open(module, path)
+  try:
+    ledger.forget(object_key(module))
+  finally:
+    ledger.close()
+
+def record_upserted(module, body):
+  # Called after a write_mode upsert, with the object as the API returned it. Returns whether the
+  # write changed the object. It was never read, so only Harness can tell: when the modification
+  # time it answers with is the one it answered with after the last upsert from here, neither this
+  # write nor anyone in between changed the object. Any other answer, or none, counts as a change.
+  path = _upsert_ledger_path(module)
+  if path is None:
+    return True
+  ledger = _open(module, path)
+  try:
+    key = object_key(module)
+    entry = ledger.entry(key)
+    modified = last_modified(body)
+    ledger.record(key, desired_digest(module), modified)
+  finally:
+    ledger.close()
+  return not entry or modified is None or entry['last_modified'] != modified
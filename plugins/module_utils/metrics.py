@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Counters for every Harness API call a module run makes, reported with the module's result.
+# api.request records each call here: the endpoint it hit, bytes sent and received, how long it took,
+# how often it was retried and how often Harness throttled it. report_metrics adds the counters of the
+# run to the result as harness_metrics, where the karcadia.harness.harness_metrics callback sums them
+# up per task, per module and per endpoint.
+# Latencies are kept as histogram bucket counts rather than one value per call, so that a backup
+# making ten thousand calls still reports a few hundred bytes per endpoint.
+
+# Stdlib Imports
+from threading import Lock
+from urllib.parse import urlsplit
+
+# Upper bounds of the latency buckets, in seconds. Calls slower than the last bound land in one more bucket.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Path segments that name an action rather than an object, and stay in the endpoint as they are.
+ACTION_SEGMENTS = ('list', 'listV2', 'download', 'content')
+
+_lock = Lock()
+_endpoints = {}
+
+def endpoint(method, url):
+  # The endpoint a url hits, with the org, project and object identifiers in it left out,
+  # for example GET /v1/orgs/{id}/projects/{id}/secrets/{id}. Collections and identifiers alternate
+  # after the api prefix, which is all the grouping needs.
+  segments = urlsplit(url).path.strip('/').split('/')
+  if segments[:1] == ['v1']:
+    prefix, segments = segments[:1], segments[1:]
+  else:
+    prefix, segments = segments[:2], segments[2:]
+  for index in range(1, len(segments), 2):
+    if segments[index] not in ACTION_SEGMENTS:
+      segments[index] = '{id}'
+  return f"{method} /{'/'.join(prefix + segments)}"
+
+def record_call(method, url, seconds, sent, received, retries, throttled):
+  # Called by api.request from any thread.
+  key = endpoint(method, url)
+  bucket = len(LATENCY_BUCKETS)
+  for index, bound in enumerate(LATENCY_BUCKETS):
+    if seconds <= bound:
+      bucket = index
+      break
+  with _lock:
+    counters = _endpoints.get(key)
+    if counters is None:
+      counters = {'calls': 0, 'bytes_sent': 0, 'bytes_received': 0, 'retries': 0, 'throttled': 0, 'seconds': 0.0, 'buckets': [0] * (len(LATENCY_BUCKETS) + 1)}
+      _endpoints[key] = counters
+    counters['calls'] += 1
+    counters['bytes_sent'] += sent
+    counters['bytes_received'] += received
+    counters['retries'] += retries
+    counters['throttled'] += throttled
+    counters['seconds'] += seconds
+    counters['buckets'][bucket] += 1
+
+def reset_metrics():
+  with _lock:
+    _endpoints.clear()
+
+def api_metrics():
+  # The counters since the last reset, totalled and per endpoint.
+  with _lock:
+    endpoints = {key: dict(counters, buckets=list(counters['buckets'])) for key, counters in _endpoints.items()}
+  totals = {name: sum(counters[name] for counters in endpoints.values()) for name in ('calls', 'bytes_sent', 'bytes_received', 'retries', 'throttled', 'seconds')}
+  totals['seconds'] = round(totals['seconds'], 3)
+  totals['endpoints'] = endpoints
+  return totals
+
+def merge_metrics(metrics, other):
+  # Add the counters of other, as api_metrics returns them, to metrics.
+  for name in ('calls', 'bytes_sent', 'bytes_received', 'retries', 'throttled', 'seconds'):
+    metrics[name] = metrics.get(name, 0) + other[name]
+  endpoints = metrics.setdefault('endpoints', {})
+  for key, counters in other['endpoints'].items():
+    if key not in endpoints:
+      endpoints[key] = dict(counters, buckets=list(counters['buckets']))
+      continue
+    for name in ('calls', 'bytes_sent', 'bytes_received', 'retries', 'throttled', 'seconds'):
+      endpoints[key][name] += counters[name]
+    endpoints[key]['buckets'] = [mine + theirs for mine, theirs in zip(endpoints[key]['buckets'], counters['buckets'])]
+  return metrics
+
+def report_metrics(module):
+  # Start counting for this module run and return the counters with its result, whichever way it exits.
+  # Module runs in the controller process share this process, so the counters start over here.
+  reset_metrics()
+  for name in ('exit_json', 'fail_json'):
+    def exit_with_metrics(*args, _exit=getattr(module, name), **kwargs):
+      kwargs['harness_metrics'] = api_metrics()
+      _exit(*args, **kwargs)
+    setattr(module, name, exit_with_metrics)
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# A small S3 client for S3-compatible object storage such as MinIO.
+# Requests are signed with AWS Signature Version 4 and sent with path-style addressing.
+
+# Stdlib Imports
+from hashlib import sha256, md5
+from base64 import b64encode
+from hmac import new as hmac_new
+from datetime import datetime, timezone
+from urllib.parse import quote, urlparse
+from threading import BoundedSemaphore, Lock
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree.ElementTree import fromstring
+from xml.sax.saxutils import escape
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+class S3Error(Exception):
+  pass
+
+def is_s3_url(location):
+  return location.startswith('s3://')
+
+def parse_s3_url(location):
+  # Split s3://bucket/key into the bucket and the key.
+  parsed = urlparse(location)
+  return parsed.netloc, parsed.path.lstrip('/')
+
+def _sign(key, msg):
+  return hmac_new(key, msg.encode('utf-8'), sha256).digest()
+
+class S3Client(object):
+  def __init__(self, endpoint, access_key, secret_key, region='us-east-1'):
+    self.endpoint = endpoint.rstrip('/')
+    self.host = urlparse(self.endpoint).netloc
+    self.access_key = access_key
+    self.secret_key = secret_key
+    self.region = region
+
+  def _headers(self, method, path, canonical_query, payload_hash, now):
+    # Build the Signature Version 4 headers for one request.
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    date_stamp = now.strftime('%Y%m%d')
+    canonical_headers = f'host:{self.host}\nx-amz-content-sha256:{payload_hash}\nx-amz-date:{amz_date}\n'
+    signed_headers = 'host;x-amz-content-sha256;x-amz-date'
+    canonical_request = '\n'.join([method, quote(path, safe='/-_.~'), canonical_query, canonical_headers, signed_headers, payload_hash])
+    scope = f'{date_stamp}/{self.region}/s3/aws4_request'
+    string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope, sha256(canonical_request.encode('utf-8')).hexdigest()])
+    signing_key = _sign(_sign(_sign(_sign(('AWS4' + self.secret_key).encode('utf-8'), date_stamp), self.region), 's3'), 'aws4_request')
+    signature = hmac_new(signing_key, string_to_sign.encode('utf-8'), sha256).hexdigest()
+    return {
+      'x-amz-date': amz_date,
+      'x-amz-content-sha256': payload_hash,
+      'Authorization': f'AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}',
+    }
+
+  def call(self, method, bucket, key='', query=None, data=b'', expected=(200,), extra_headers=None):
+    # Send one signed request and fail loudly on anything unexpected.
+    # The query string is encoded once here so the signed form and the sent form cannot drift apart.
+    canonical_query = '&'.join(
+      f'{quote(name, safe="-_.~")}={quote(value, safe="-_.~")}' for name, value in sorted((query or {}).items())
+    )
+    path = f'/{bucket}/{key}' if key else f'/{bucket}'
+    headers = self._headers(method, path, canonical_query, sha256(data).hexdigest(), datetime.now(timezone.utc))
+    if extra_headers:
+      headers.update(extra_headers)
+    url = self.endpoint + quote(path, safe='/-_.~')
+    if canonical_query:
+      url += '?' + canonical_query
+    # requests is only imported by runs that use object storage.
+    from requests import request
+    s3_response = request(method, url, headers=headers, data=data)
+    if s3_response.status_code not in expected:
+      raise S3Error(f'S3 {method} {path} failed. Status Code: {s3_response.status_code} {s3_response.text}')
+    return s3_response
+
+  def put_object(self, bucket, key, data):
+    return self.call('PUT', bucket, key, data=data)
+
+  def get_object(self, bucket, key):
+    return self.call('GET', bucket, key).content
+
+  def list_objects(self, bucket, prefix=''):
+    # List every object under a prefix, following continuation tokens.
+    objects = []
+    query = {'list-type': '2', 'prefix': prefix}
+    while True:
+      root = fromstring(self.call('GET', bucket, query=query).text)
+      for element in root:
+        if _tag(element) == 'Contents':
+          fields = {_tag(child): child.text for child in element}
+          objects.append({'key': fields['Key'], 'last_modified': fields['LastModified'], 'size': int(fields['Size'])})
+      token = next((element.text for element in root if _tag(element) == 'NextContinuationToken'), None)
+      if not token:
+        return objects
+      query['continuation-token'] = token
+
+  def delete_objects(self, bucket, keys):
+    # Delete up to 1000 objects in one request, as S3 allows.
+    objects = ''.join(f'<Object><Key>{escape(key)}</Key></Object>' for key in keys)
+    body = f'<Delete><Quiet>true</Quiet>{objects}</Delete>'.encode('utf-8')
+    content_md5 = b64encode(md5(body).digest()).decode('ascii')
+    s3_response = self.call('POST', bucket, query={'delete': ''}, data=body, extra_headers={'Content-MD5': content_md5})
+    if '<Error>' in s3_response.text:
+      raise S3Error(f'S3 delete in {bucket} failed. {s3_response.text}')
+
+  def create_multipart_upload(self, bucket, key):
+    s3_response = self.call('POST', bucket, key, query={'uploads': ''})
+    return _find_text(s3_response.text, 'UploadId')
+
+  def upload_part(self, bucket, key, upload_id, part_number, data):
+    s3_response = self.call('PUT', bucket, key, query={'partNumber': str(part_number), 'uploadId': upload_id}, data=data)
+    return s3_response.headers['ETag']
+
+  def complete_multipart_upload(self, bucket, key, upload_id, etags):
+    parts = ''.join(f'<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>' for number, etag in sorted(etags.items()))
+    body = f'<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>'.encode('utf-8')
+    s3_response = self.call('POST', bucket, key, query={'uploadId': upload_id}, data=body)
+    # S3 may report a failed completion inside a 200 response.
+    if '<Error>' in s3_response.text:
+      raise S3Error(f'S3 multipart completion for {key} failed. {s3_response.text}')
+
+  def abort_multipart_upload(self, bucket, key, upload_id):
+    self.call('DELETE', bucket, key, query={'uploadId': upload_id}, expected=(200, 204, 404))
+
+def _tag(element):
+  # Element tag without its XML namespace.
+  return element.tag.split('}')[-1]
+
+def _find_text(xml_text, tag):
+  # Pull the first matching element out of an S3 XML response, ignoring the namespace.
+  for element in fromstring(xml_text).iter():
+    if _tag(element) == tag:
+      return element.text
+  raise S3Error(f'S3 response did not contain {tag}.')
+
+class MultipartUploadWriter(object):
+  # A write-only file object that streams into an S3 object.
+  # Full parts are uploaded in parallel while the caller keeps writing, and at most
+  # workers + 1 parts are held in memory at any time.
+  def __init__(self, client, bucket, key, part_size, workers):
+    self.client = client
+    self.bucket = bucket
+    self.key = key
+    self.name = f's3://{bucket}/{key}'
+    self.part_size = max(part_size, MIN_PART_SIZE)
+    self.buffer = bytearray()
+    self.upload_id = None
+    self.part_number = 0
+    self.etags = {}
+    self.futures = []
+    self.lock = Lock()
+    self.slots = BoundedSemaphore(workers + 1)
+    self.executor = ThreadPoolExecutor(max_workers=workers)
+    self.closed = False
+
+  def write(self, data):
+    self.buffer.extend(data)
+    while len(self.buffer) >= self.part_size:
+      part = bytes(self.buffer[:self.part_size])
+      del self.buffer[:self.part_size]
+      self._submit(part)
+    return len(data)
+
+  def flush(self):
+    pass
+
+  def _submit(self, part):
+    # Stop early if a part upload has already failed.
+    for future in self.futures:
+      if future.done() and future.exception():
+        raise future.exception()
+    if self.upload_id is None:
+      self.upload_id = self.client.create_multipart_upload(self.bucket, self.key)
+    self.part_number += 1
+    # Block here when too many parts are already waiting, which bounds our memory use.
+    self.slots.acquire()
+    self.futures.append(self.executor.submit(self._upload, self.part_number, part))
+
+  def _upload(self, part_number, part):
+    try:
+      etag = self.client.upload_part(self.bucket, self.key, self.upload_id, part_number, part)
+      with self.lock:
+        self.etags[part_number] = etag
+    finally:
+      self.slots.release()
+
+  def close(self):
+    if self.closed:
+      return
+    self.closed = True
+    try:
+      if self.upload_id is None:
+        # Small objects never needed a multipart upload.
+        self.client.put_object(self.bucket, self.key, bytes(self.buffer))
+        return
+      if self.buffer:
+        self._submit(bytes(self.buffer))
+        self.buffer = bytearray()
+      for future in self.futures:
+        future.result()
+      self.client.complete_multipart_upload(self.bucket, self.key, self.upload_id, self.etags)
+    except Exception:
+      self.abort()
+      raise
+    finally:
+      self.executor.shutdown(wait=True)
+
+  def abort(self):
+    # Throw away any parts already uploaded so they do not linger in the bucket.
+    self.closed = True
+    self.executor.shutdown(wait=True)
+    if self.upload_id is not None:
+      self.client.abort_multipart_upload(self.bucket, self.key, self.upload_id)
+      self.upload_id = None
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Listings of every object of one type in an account, org or project, shared by the backup_project
+# and harness_facts modules. Every lister returns the list entries exactly as Harness sends them and
+# raises HarnessApiError, so that they can run on a worker pool.
+
+# Internal Imports
+from ansible_collections.karcadia.harness.plugins.module_utils.api import paginate, paginate_ng, scope_query
+
+# Stdlib Imports
+from urllib.parse import urlencode
+
+def v1_url(org_id, project_id, path):
+  # The v1 url of a collection at account, org or project scope.
+  if project_id:
+    return f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/{path}'
+  if org_id:
+    return f'https://app.harness.io/v1/orgs/{org_id}/{path}'
+  return f'https://app.harness.io/v1/{path}'
+
+def ng_url(module, org_id, project_id, path, *query):
+  # The ng url of a collection at account, org or project scope, with any extra query parameters.
+  return f'https://app.harness.io/ng/api/{path}?{urlencode(scope_query(module, org_id, project_id) + list(query))}'
+
+def list_services(module, org_id, project_id):
+  return paginate(module, v1_url(org_id, project_id, 'services') + '?sort=name&order=ASC', title='Harness Service')
+
+def list_environments(module, org_id, project_id):
+  url = ng_url(module, org_id, project_id, 'environmentsV2', ('sort', 'name'))
+  return paginate_ng(module, url, page_param='page', size_param='size', title='Harness Environment')
+
+def list_infrastructures(module, org_id, project_id, env_id):
+  url = ng_url(module, org_id, project_id, 'infrastructures', ('environmentIdentifier', env_id), ('sort', 'name'))
+  return paginate_ng(module, url, page_param='page', size_param='size', title='Harness Infrastructure')
+
+def list_connectors(module, org_id, project_id):
+  return paginate_ng(module, ng_url(module, org_id, project_id, 'connectors'), title='Harness Connector')
+
+def list_secrets(module, org_id, project_id):
+  # Secret listings carry the metadata of each secret, never its value.
+  return paginate(module, v1_url(org_id, project_id, 'secrets') + '?sort=name&order=ASC', title='Harness Secret')
+
+def list_templates(module, org_id, project_id):
+  return paginate(module, v1_url(org_id, project_id, 'templates') + '?sort=identifier&order=ASC', title='Harness Template')
+
+def list_variables(module, org_id, project_id):
+  url = ng_url(module, org_id, project_id, 'variables', ('includeVariablesFromEverySubScope', 'false'))
+  return paginate_ng(module, url, title='Harness Variable')
+
+def list_service_accounts(module, org_id, project_id):
+  return paginate_ng(module, ng_url(module, org_id, project_id, 'serviceaccount/aggregate'), title='Harness Service Account')
+
+def list_resource_groups(module, org_id, project_id):
+  return paginate(module, v1_url(org_id, project_id, 'resource-groups') + '?sort=identifier&order=ASC', title='Harness Resource Group')
+
+def list_roles(module, org_id, project_id):
+  return paginate(module, v1_url(org_id, project_id, 'roles') + '?sort=identifier&order=ASC', title='Harness Role')
+
+# Listers by the name harness_facts reports the type under, with the key of the object in each list entry.
+# A key of None means the entry is the object itself. Infrastructures are listed per environment.
+SCOPE_TYPES = {
+  'services': (list_services, 'service'),
+  'environments': (list_environments, 'environment'),
+  'connectors': (list_connectors, 'connector'),
+  'secrets': (list_secrets, 'secret'),
+  'templates': (list_templates, None),
+  'variables': (list_variables, 'variable'),
+  'roles': (list_roles, None),
+  'resource_groups': (list_resource_groups, None),
+  'service_accounts': (list_service_accounts, 'serviceAccount'),
+}
+
+def entry_object(object_key, entry):
+  return entry[object_key] if object_key else entry
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# An HTTP backend for module_utils/api.py that needs nothing beyond Python and Ansible itself,
+# selected with HARNESS_HTTP_BACKEND=urls. It answers the calls api.request makes the way a requests
+# session would, so the modules cannot tell the two apart.
+# TLS is set up by ansible.module_utils.urls, as for Ansible's own modules. Unlike open_url, which
+# opens a new connection for every request, connections are kept open per thread and host and reused,
+# so a run of a hundred calls pays for one TLS handshake per thread instead of a hundred.
+# Throttled requests are retried after the wait Harness asks for, as the requests backend does.
+
+# Internal Imports
+from ansible.module_utils import urls
+
+# Stdlib Imports
+from ssl import create_default_context
+from time import sleep, time
+from gzip import decompress
+from threading import local
+from http.client import HTTPConnection, HTTPSConnection, HTTPException, RemoteDisconnected
+from urllib.parse import urlencode, urlsplit, unquote
+from urllib.request import getproxies, proxy_bypass
+from email.utils import parsedate_to_datetime
+from base64 import b64encode
+
+# Errors of a kept-alive connection the server has closed in the meantime. The request is sent once more on a new one.
+STALE_CONNECTION_ERRORS = (RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+def _tls_context():
+  # ansible-core before 2.15 has no make_context.
+  if hasattr(urls, 'make_context'):
+    return urls.make_context()
+  return create_default_context()
+
+def _retry_after(urls_response, attempt):
+  # Seconds to wait before sending a throttled request again, as Harness asks or else backing off.
+  value = urls_response.headers.get('Retry-After')
+  if value:
+    try:
+      return max(0.0, float(value))
+    except ValueError:
+      try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+      except (TypeError, ValueError):
+        pass
+  return float(2 ** attempt)
+
+class UrlsResponse(object):
+  # The parts of a requests response the modules use.
+  def __init__(self, session, key, connection, http_response, stream):
+    self.status_code = http_response.status
+    self.reason = http_response.reason
+    self.headers = http_response.headers
+    # Statuses answered before this one, for module_utils/metrics.py.
+    self.retry_statuses = []
+    self._session = session
+    self._key = key
+    self._connection = connection
+    self._http_response = http_response
+    self._content = None
+    if not stream:
+      self._content = http_response.read()
+      if self.headers.get('Content-Encoding') == 'gzip':
+        self._content = decompress(self._content)
+      self._release()
+
+  def _release(self):
+    # Hand the connection back for the next request, or close it when the body was not read to the end.
+    if self._connection is None:
+      return
+    if self._http_response.isclosed() and not self._http_response.will_close:
+      self._session._put(self._key, self._connection)
+    else:
+      self._connection.close()
+    self._connection = None
+
+  @property
+  def content(self):
+    if self._content is None:
+      self._content = b''.join(self.iter_content(64 * 1024))
+    return self._content
+
+  @property
+  def text(self):
+    return self.content.decode(self.headers.get_content_charset() or 'utf-8', errors='replace')
+
+  def iter_content(self, chunk_size=1):
+    while True:
+      chunk = self._http_response.read(chunk_size)
+      if not chunk:
+        break
+      yield chunk
+    self._release()
+
+  def close(self):
+    self._release()
+
+class UrlsSession(object):
+  # Takes the arguments api.request passes on: headers, data and stream.
+  def __init__(self, retries):
+    self.retries = retries
+    self.context = _tls_context()
+    self._local = local()
+
+  def _get(self, key):
+    idle = getattr(self._local, 'idle', None)
+    if idle is None:
+      idle = self._local.idle = {}
+    connections = idle.setdefault(key, [])
+    if connections:
+      return connections.pop(), True
+    scheme, host, port = key
+    connection_class = HTTPSConnection if scheme == 'https' else HTTPConnection
+    settings = {'context': self.context} if scheme == 'https' else {}
+    proxy = None if proxy_bypass(host) else getproxies().get(scheme)
+    if not proxy:
+      return connection_class(host, port, **settings), False
+    # Tunnel through the proxy, so that the connection to Harness is kept open like any other.
+    proxy = urlsplit(proxy)
+    tunnel_headers = {}
+    if proxy.username:
+      credentials = f'{unquote(proxy.username)}:{unquote(proxy.password or "")}'
+      tunnel_headers['Proxy-Authorization'] = 'Basic ' + b64encode(credentials.encode('utf-8')).decode('ascii')
+    connection = connection_class(proxy.hostname, proxy.port or 8080, **settings)
+    connection.set_tunnel(host, port, headers=tunnel_headers)
+    return connection, False
+
+  def _put(self, key, connection):
+    self._local.idle.setdefault(key, []).append(connection)
+
+  def _send(self, method, url, headers, body, stream):
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+    target = parts.path or '/'
+    if parts.query:
+      target += '?' + parts.query
+    while True:
+      connection, reused = self._get(key)
+      try:
+        connection.request(method, target, body=body, headers=headers)
+        http_response = connection.getresponse()
+      except STALE_CONNECTION_ERRORS:
+        connection.close()
+        if reused:
+          continue
+        raise
+      except (OSError, HTTPException):
+        connection.close()
+        raise
+      return UrlsResponse(self, key, connection, http_response, stream)
+
+  def request(self, method, url, headers=None, data=None, stream=False):
+    headers = dict(headers or {})
+    headers.setdefault('User-Agent', 'ansible-httpget')
+    if not stream:
+      headers.setdefault('Accept-Encoding', 'gzip')
+    if isinstance(data, dict):
+      data = urlencode(data) if data else None
+    if isinstance(data, str):
+      data = data.encode('utf-8')
+
+    retry_statuses = []
+    for attempt in range(self.retries + 1):
+      urls_response = self._send(method, url, headers, data, stream)
+      if urls_response.status_code != 429 or attempt == self.retries:
+        break
+      retry_statuses.append(urls_response.status_code)
+      urls_response.close()
+      sleep(_retry_after(urls_response, attempt))
+    urls_response.retry_statuses = retry_statuses
+    return urls_response
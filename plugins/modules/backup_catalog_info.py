@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = r"""
+---
+module: backup_catalog_info
+version_added: 0.10.0
+short_description: Query the local backup catalog written by backup_project.
+description:
+  - Answer backup history questions from the SQLite catalog that M(karcadia.harness.backup_project) updates
+    when its I(catalog) option is set.
+  - No archive is opened or decompressed, and the Harness API is not called.
+author:
+  - Justin McCormick (@karcadia)
+options:
+  catalog:
+    description: Path of the SQLite backup catalog.
+    required: True
+    type: path
+  org:
+    description: Only consider backups of projects in this Harness Organization.
+    required: False
+    type: str
+  project:
+    description: Only consider backups of this Harness Project.
+    required: False
+    type: str
+  object_type:
+    description:
+      - Type of the object to look up, named as in the archive, for example C(services), C(connectors) or C(pipelines).
+      - Required for every query other than C(backups).
+    required: False
+    type: str
+  identifier:
+    description:
+      - Identifier of the object to look up.
+      - Objects nested under an environment are named after it, for example C(my_env/my_infra) for an infrastructure.
+      - Required for every query other than C(backups).
+    required: False
+    type: str
+  query:
+    description:
+      - C(backups) lists the recorded backups.
+      - C(history) lists every backup that holds the object, with the hash it had in each one.
+      - C(changes) lists only the backups that hold a changed version of the object, compared to the previous backup of the same project.
+      - C(latest) returns the most recent backup in which the object existed.
+    choices:
+      - backups
+      - history
+      - changes
+      - latest
+    default: backups
+    type: str
+"""
+
+EXAMPLES = r"""
+- name: List every recorded backup of a Harness Project.
+  karcadia.harness.backup_catalog_info:
+    catalog: /tmp/backups/catalog.db
+    org: my_demo_org
+    project: demo_project
+
+- name: Find the backups that contain a changed version of a service.
+  karcadia.harness.backup_catalog_info:
+    catalog: /tmp/backups/catalog.db
+    project: demo_project
+    object_type: services
+    identifier: my_service
+    query: changes
+  register: service_changes
+
+- name: Find the latest archive in which a pipeline still existed.
+  karcadia.harness.backup_catalog_info:
+    catalog: /tmp/backups/catalog.db
+    object_type: pipelines
+    identifier: my_pipeline
+    query: latest
+"""
+
+RETURN = r"""
+backups:
+  description:
+    - Matching backups, oldest first, with their catalog id, org, project, creation time and archive location.
+    - For object queries, each entry also carries the object path, sha256, size and shard, and whether it changed.
+  type: list
+"""
+
+# Internal Imports
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.catalog import BackupCatalog
+
+# Stdlib Imports
+from os.path import isfile
+
+def query_catalog(module):
+  # Pull in the module parameters.
+  org_id = module.params['org']
+  project_id = module.params['project']
+  query = module.params['query']
+
+  catalog = BackupCatalog(module.params['catalog'])
+  try:
+    if query == 'backups':
+      backups = catalog.backups(org_id, project_id)
+    else:
+      backups = catalog.object_history(module.params['object_type'], module.params['identifier'], org_id, project_id)
+      if query == 'changes':
+        backups = [backup for backup in backups if backup['changed']]
+      elif query == 'latest':
+        backups = backups[-1:]
+  finally:
+    catalog.close()
+
+  module.exit_json(changed=False, backups=backups)
+
+def main():
+    # Initialize the module and specify the argument spec.
+    module = AnsibleModule(
+      argument_spec = dict(
+          catalog=dict(type='path', required=True),
+          org=dict(type='str', required=False, aliases=['org_id']),
+          project=dict(type='str', required=False, aliases=['project_id']),
+          object_type=dict(type='str', required=False, aliases=['type']),
+          identifier=dict(type='str', required=False, aliases=['id']),
+          query=dict(type='str', required=False, default='backups', choices=['backups', 'history', 'changes', 'latest']),
+      ),
+      required_if = [
+          ('query', 'history', ('object_type', 'identifier')),
+          ('query', 'changes', ('object_type', 'identifier')),
+          ('query', 'latest', ('object_type', 'identifier')),
+      ],
+      supports_check_mode = True
+    )
+
+    # Do not create an empty catalog just to query it.
+    if not isfile(module.params['catalog']):
+      module.fail_json(msg=f'Backup catalog {module.params["catalog"]} does not exist.')
+
+    # Call the query function.
+    query_catalog(module)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = r"""
+---
+module: backup_diff
+version_added: 0.10.0
+short_description: Compare two backup_project backups.
+description:
+  - Compare two backups written by M(karcadia.harness.backup_project) and report the objects that were added,
+    removed or changed between them.
+  - Objects are compared by the sha256 hashes recorded in the backup manifests, so unchanged objects are never read.
+  - Only changed members are decompressed to produce YAML diffs. For sharded backups only the shards holding
+    changed members are opened, and each is read no further than its last changed member.
+  - A single tarball keeps its manifest as its last member, so it is read through once to find it.
+    Sharded backups and backup catalog snapshots do not have that cost.
+author:
+  - Justin McCormick (@karcadia)
+options:
+  before:
+    description:
+      - The older backup. Either a local tarball, the C(.manifest.json) of a sharded backup,
+        or a backup id from I(catalog).
+    required: True
+    type: str
+  after:
+    description:
+      - The newer backup, given the same way as I(before).
+    required: True
+    type: str
+  catalog:
+    description:
+      - Path of the SQLite backup catalog. When set, I(before) and I(after) are backup ids from this catalog
+        and their object hashes are read from it.
+    required: False
+    type: path
+  content_diff:
+    description:
+      - Produce a unified diff for every changed member.
+      - Needs the archives to be reachable on local disk. Backups held in object storage are compared by hash only.
+    default: True
+    type: bool
+"""
+
+EXAMPLES = r"""
+- name: Compare yesterday's and today's backup of a Harness Project.
+  karcadia.harness.backup_diff:
+    before: /tmp/backups/yesterday.tar.gz
+    after: /tmp/backups/today.tar.gz
+  register: backup_changes
+
+- name: Compare two sharded backups without producing YAML diffs.
+  karcadia.harness.backup_diff:
+    before: /tmp/backups/yesterday.manifest.json
+    after: /tmp/backups/today.manifest.json
+    content_diff: False
+
+- name: Compare two backups recorded in the backup catalog.
+  karcadia.harness.backup_diff:
+    catalog: /tmp/backups/catalog.db
+    before: 41
+    after: 42
+"""
+
+RETURN = r"""
+added:
+  description: Members only found in the newer backup, with their object type and identifier.
+  type: list
+removed:
+  description: Members only found in the older backup, with their object type and identifier.
+  type: list
+changed_objects:
+  description:
+    - Members whose hash differs between the backups, with their object type, identifier and both hashes.
+    - With I(content_diff), each entry also carries a unified C(diff) of the member.
+  type: list
+"""
+
+# Internal Imports
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.backup import read_manifest, read_members
+from ansible_collections.karcadia.harness.plugins.module_utils.catalog import BackupCatalog, member_object
+from ansible_collections.karcadia.harness.plugins.module_utils.s3 import is_s3_url
+
+# Stdlib Imports
+from os.path import isfile
+from difflib import unified_diff
+from tarfile import TarError
+
+def load_backup(module, backup):
+  # Return the location, the members by path and the archive root of one backup.
+  if module.catalog:
+    try:
+      recorded = module.catalog.backup(int(backup))
+    except ValueError:
+      recorded = None
+    if not recorded:
+      module.fail_json(msg=f'Backup {backup} is not recorded in {module.params["catalog"]}.')
+    members = module.catalog.members(recorded['id'])
+    return recorded['location'], {member['path']: member for member in members}, None
+
+  if not isfile(backup):
+    module.fail_json(msg=f'Backup {backup} does not exist.')
+  try:
+    manifest = read_manifest(backup)
+  except (ValueError, TarError, OSError) as error:
+    module.fail_json(msg=f'Could not read the manifest of {backup}. {error}')
+  return backup, {member['path']: member for member in manifest['members']}, manifest['root'].lstrip('/')
+
+def member_entry(member):
+  object_type, identifier = member_object(member['path'])
+  return {'path': member['path'], 'object_type': object_type, 'identifier': identifier}
+
+def diff_backups(module):
+  before_location, before, before_root = load_backup(module, module.params['before'])
+  after_location, after, after_root = load_backup(module, module.params['after'])
+
+  # Compare the manifests by hash alone.
+  added = [member_entry(after[path]) for path in sorted(after) if path not in before]
+  removed = [member_entry(before[path]) for path in sorted(before) if path not in after]
+  changed = []
+  for path in sorted(after):
+    if path in before and before[path]['sha256'] != after[path]['sha256']:
+      entry = member_entry(after[path])
+      entry['before_sha256'] = before[path]['sha256']
+      entry['after_sha256'] = after[path]['sha256']
+      changed.append(entry)
+
+  # Decompress only the changed members to show what changed inside them.
+  local = not is_s3_url(before_location) and not is_s3_url(after_location)
+  if module.params['content_diff'] and changed and local:
+    try:
+      before_contents = read_members(before_location, [before[entry['path']] for entry in changed], root=before_root)
+      after_contents = read_members(after_location, [after[entry['path']] for entry in changed], root=after_root)
+    except (TarError, OSError) as error:
+      module.fail_json(msg=f'Could not read the changed members. {error}')
+    for entry in changed:
+      try:
+        before_lines = before_contents[entry['path']].decode('utf-8').splitlines(keepends=True)
+        after_lines = after_contents[entry['path']].decode('utf-8').splitlines(keepends=True)
+      except (KeyError, UnicodeDecodeError):
+        # Binary content, such as File Store files, is reported by hash alone.
+        continue
+      entry['diff'] = ''.join(unified_diff(before_lines, after_lines, 'before/' + entry['path'], 'after/' + entry['path']))
+
+  module.exit_json(changed=False, added=added, removed=removed, changed_objects=changed)
+
+def main():
+    # Initialize the module and specify the argument spec.
+    module = AnsibleModule(
+      argument_spec = dict(
+          before=dict(type='str', required=True),
+          after=dict(type='str', required=True),
+          catalog=dict(type='path', required=False),
+          content_diff=dict(type='bool', required=False, default=True),
+      ),
+      supports_check_mode = True
+    )
+
+    # Open the catalog when the backups are given as catalog ids.
+    module.catalog = None
+    if module.params['catalog']:
+      if not isfile(module.params['catalog']):
+        module.fail_json(msg=f'Backup catalog {module.params["catalog"]} does not exist.')
+      module.catalog = BackupCatalog(module.params['catalog'])
+
+    # Call the diff function.
+    diff_backups(module)
+
+if __name__ == "__main__":
+    main()
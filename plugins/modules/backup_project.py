@@ -23,9 +23,86 @@ options:
     required: True
     type: str
   dest:
-    description: Where to place the backup tarball file.
+    description:
+      - Where to place the backup tarball file.
+      - When I(shard_by) is set, the shards and the manifest are written next to this path, named after it.
+      - An C(s3://bucket/key) destination streams the backup into S3-compatible object storage, such as MinIO,
+        with a multipart upload while it is being produced. Nothing is written to local disk in that case.
     required: False
     type: str
+  s3_endpoint:
+    description:
+      - URL of the S3-compatible endpoint, for example C(http://minio.example.com:9000).
+      - Falls back to the C(AWS_ENDPOINT_URL) environment variable, then to AWS S3 in I(s3_region).
+    required: False
+    type: str
+  s3_access_key:
+    description: Access key for object storage. Falls back to the C(AWS_ACCESS_KEY_ID) environment variable.
+    required: False
+    type: str
+  s3_secret_key:
+    description: Secret key for object storage. Falls back to the C(AWS_SECRET_ACCESS_KEY) environment variable.
+    required: False
+    type: str
+  s3_region:
+    description: Region used to sign object storage requests.
+    default: us-east-1
+    type: str
+  part_size:
+    description:
+      - Size in megabytes of each multipart upload part. S3 requires at least 5.
+      - At most I(workers) + 1 parts per archive are held in memory at once.
+    default: 8
+    type: int
+  shard_by:
+    description:
+      - Split the backup into several tarball shards that are compressed in parallel.
+      - C(type) writes one shard per object type, for example services or connectors.
+      - C(size) starts a new shard whenever the current one would grow past I(shard_size) megabytes of uncompressed content.
+      - Each shard is a standalone tarball that can be extracted on its own.
+      - A C(<dest>.manifest.json) file lists the shards along with the size and sha256 hash of every member.
+    choices:
+      - type
+      - size
+    required: False
+    type: str
+  shard_size:
+    description: Maximum uncompressed size of a shard in megabytes when I(shard_by=size).
+    default: 512
+    type: int
+  workers:
+    description:
+      - Number of shards to compress at the same time.
+      - Also the number of pipelines, input sets, triggers and monitored services fetched at the same time,
+        and the number of File Store files downloaded at the same time.
+      - For object storage destinations, also the number of parts uploaded at the same time.
+    default: 4
+    type: int
+  reproducible:
+    description:
+      - Produce byte for byte identical archives for a project that has not changed.
+      - Members are sorted by path, carry a fixed mtime and ownership, YAML is re-serialized in canonical form
+        with sorted keys, and the gzip header holds no timestamp. The manifest leaves out its creation time.
+      - Object storage backups hold fetched objects in memory until the end of the run so they can be sorted.
+    default: False
+    type: bool
+  catalog:
+    description:
+      - Path of a local SQLite backup catalog to record this backup in. The file is created when missing.
+      - The catalog keeps the project, the time, the archive location and the sha256 hash of every object,
+        so M(karcadia.harness.backup_catalog_info) can answer history questions without opening any archive.
+    required: False
+    type: path
+  git_repo:
+    description:
+      - Export the project into this local git working tree instead of writing a tarball.
+      - Objects are written in the same layout as the archive and only changed objects are committed,
+        so each run stores a small delta. Objects that no longer exist are removed from the object type directories,
+        other files in the repository are left alone.
+      - The repository is initialised when missing. A configured git identity is used when there is one.
+      - Cannot be combined with I(dest), I(shard_by) or I(catalog).
+    required: False
+    type: path
 """
 
 EXAMPLES = r"""
@@ -40,6 +117,45 @@ EXAMPLES = r"""
     org: my_demo_org
     dest: /tmp/backups/harness-backup.tar.gz
 
+- name: Backup a large Harness Project into one tarball per object type.
+  karcadia.harness.backup_project:
+    identifier: demo_project
+    org: my_demo_org
+    dest: /tmp/backups/harness-backup.tar.gz
+    shard_by: type
+    workers: 8
+
+- name: Backup a Harness Project so unchanged projects produce identical archives.
+  karcadia.harness.backup_project:
+    identifier: demo_project
+    org: my_demo_org
+    dest: /tmp/backups/harness-backup.tar.gz
+    reproducible: True
+
+- name: Backup a Harness Project and record it in the backup catalog.
+  karcadia.harness.backup_project:
+    identifier: demo_project
+    org: my_demo_org
+    dest: /tmp/backups/harness-backup.tar.gz
+    catalog: /tmp/backups/catalog.db
+
+- name: Export a Harness Project into a git repository, committing only what changed.
+  karcadia.harness.backup_project:
+    identifier: demo_project
+    org: my_demo_org
+    git_repo: /srv/harness-history/demo_project
+    reproducible: True
+
+- name: Stream a Harness Project backup into a MinIO bucket.
+  karcadia.harness.backup_project:
+    identifier: demo_project
+    org: my_demo_org
+    dest: s3://backups/harness/demo_project.tar.gz
+    s3_endpoint: http://minio.example.com:9000
+  environment:
+    AWS_ACCESS_KEY_ID: abc123
+    AWS_SECRET_ACCESS_KEY: abc123
+
 - name: Backup a Harness Project.
   karcadia.harness.project:
     identifier: demo_project
@@ -53,22 +169,70 @@ RETURN = r"""
 msg:
   description: Project has been backed up. With destination provided.
   type: str
+manifest:
+  description: Path of the manifest tying the shards together.
+  returned: when shard_by is set
+  type: str
+shards:
+  description: The shards that were written, with their file name, size, sha256 hash and member count.
+  returned: when shard_by is set
+  type: list
+catalog_id:
+  description: Identifier of this backup in the backup catalog.
+  returned: when catalog is set
+  type: int
+commit:
+  description: Hash of the commit that recorded the changes.
+  returned: when git_repo is set and something changed
+  type: str
+changes:
+  description: Changed objects in C(git diff --name-status) form.
+  returned: when git_repo is set and something changed
+  type: list
 """
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import HarnessApiError, download, get_json, paginate, paginate_ng, request
+from ansible_collections.karcadia.harness.plugins.module_utils.backup import (
+  DOWNLOAD_CHUNK_SIZE,
+  SPOOL_SIZE,
+  ArchiveWriter,
+  ChunkReader,
+  canonical_yaml,
+  new_manifest,
+)
+from ansible_collections.karcadia.harness.plugins.module_utils.catalog import BackupCatalog
+from ansible_collections.karcadia.harness.plugins.module_utils.s3 import (
+  S3Client,
+  S3Error,
+  MultipartUploadWriter,
+  is_s3_url,
+  parse_s3_url,
+)
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
+from ansible_collections.karcadia.harness.plugins.module_utils.snapshot import (
+  list_connectors,
+  list_environments,
+  list_infrastructures,
+  list_resource_groups,
+  list_roles,
+  list_secrets,
+  list_service_accounts,
+  list_services,
+  list_templates,
+  list_variables,
+)
 
 # Stdlib Imports
-from os import getenv, mkdir
-from os.path import isdir
+from os import getenv, mkdir, makedirs, walk, remove
+from os.path import join, dirname, abspath, isdir, isfile, relpath, basename
 from shutil import rmtree
 from json import dumps, loads
 from yaml import safe_load, dump
 from uuid import uuid4
-from tarfile import open as tar_open
-
-# External Imports
-from requests import request
+from tempfile import SpooledTemporaryFile
+from concurrent.futures import ThreadPoolExecutor
 
 def backup_object(module):
     # Pull in the module parameters.
@@ -101,13 +265,15 @@ def backup_object(module):
 
     # Handle check mode by pretending we are done now.
     if module.check_mode:
+      if module.params["git_repo"]:
+        dest = module.params["git_repo"]
       module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been backed up to {dest}.', check_mode=True)
 
     # We can probably condense all these functions quite a bit by categorizing them into 3 API types.
     # One of those things that is easier now that we have each object's API interactions categorized.
 
     # Hand off to each function to fetch:
-    # default settings (not gathered at this time)
+    # default settings
     # services
     # environments
     # environment groups
@@ -116,23 +282,105 @@ def backup_object(module):
     # connectors
     # delegates
     # secrets
-    # file store (not gathered at this time)
+    # file store
     # templates
+    # pipelines, input sets and triggers
     # variables
     # slo downtime (not gathered at this time)
-    # monitored services (not gathered at this time)
+    # monitored services
     # users
     # user groups
     # service accounts
     # resource groups
     # roles
 
-    # Prepare the workdir with a random name.
-    rand_str = str(uuid4())
-    module.work_dir = '.ansible-tmp-' + rand_str
-    mkdir(module.work_dir)
+    # Git exports skip the archive entirely and only commit what changed.
+    if module.params["git_repo"]:
+      export_to_git(module, org_id, object_id)
+
+    # Archives headed for object storage are streamed straight into a multipart upload as each object is
+    # fetched, so nothing touches local disk. Local archives are staged in a work dir first.
+    shard_by = module.params["shard_by"]
+    if is_s3_url(dest):
+      bucket, key = parse_s3_url(dest)
+      s3_client = S3Client(module.s3_endpoint, module.s3_access_key, module.s3_secret_key, module.params["s3_region"])
+      part_size = module.params["part_size"] * 1024 * 1024
+      workers = module.params["workers"]
+      def open_sink(name):
+        return MultipartUploadWriter(s3_client, bucket, name, part_size, workers)
+
+      tar_name = key.split('.')[0]
+      archive_dest = key
+      module.work_dir = None
+      module.written = None
+    else:
+      def open_sink(name):
+        return open(name, 'wb')
 
-    # Gather the files and details for all of the object types.
+      tar_name = dest.split('.')[0]
+      archive_dest = dest
+      # Prepare the workdir with a random name.
+      rand_str = str(uuid4())
+      module.work_dir = '.ansible-tmp-' + rand_str
+      module.written = None
+      mkdir(module.work_dir)
+
+    reproducible = module.params["reproducible"]
+    manifest = new_manifest(org_id, object_id, tar_name, reproducible=reproducible)
+    module.archive = ArchiveWriter(open_sink, archive_dest, tar_name, manifest, shard_by=shard_by,
+                                   shard_size=module.params["shard_size"], reproducible=reproducible)
+
+    try:
+      # Gather the files and details for all of the object types.
+      fetch_all(module, org_id, object_id)
+
+      # Generate the tarball, or the shards, now that all the files are in place.
+      if module.work_dir:
+        module.archive.add_work_dir(module.work_dir, module.params["workers"])
+      location = module.archive.close()
+    except S3Error as error:
+      module.archive.abort()
+      module.fail_json(msg=f'Object storage upload has failed. {error}')
+    except BaseException:
+      # Do not leave half written uploads behind in the bucket.
+      module.archive.abort()
+      raise
+    finally:
+      # Cleanup our work dir now that we have the tarball.
+      if module.work_dir:
+        rmtree(module.work_dir)
+
+    if is_s3_url(dest):
+      location = f's3://{bucket}/{location}'
+
+    result = {}
+    if shard_by:
+      result['manifest'] = location
+      result['shards'] = manifest['shards']
+
+    # Record the backup and its object hashes in the catalog.
+    # Local archives are recorded by absolute path so the catalog can be queried from anywhere.
+    if module.params["catalog"]:
+      catalog_location = location if is_s3_url(location) else abspath(location)
+      catalog = BackupCatalog(module.params["catalog"])
+      try:
+        result['catalog_id'] = catalog.record_backup(org_id, object_id, catalog_location, manifest['members'],
+                                                     created=manifest.get('created'))
+      finally:
+        catalog.close()
+
+    module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been backed up to {location}.', **result)
+
+# Top level directories of the backup layout, one per object type.
+BACKUP_DIRS = (
+  'connectors', 'delegates', 'environment_groups', 'environments', 'file_store', 'file_store_content',
+  'monitored_services', 'pipelines', 'resource_groups', 'roles', 'secrets', 'service_accounts', 'services',
+  'settings', 'templates', 'user_groups', 'users', 'variables',
+)
+
+def fetch_all(module, org_id, object_id):
+  # The fetchers raise instead of failing, as some of them work from the worker pool.
+  try:
     fetch_services(module, org_id, object_id)
     fetch_environments(module, org_id, object_id)
     # Infrastructures and overrides get fetched from within fetch_environments.
@@ -147,100 +395,124 @@ def backup_object(module):
     fetch_service_accounts(module, org_id, object_id)
     fetch_resource_groups(module, org_id, object_id)
     fetch_roles(module, org_id, object_id)
-
-    # Generate the tarball now that all the files are in place.
-    with tar_open(dest, 'w:gz') as tar:
-      tar_name = dest.split('.')[0]
-      tar.add(module.work_dir, arcname=tar_name)
-
-    # Cleanup our work dir that we have the tarball.
-    rmtree(module.work_dir)
-
-    module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been backed up to {dest}.')
+    fetch_settings(module, org_id, object_id)
+    fetch_pipelines(module, org_id, object_id)
+    fetch_monitored_services(module, org_id, object_id)
+    fetch_file_store(module, org_id, object_id)
+  except HarnessApiError as error:
+    module.fail_json(msg=str(error))
+
+def run_concurrently(module, function, items):
+  # Run function over items on the worker pool and return the results in the order of items.
+  with ThreadPoolExecutor(max_workers=module.params["workers"]) as executor:
+    return list(executor.map(function, items))
+
+def write_backup_file(module, path, content):
+  # Hand one fetched object to the archive, or stage it in our work dir.
+  if module.params["reproducible"]:
+    content = canonical_yaml(content)
+  if module.work_dir is None:
+    module.archive.add_bytes(path, content.encode('utf-8'))
+    return
+  file_name = join(module.work_dir, path)
+  if module.written is not None:
+    module.written.add(path)
+    # Leave unchanged objects alone so git has nothing to look at for them.
+    if isfile(file_name):
+      with open(file_name, 'r') as file_reader:
+        if file_reader.read() == content:
+          return
+  makedirs(dirname(file_name), exist_ok=True)
+  with open(file_name, 'w') as file_writer:
+    file_writer.write(content)
+
+def write_backup_stream(module, path, harness_response):
+  # Stream one downloaded file into the archive, or into our work dir, a chunk at a time.
+  # Archive members are hashed on the way through, so large files are never read into memory whole.
+  chunks = harness_response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+  if module.work_dir is None:
+    size = harness_response.headers.get('Content-Length')
+    if size is None or module.params["reproducible"]:
+      # Without a size up front, or when members must wait to be sorted, spool the file.
+      # It only spills over to a temporary file past SPOOL_SIZE.
+      spool = SpooledTemporaryFile(max_size=SPOOL_SIZE)
+      for chunk in chunks:
+        spool.write(chunk)
+      size = spool.tell()
+      spool.seek(0)
+      module.archive.add_spooled(path, spool, size)
+    else:
+      module.archive.add_file(path, ChunkReader(chunks), int(size))
+    return
+  file_name = join(module.work_dir, path)
+  if module.written is not None:
+    module.written.add(path)
+  makedirs(dirname(file_name), exist_ok=True)
+  with open(file_name, 'wb') as file_writer:
+    for chunk in chunks:
+      file_writer.write(chunk)
+
+def run_git(module, *args):
+  # Run one git command in the export repository and fail on any error.
+  rc, stdout, stderr = module.run_command(['git'] + list(args), cwd=module.work_dir)
+  if rc != 0:
+    module.fail_json(msg=f'git {args[0]} has failed in {module.work_dir}.', rc=rc, stdout=stdout, stderr=stderr)
+  return stdout
+
+def export_to_git(module, org_id, object_id):
+  # Write the backup layout into a git working tree and commit only the objects that changed.
+  module.work_dir = module.params["git_repo"]
+  module.written = set()
+  makedirs(module.work_dir, exist_ok=True)
+  if not isdir(join(module.work_dir, '.git')):
+    run_git(module, 'init', '--quiet')
+
+  fetch_all(module, org_id, object_id)
+
+  # Objects that no longer exist in Harness are removed from the tree. Only the directories of the backup
+  # layout are ours to clean, so anything else in the repository, such as a README, is left alone.
+  for dir_path, dir_names, file_names in walk(module.work_dir):
+    if dir_path == module.work_dir:
+      dir_names[:] = [dir_name for dir_name in dir_names if dir_name in BACKUP_DIRS]
+      continue
+    dir_names[:] = [dir_name for dir_name in dir_names if not dir_name.startswith('.')]
+    for file_name in file_names:
+      path = relpath(join(dir_path, file_name), module.work_dir)
+      if not file_name.startswith('.') and path not in module.written:
+        remove(join(dir_path, file_name))
+
+  run_git(module, 'add', '--all')
+  changes = run_git(module, 'diff', '--cached', '--name-status').splitlines()
+  if not changes:
+    module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is unchanged in {module.work_dir}.')
+
+  # Only provide an identity when git has none configured, so a configured one is respected.
+  identity = []
+  rc, stdout, stderr = module.run_command(['git', 'config', 'user.email'], cwd=module.work_dir)
+  if rc != 0:
+    identity = ['-c', 'user.name=karcadia.harness', '-c', 'user.email=backup_project@karcadia.harness']
+  run_git(module, *identity, 'commit', '--quiet', '-m', f'Backup of {module.object_type} {org_id}/{object_id}')
+  commit = run_git(module, 'rev-parse', 'HEAD').strip()
+  module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been exported to {module.work_dir}.',
+                   commit=commit, changes=changes)
 
 def fetch_services(module, org_id, object_id):
-  # Fetch services for project.
-  page = 0
-  page_limit = 20
-  url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{object_id}/services?page={page}&limit={page_limit}&sort=name&order=ASC'
-  service_list_resp = request("GET", url, headers=module.headers)
-
-  # Interpret the API response.
-  if service_list_resp.status_code == 200:
-    # Check if we got all the items on the first call.
-    service_list = loads(service_list_resp.text)
-    resp_headers = service_list_resp.headers
-    page_number = int(resp_headers['X-Page-Number'])
-    items_so_far = (page_number + 1) * page_limit
-    total_elements = int(resp_headers['X-Total-Elements'])
-    while items_so_far < total_elements:
-      # Keep calling until we have everything.
-      page = page_number + 1
-      url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{object_id}/services?page={page}&limit={page_limit}&sort=name&order=ASC'
-      service_list_resp = request("GET", url, headers=module.headers)
-      service_list.extend(loads(service_list_resp.text))
-      resp_headers = service_list_resp.headers
-      page_number = int(resp_headers['X-Page-Number'])
-      items_so_far = (page_number + 1) * page_limit
-      total_elements = int(resp_headers['X-Total-Elements'])
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(service_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Service List Response was unexpected. Status Code: {status_code}')
-    module.fail_json(msg=msg)
-
-  # Now that we have all of our services, write them out to files in our workdir.
-  mkdir(module.work_dir + '/services')
-  for service_dict in service_list:
+  # Fetch services for project, and write them out to files in our workdir.
+  for service_dict in list_services(module, org_id, object_id):
     service = service_dict['service']
     service_id = service['identifier']
-    if not isdir(module.work_dir + '/services/' + service_id):
-      mkdir(module.work_dir + '/services/' + service_id)
-    service_filename = module.work_dir + '/services/' + service_id + '/' + service_id + '.yaml'
-    with open(service_filename, 'w') as file_writer:
-      file_writer.write(service['yaml'])
+    write_backup_file(module, 'services/' + service_id + '/' + service_id + '.yaml', service['yaml'])
 
 def fetch_environments(module, org_id, project_id):
-  # Fetch environments for project.
-  page = 0
-  page_limit = 20
-  account_id = module.headers['Harness-Account']
-  url = f'https://app.harness.io/ng/api/environmentsV2?page={page}&size={page_limit}&accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}&sort=name'
-  env_list_resp = request("GET", url, headers=module.headers)
-
-  # Interpret the API response.
-  if env_list_resp.status_code == 200:
-    # Check if we got all the items on the first call.
-    env_list = loads(env_list_resp.text)['data']['content']
-    resp_headers = env_list_resp.headers
-    while 'Content-Length' not in resp_headers.keys():
-      # Keep calling until we have everything.
-      page += 1
-      url = f'https://app.harness.io/ng/api/environmentsV2?page={page}&size={page_limit}&accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}&sort=name'
-      env_list_resp = request("GET", url, headers=module.headers)
-      env_list.extend(loads(env_list_resp.text)['data']['content'])
-      resp_headers = env_list_resp.headers
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(env_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Environment List Response was unexpected. Status Code: {status_code}')
-    module.fail_json(msg=msg)
-
-  # Now that we have all of our environments, write them out to files in our workdir.
-  mkdir(module.work_dir + '/environments')
-  for env_dict in env_list:
+  # Fetch environments for project, and write them out to files in our workdir.
+  for env_dict in list_environments(module, org_id, project_id):
     env = env_dict['environment']
     env_id = env['identifier']
-    mkdir(module.work_dir + '/environments/' + env_id)
     # Each infra has to fetched at the environment level.
     fetch_infras(module, org_id, project_id, env_id)
     # Each override has to be fetched at the environment level.
     fetch_overrides(module, org_id, project_id, env_id)
-    env_filename = module.work_dir + '/environments/' + env_id + '/' + env_id + '.yaml'
-    with open(env_filename, 'w') as file_writer:
-      file_writer.write(env['yaml'])
+    write_backup_file(module, 'environments/' + env_id + '/' + env_id + '.yaml', env['yaml'])
 
 def fetch_environment_groups(module, org_id, project_id):
   # Fetch environment groups for project.
@@ -271,57 +543,18 @@ def fetch_environment_groups(module, org_id, project_id):
     module.fail_json(msg=msg)
 
   # Now that we have all of our environment groups, write them out to files in our workdir.
-  mkdir(module.work_dir + '/environment_groups')
   for env_dict in env_group_list:
     env = env_dict['envGroup']
     env_id = env['identifier']
-    mkdir(module.work_dir + '/environment_groups/' + env_id)
-    env_filename = module.work_dir + '/environment_groups/' + env_id + '/' + env_id + '.yaml'
-    with open(env_filename, 'w') as file_writer:
-      file_writer.write(env['yaml'])
+    write_backup_file(module, 'environment_groups/' + env_id + '/' + env_id + '.yaml', env['yaml'])
 
 def fetch_infras(module, org_id, project_id, env_id):
-  # Fetch infrastructures for project.
-  page = 0
-  page_limit = 20
-  account_id = module.headers['Harness-Account']
-  url = f'https://app.harness.io/ng/api/infrastructures?page={page}&size={page_limit}&accountIdentifier={account_id}'
-  url += f'&orgIdentifier={org_id}&projectIdentifier={project_id}&environmentIdentifier={env_id}&sort=name'
-  infra_list_resp = request("GET", url, headers=module.headers)
-
-  # Interpret the API response.
-  if infra_list_resp.status_code == 200:
-    # Check if we got all the items on the first call.
-    infra_list = loads(infra_list_resp.text)['data']['content']
-    resp_headers = infra_list_resp.headers
-    while 'Content-Length' not in resp_headers.keys():
-      # Keep calling until we have everything.
-      page += 1
-      url = f'https://app.harness.io/ng/api/infrastructures?page={page}&size={page_limit}&accountIdentifier={account_id}'
-      url += f'&orgIdentifier={org_id}&projectIdentifier={project_id}&environmentIdentifier={env_id}&sort=name'
-      infra_list_resp = request("GET", url, headers=module.headers)
-      infra_list.extend(loads(infra_list_resp.text)['data']['content'])
-      resp_headers = infra_list_resp.headers
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(infra_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Infrastructure List Response was unexpected. Status Code: {status_code}')
-    msg.append(f'{infra_list_resp.text}')
-    module.fail_json(msg=msg)
-
-  # Now that we have all of our infrastructures, write them out to files in our workdir.
-  for infra_dict in infra_list:
+  # Fetch infrastructures for environment, and write them out to files in our workdir.
+  for infra_dict in list_infrastructures(module, org_id, project_id, env_id):
     infra = infra_dict['infrastructure']
     infra_id = infra['identifier']
-    if not isdir(module.work_dir + '/environments/' + env_id):
-      mkdir(module.work_dir + '/environments/' + env_id)
-    if not isdir(module.work_dir + '/environments/' + env_id + '/infrastructures'):
-      mkdir(module.work_dir + '/environments/' + env_id + '/infrastructures/')
-    mkdir(module.work_dir + '/environments/' + env_id + '/infrastructures/' + infra_id)
-    infra_filename = module.work_dir + '/environments/' + env_id + '/infrastructures/' + infra_id + '/' + infra_id + '.yaml'
-    with open(infra_filename, 'w') as file_writer:
-      file_writer.write(infra['yaml'])
+    infra_filename = 'environments/' + env_id + '/infrastructures/' + infra_id + '/' + infra_id + '.yaml'
+    write_backup_file(module, infra_filename, infra['yaml'])
 
 def fetch_overrides(module, org_id, project_id, env_id):
   # Fetch overrides for project.
@@ -356,27 +589,20 @@ def fetch_overrides(module, org_id, project_id, env_id):
   # Now that we have all of our overrides, write them out to files in our workdir.
   for override in override_list:
     override_id = override['environmentRef'] + '_' + override['serviceRef']
-    if not isdir(module.work_dir + '/environments/' + env_id):
-      mkdir(module.work_dir + '/environments/' + env_id)
-    if not isdir(module.work_dir + '/environments/' + env_id + '/overrides'):
-      mkdir(module.work_dir + '/environments/' + env_id + '/overrides/')
-    override_filename = module.work_dir + '/environments/' + env_id + '/overrides/' + override_id + '.yaml'
+    override_filename = 'environments/' + env_id + '/overrides/' + override_id + '.yaml'
     if override['yaml']:
       module.fail_json(msg='Harness API behavior has changed. This module needs to be updated.')
-      with open(override_filename, 'w') as file_writer:
-        file_writer.write(override['yaml'])
+      write_backup_file(module, override_filename, override['yaml'])
     else:
       override_content = fetch_override(module, override_id, org_id, project_id)
       override_content['yaml'] = safe_load(override_content['yaml'])
-      with open(override_filename, 'w') as file_writer:
-        file_writer.write(dump(override_content))
+      write_backup_file(module, override_filename, dump(override_content))
 
     # We also need to pull an override for the environment name, separate from the service overrides.
     env_override_content = fetch_override(module, env_id, org_id, project_id)
     del env_override_content['yaml']
-    env_override_filename = module.work_dir + '/environments/' + env_id + '/overrides/' + env_id + '.yaml'
-    with open(env_override_filename, 'w') as file_writer:
-      file_writer.write(dump(env_override_content))
+    env_override_filename = 'environments/' + env_id + '/overrides/' + env_id + '.yaml'
+    write_backup_file(module, env_override_filename, dump(env_override_content))
 
 def fetch_override(module, override_id, org_id, project_id):
   # Fetch detail for specific override for project.
@@ -398,44 +624,13 @@ def fetch_override(module, override_id, org_id, project_id):
     module.fail_json(msg=msg)
 
 def fetch_connectors(module, org_id, project_id):
-  # Fetch connectors for project.
-  page = 0
-  page_limit = 20
-  account_id = module.headers['Harness-Account']
-  url = f'https://app.harness.io/ng/api/connectors/listV2?accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}&includeAllConnectorsAvailableAtScope=false&onlyFavorites=false&pageIndex={page}&pageSize={page_limit}'
-  connector_list_resp = request("POST", url, headers=module.headers)
-
-  # Interpret the API response.
-  if connector_list_resp.status_code == 200:
-    # Check if we got all the items on the first call.
-    connector_list = loads(connector_list_resp.text)['data']['content']
-    resp_headers = connector_list_resp.headers
-    while 'Content-Length' not in resp_headers.keys():
-      # Keep calling until we have everything.
-      page += 1
-      url = f'https://app.harness.io/ng/api/connectors/listV2?accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}&includeAllConnectorsAvailableAtScope=false&onlyFavorites=false&pageIndex={page}&pageSize={page_limit}'
-      connector_list_resp = request("POST", url, headers=module.headers)
-      connector_list.extend(loads(connector_list_resp.text)['data']['content'])
-      resp_headers = connector_list_resp.headers
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(connector_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Infrastructure List Response was unexpected. Status Code: {status_code}')
-    msg.append(f'{connector_list_resp.text}')
-    module.fail_json(msg=msg)
-
-  # Now that we have all of our connectors, write them out to files in our workdir.
-  mkdir(module.work_dir + '/connectors')
-  for connector_dict in connector_list:
+  # Fetch connectors for project, and write them out to files in our workdir.
+  for connector_dict in list_connectors(module, org_id, project_id):
     connector = {}
     connector['connector'] = connector_dict['connector']
     yaml_content = dump(connector)
     connector_id = connector['connector']['identifier']
-    mkdir(module.work_dir + '/connectors/' + connector_id)
-    connector_filename = module.work_dir + '/connectors/' + connector_id + '/' + connector_id + '.yaml'
-    with open(connector_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+    write_backup_file(module, 'connectors/' + connector_id + '/' + connector_id + '.yaml', yaml_content)
 
 def fetch_delegates(module, org_id, project_id):
   # Fetch connectors for project.
@@ -460,139 +655,30 @@ def fetch_delegates(module, org_id, project_id):
     module.fail_json(msg=msg)
 
   # Now that we have all of our delegates, write them out to files in our workdir.
-  mkdir(module.work_dir + '/delegates')
   for delegate_dict in delegate_list:
     yaml_content = dump(delegate_dict)
     delegate_name = delegate_dict['name']
-    mkdir(module.work_dir + '/delegates/' + delegate_name)
-    delegate_filename = module.work_dir + '/delegates/' + delegate_name + '/' + delegate_name + '.yaml'
-    with open(delegate_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+    write_backup_file(module, 'delegates/' + delegate_name + '/' + delegate_name + '.yaml', yaml_content)
 
 def fetch_secrets(module, org_id, project_id):
-  # Fetch secrets for project.
-  page = 0
-  page_limit = 20
-  url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/secrets?page={page}&limit={page_limit}&sort=name&order=ASC'
-  secrets_list_resp = request("GET", url, headers=module.headers)
-
-  # Interpret the API response.
-  if secrets_list_resp.status_code == 200:
-    # Bail out if the returned list is empty.
-    if secrets_list_resp.text == "[]":
-      return
-    # Check if we got all the items on the first call.
-    secrets_list = loads(secrets_list_resp.text)
-    resp_headers = secrets_list_resp.headers
-    while 'Content-Length' not in resp_headers.keys():
-      # Keep calling until we have everything.
-      page += 1
-      url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/secrets?page={page}&limit={page_limit}&sort=name&order=ASC'
-      secrets_list_resp = request("GET", url, headers=module.headers)
-      secrets_list.extend(loads(secrets_list_resp.text))
-      resp_headers = secrets_list_resp.headers
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(secrets_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Secrets List Response was unexpected. Status Code: {status_code}')
-    msg.append(f'{secrets_list_resp.text}')
-    module.fail_json(msg=msg)
-
-  mkdir(module.work_dir + '/secrets')
-  # Now that we have all of our secrets, write them out to files in our workdir.
-  for secret_dict in secrets_list:
+  # Fetch secrets for project, and write them out to files in our workdir.
+  for secret_dict in list_secrets(module, org_id, project_id):
     secret = secret_dict['secret']
     secret_id = secret['identifier']
-    mkdir(module.work_dir + '/secrets/' + secret_id)
-    secret_filename = module.work_dir + '/secrets/' + secret_id + '/' + secret_id + '.yaml'
-    yaml_content = dump(secret_dict)
-    with open(secret_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+    write_backup_file(module, 'secrets/' + secret_id + '/' + secret_id + '.yaml', dump(secret_dict))
 
 def fetch_templates(module, org_id, project_id):
-  # Fetch templates for project.
-  page = 0
-  page_limit = 20
-  url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/templates?page={page}&limit={page_limit}&sort=identifier&order=ASC'
-  templates_list_resp = request("GET", url, headers=module.headers)
-
-  # Interpret the API response.
-  if templates_list_resp.status_code == 200:
-    # Bail out if the returned list is empty.
-    if templates_list_resp.text == "[]":
-      return
-    # Check if we got all the items on the first call.
-    templates_list = loads(templates_list_resp.text)
-    resp_headers = templates_list_resp.headers
-    while 'Content-Length' not in resp_headers.keys():
-      # Keep calling until we have everything.
-      page += 1
-      url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/templates?page={page}&limit={page_limit}&sort=identifier&order=ASC'
-      templates_list_resp = request("GET", url, headers=module.headers)
-      templates_list.extend(loads(templates_list_resp.text))
-      resp_headers = templates_list_resp.headers
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(templates_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Secrets List Response was unexpected. Status Code: {status_code}')
-    msg.append(f'{templates_list_resp.text}')
-    module.fail_json(msg=msg)
-
-  mkdir(module.work_dir + '/templates')
-  # Now that we have all of our templates, write them out to files in our workdir.
-  for template_dict in templates_list:
+  # Fetch templates for project, and write them out to files in our workdir.
+  for template_dict in list_templates(module, org_id, project_id):
     template_id = template_dict['identifier']
-    mkdir(module.work_dir + '/templates/' + template_id)
-    template_filename = module.work_dir + '/templates/' + template_id + '/' + template_id + '.yaml'
-    yaml_content = dump(template_dict)
-    with open(template_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+    write_backup_file(module, 'templates/' + template_id + '/' + template_id + '.yaml', dump(template_dict))
 
 def fetch_variables(module, org_id, project_id):
-  # Fetch variables for project.
-  page = 0
-  page_limit = 20
-  account_id = module.headers['Harness-Account']
-  url = f'https://app.harness.io/ng/api/variables?accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}'
-  url += f'&includeVariablesFromEverySubScope=false&pageIndex={page}&pageSize={page_limit}'
-  variables_list_resp = request("GET", url, headers=module.headers)
-
-  # Interpret the API response.
-  if variables_list_resp.status_code == 200:
-    # Bail out if the returned list is empty.
-    if variables_list_resp.text == "[]":
-      return
-    # Check if we got all the items on the first call.
-    variables_list = loads(variables_list_resp.text)['data']['content']
-    resp_headers = variables_list_resp.headers
-    while 'Content-Length' not in resp_headers.keys():
-      # Keep calling until we have everything.
-      page += 1
-      url = f'https://app.harness.io/ng/api/variables?accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}'
-      url += f'&includeVariablesFromEverySubScope=false&pageIndex={page}&pageSize={page_limit}'
-      variables_list_resp = request("GET", url, headers=module.headers)
-      variables_list.extend(loads(variables_list_resp.text)['data']['content'])
-      resp_headers = variables_list_resp.headers
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(variables_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Secrets List Response was unexpected. Status Code: {status_code}')
-    msg.append(f'{variables_list_resp.text}')
-    module.fail_json(msg=msg)
-
-  mkdir(module.work_dir + '/variables')
-  # Now that we have all of our variables, write them out to files in our workdir.
-  for variable_dict in variables_list:
+  # Fetch variables for project, and write them out to files in our workdir.
+  for variable_dict in list_variables(module, org_id, project_id):
     variable = variable_dict['variable']
     variable_id = variable['identifier']
-    mkdir(module.work_dir + '/variables/' + variable_id)
-    variable_filename = module.work_dir + '/variables/' + variable_id + '/' + variable_id + '.yaml'
-    yaml_content = dump(variable_dict)
-    with open(variable_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+    write_backup_file(module, 'variables/' + variable_id + '/' + variable_id + '.yaml', dump(variable_dict))
 
 def fetch_users(module, org_id, project_id):
   # Fetch users for project.
@@ -627,16 +713,11 @@ def fetch_users(module, org_id, project_id):
     msg.append(f'{users_list_resp.text}')
     module.fail_json(msg=msg)
 
-  mkdir(module.work_dir + '/users')
   # Now that we have all of our users, write them out to files in our workdir.
   for user_dict in users_list:
     user = user_dict['user']
     user_name = user['name']
-    mkdir(module.work_dir + '/users/' + user_name)
-    user_filename = module.work_dir + '/users/' + user_name + '/' + user_name + '.yaml'
-    yaml_content = dump(user_dict)
-    with open(user_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+    write_backup_file(module, 'users/' + user_name + '/' + user_name + '.yaml', dump(user_dict))
 
 def fetch_user_groups(module, org_id, project_id):
   # Fetch user groups for project.
@@ -671,141 +752,107 @@ def fetch_user_groups(module, org_id, project_id):
     msg.append(f'{user_groups_list_resp.text}')
     module.fail_json(msg=msg)
 
-  mkdir(module.work_dir + '/user_groups')
   # Now that we have all of our users, write them out to files in our workdir.
   for user_group_dict in user_groups_list:
     user_group_id = user_group_dict['identifier']
-    mkdir(module.work_dir + '/user_groups/' + user_group_id)
-    user_group_filename = module.work_dir + '/user_groups/' + user_group_id + '/' + user_group_id + '.yaml'
-    yaml_content = dump(user_group_dict)
-    with open(user_group_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+    write_backup_file(module, 'user_groups/' + user_group_id + '/' + user_group_id + '.yaml', dump(user_group_dict))
 
 def fetch_service_accounts(module, org_id, project_id):
-  # Fetch service accounts for project.
-  page = 0
-  page_limit = 20
-  account_id = module.headers['Harness-Account']
-  url = f'https://app.harness.io/ng/api/serviceaccount/aggregate?accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}'
-  url += f'&pageIndex={page}&pageSize={page_limit}'
-  service_account_list_resp = request("GET", url, headers=module.headers)
-
-  # Interpret the API response.
-  if service_account_list_resp.status_code == 200:
-    # Bail out if the returned list is empty.
-    if service_account_list_resp.text == "[]":
-      return
-    # Check if we got all the items on the first call.
-    service_account_list = loads(service_account_list_resp.text)['data']['content']
-    resp_headers = service_account_list_resp.headers
-    while 'Content-Length' not in resp_headers.keys():
-      # Keep calling until we have everything.
-      page += 1
-      url = f'https://app.harness.io/ng/api/serviceaccount/aggregate?accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}'
-      url += f'&pageIndex={page}&pageSize={page_limit}'
-      service_account_list_resp = request("GET", url, headers=module.headers)
-      service_account_list.extend(loads(service_account_list_resp.text)['data']['content'])
-      resp_headers = service_account_list_resp.headers
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(service_account_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Service Account List Response was unexpected. Status Code: {status_code}')
-    msg.append(f'{service_account_list_resp.text}')
-    module.fail_json(msg=msg)
-
-  mkdir(module.work_dir + '/service_accounts')
-  # Now that we have all of our users, write them out to files in our workdir.
-  for service_account_dict in service_account_list:
+  # Fetch service accounts for project, and write them out to files in our workdir.
+  for service_account_dict in list_service_accounts(module, org_id, project_id):
     service_account = service_account_dict['serviceAccount']
     service_account_id = service_account['identifier']
-    mkdir(module.work_dir + '/service_accounts/' + service_account_id)
-    service_account_filename = module.work_dir + '/service_accounts/' + service_account_id + '/' + service_account_id + '.yaml'
-    yaml_content = dump(service_account_dict)
-    with open(service_account_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+    write_backup_file(module, 'service_accounts/' + service_account_id + '/' + service_account_id + '.yaml', dump(service_account_dict))
 
 def fetch_resource_groups(module, org_id, project_id):
-  # Fetch resource groups for project.
-  page = 0
-  page_limit = 20
-  account_id = module.headers['Harness-Account']
-  url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/resource-groups?page={page}&limit={page_limit}&sort=identifier&order=ASC'
-  resource_group_list_resp = request("GET", url, headers=module.headers)
-
-  # Interpret the API response.
-  if resource_group_list_resp.status_code == 200:
-    # Bail out if the returned list is empty.
-    if resource_group_list_resp.text == "[]":
-      return
-    # Check if we got all the items on the first call.
-    resource_group_list = loads(resource_group_list_resp.text)
-    resp_headers = resource_group_list_resp.headers
-    while 'Content-Length' not in resp_headers.keys():
-      # Keep calling until we have everything.
-      page += 1
-      url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/resource-groups?page={page}&limit={page_limit}&sort=identifier&order=ASC'
-      resource_group_list_resp = request("GET", url, headers=module.headers)
-      resource_group_list.extend(loads(resource_group_list_resp.text))
-      resp_headers = resource_group_list_resp.headers
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(resource_group_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Resource Group List Response was unexpected. Status Code: {status_code}')
-    msg.append(f'{resource_group_list_resp.text}')
-    module.fail_json(msg=msg)
-
-  mkdir(module.work_dir + '/resource_groups')
-  # Now that we have all of our users, write them out to files in our workdir.
-  for resource_group_dict in resource_group_list:
+  # Fetch resource groups for project, and write them out to files in our workdir.
+  for resource_group_dict in list_resource_groups(module, org_id, project_id):
     resource_group_id = resource_group_dict['identifier']
-    mkdir(module.work_dir + '/resource_groups/' + resource_group_id)
-    resource_group_filename = module.work_dir + '/resource_groups/' + resource_group_id + '/' + resource_group_id + '.yaml'
-    yaml_content = dump(resource_group_dict)
-    with open(resource_group_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+    write_backup_file(module, 'resource_groups/' + resource_group_id + '/' + resource_group_id + '.yaml', dump(resource_group_dict))
 
 def fetch_roles(module, org_id, project_id):
-  # Fetch resource groups for project.
-  page = 0
-  page_limit = 20
+  # Fetch roles for project, and write them out to files in our workdir.
+  for role_dict in list_roles(module, org_id, project_id):
+    role_id = role_dict['identifier']
+    write_backup_file(module, 'roles/' + role_id + '/' + role_id + '.yaml', dump(role_dict))
+
+def fetch_settings(module, org_id, project_id):
+  # Fetch the settings for project.
   account_id = module.headers['Harness-Account']
-  url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/roles?page={page}&limit={page_limit}&sort=identifier&order=ASC'
-  role_list_resp = request("GET", url, headers=module.headers)
+  url = f'https://app.harness.io/ng/api/settings?accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}'
+  settings_list = get_json(module, url, title='Harness Settings')['data']
+
+  # Now that we have all of our settings, write them out to files in our workdir.
+  for setting_dict in settings_list:
+    setting_id = setting_dict['setting']['identifier']
+    write_backup_file(module, 'settings/' + setting_id + '/' + setting_id + '.yaml', dump(setting_dict))
+
+def fetch_pipelines(module, org_id, project_id):
+  # Fetch pipelines for project, along with the input sets and triggers of each pipeline.
+  # Pipeline YAML can run to hundreds of KB, so the per-object GETs are spread over the worker pool.
+  url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/pipelines'
+  pipeline_list = paginate(module, f'{url}?sort=identifier&order=ASC', title='Harness Pipeline')
+
+  def fetch_pipeline(pipeline_id):
+    # Write out the pipeline and list what hangs off it.
+    pipeline = get_json(module, f'{url}/{pipeline_id}', title='Harness Pipeline')
+    write_backup_file(module, 'pipelines/' + pipeline_id + '/' + pipeline_id + '.yaml', pipeline['pipeline_yaml'])
+    children = []
+    for input_set in paginate(module, f'{url}/{pipeline_id}/input-sets', title='Harness Input Set'):
+      children.append((pipeline_id, 'input-sets', 'input_sets', 'input_set_yaml', input_set['identifier']))
+    for trigger in paginate(module, f'{url}/{pipeline_id}/triggers', title='Harness Trigger'):
+      children.append((pipeline_id, 'triggers', 'triggers', 'trigger_yaml', trigger['identifier']))
+    return children
+
+  def fetch_child(child):
+    pipeline_id, endpoint, folder, yaml_field, child_id = child
+    child_dict = get_json(module, f'{url}/{pipeline_id}/{endpoint}/{child_id}', title='Harness Pipeline')
+    write_backup_file(module, 'pipelines/' + pipeline_id + '/' + folder + '/' + child_id + '.yaml', child_dict[yaml_field])
+
+  pipeline_ids = [pipeline['identifier'] for pipeline in pipeline_list]
+  children = [child for pipeline_children in run_concurrently(module, fetch_pipeline, pipeline_ids) for child in pipeline_children]
+  run_concurrently(module, fetch_child, children)
+
+def fetch_monitored_services(module, org_id, project_id):
+  # Fetch monitored services for project.
+  account_id = module.headers['Harness-Account']
+  scope = f'accountId={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}'
+  url = 'https://app.harness.io/cv/api/monitored-service'
+  monitored_service_list = paginate_ng(module, f'{url}?{scope}', page_param='offset', title='Harness Monitored Service')
 
-  # Interpret the API response.
-  if role_list_resp.status_code == 200:
-    # Bail out if the returned list is empty.
-    if role_list_resp.text == "[]":
-      return
-    # Check if we got all the items on the first call.
-    role_list = loads(role_list_resp.text)
-    resp_headers = role_list_resp.headers
-    while 'Content-Length' not in resp_headers.keys():
-      # Keep calling until we have everything.
-      page += 1
-      url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/roles?page={page}&limit={page_limit}&sort=identifier&order=ASC'
-      role_list_resp = request("GET", url, headers=module.headers)
-      role_list.extend(loads(role_list_resp.text))
-      resp_headers = role_list_resp.headers
-  else:
-    # Try to extract the status_code to return with our failure.
-    status_code = str(role_list_resp.status_code)
-    msg=[]
-    msg.append(f'Harness Role List Response was unexpected. Status Code: {status_code}')
-    msg.append(f'{role_list_resp.text}')
-    module.fail_json(msg=msg)
+  def fetch_monitored_service(monitored_service_id):
+    monitored_service = get_json(module, f'{url}/{monitored_service_id}?{scope}', title='Harness Monitored Service')['data']
+    write_backup_file(module, 'monitored_services/' + monitored_service_id + '/' + monitored_service_id + '.yaml', dump(monitored_service))
 
-  mkdir(module.work_dir + '/roles')
-  # Now that we have all of our users, write them out to files in our workdir.
-  for role_dict in role_list:
-    role_id = role_dict['identifier']
-    mkdir(module.work_dir + '/roles/' + role_id)
-    role_filename = module.work_dir + '/roles/' + role_id + '/' + role_id + '.yaml'
-    yaml_content = dump(role_dict)
-    with open(role_filename, 'w') as file_writer:
-      file_writer.write(yaml_content)
+  run_concurrently(module, fetch_monitored_service, [item['identifier'] for item in monitored_service_list])
+
+def fetch_file_store(module, org_id, project_id):
+  # Fetch the File Store for project.
+  # Each file's metadata goes to file_store/<id>/<id>.yaml and its content to file_store_content/<id>/<name>.
+  # Contents are streamed in chunks and several files are downloaded at the same time.
+  account_id = module.headers['Harness-Account']
+  scope = f'accountIdentifier={account_id}&orgIdentifier={org_id}&projectIdentifier={project_id}'
+  url = 'https://app.harness.io/ng/api/file-store'
+  node_list = paginate_ng(module, f'{url}?{scope}', title='Harness File Store')
+
+  # Now that we have all of our files and folders, write their details out to files in our workdir.
+  for node_dict in node_list:
+    node_id = node_dict['identifier']
+    write_backup_file(module, 'file_store/' + node_id + '/' + node_id + '.yaml', dump(node_dict))
+
+  def fetch_file(node_dict):
+    node_id = node_dict['identifier']
+    # Never let a file name climb out of its directory.
+    file_name = basename(node_dict['name']) or node_id
+    harness_response = download(module, f'{url}/files/{node_id}/download?{scope}', title='Harness File Store')
+    try:
+      write_backup_stream(module, 'file_store_content/' + node_id + '/' + file_name, harness_response)
+    except OSError as error:
+      raise HarnessApiError(f'Harness File Store download of {node_id} has failed. {error}')
+    finally:
+      harness_response.close()
+
+  run_concurrently(module, fetch_file, [node_dict for node_dict in node_list if node_dict['type'] == 'FILE'])
 
 def main():
     # Set the object type for this module.
@@ -820,10 +867,29 @@ def main():
           api_key=dict(type='str', required=False),
           account_id=dict(type='str', required=False),
           dest=dict(type='str', required=False),
+          shard_by=dict(type='str', required=False, choices=['type', 'size']),
+          shard_size=dict(type='int', required=False, default=512),
+          workers=dict(type='int', required=False, default=4),
+          reproducible=dict(type='bool', required=False, default=False),
+          catalog=dict(type='path', required=False),
+          git_repo=dict(type='path', required=False),
+          s3_endpoint=dict(type='str', required=False),
+          s3_access_key=dict(type='str', required=False, no_log=True),
+          s3_secret_key=dict(type='str', required=False, no_log=True),
+          s3_region=dict(type='str', required=False, default='us-east-1'),
+          part_size=dict(type='int', required=False, default=8),
       ),
+      mutually_exclusive = [
+          ('git_repo', 'dest'),
+          ('git_repo', 'shard_by'),
+          ('git_repo', 'catalog'),
+      ],
       supports_check_mode = True
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'project'
     module.object_title = module.object_type.title()
@@ -834,6 +900,25 @@ def main():
     if '-' in identifier or '-' in org:
       module.fail_json(msg='Harness Identifiers may not contain dashes.')
 
+    # Catch and fail on shard settings that cannot work.
+    if module.params['shard_size'] < 1:
+      module.fail_json(msg='shard_size must be at least 1 megabyte.')
+    if module.params['workers'] < 1:
+      module.fail_json(msg='workers must be at least 1.')
+
+    # Work out the object storage details when the backup is headed to a bucket.
+    dest = module.params['dest']
+    if dest and is_s3_url(dest):
+      if module.params['part_size'] < 5:
+        module.fail_json(msg='part_size must be at least 5 megabytes.')
+      module.s3_endpoint = module.params['s3_endpoint'] or getenv('AWS_ENDPOINT_URL')
+      if not module.s3_endpoint:
+        module.s3_endpoint = f"https://s3.{module.params['s3_region']}.amazonaws.com"
+      module.s3_access_key = module.params['s3_access_key'] or getenv('AWS_ACCESS_KEY_ID')
+      module.s3_secret_key = module.params['s3_secret_key'] or getenv('AWS_SECRET_ACCESS_KEY')
+      if not module.s3_access_key or not module.s3_secret_key:
+        module.fail_json(msg='Must provide s3_access_key and s3_secret_key to the module or AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY to the environment.')
+
     # Pull the environment variables if they were provided.
     env_harness_api_key = getenv('HARNESS_API_KEY')
     env_harness_account_id = getenv('HARNESS_ACCOUNT_ID')
@@ -0,0 +1,350 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = r"""
+---
+module: backup_prune
+version_added: 0.10.0
+short_description: Apply grandfather-father-son retention to backup_project backups.
+description:
+  - Keep the most recent backups plus the newest backup of each of the last days, weeks, months and years,
+    and delete every other backup written by M(karcadia.harness.backup_project).
+  - Backups can be found in a local directory, in an S3-compatible bucket, or through the backup catalog.
+  - A sharded backup is kept or deleted as a whole, together with every shard its manifest lists.
+    No file that a kept backup depends on is ever deleted.
+  - Deletes run in parallel. Object storage deletes are batched up to 1000 keys per request.
+author:
+  - Justin McCormick (@karcadia)
+options:
+  path:
+    description:
+      - A local directory holding the backups, or an C(s3://bucket/prefix) location.
+      - Every backup found there is treated as one series, so point this at the backups of a single project.
+      - Cannot be combined with I(catalog).
+    required: False
+    type: str
+  catalog:
+    description:
+      - Path of the SQLite backup catalog. Retention is applied to each project in the catalog on its own,
+        archives are deleted wherever they are, and their catalog records are removed.
+      - Cannot be combined with I(path).
+    required: False
+    type: path
+  org:
+    description: With I(catalog), only prune backups of projects in this Harness Organization.
+    required: False
+    type: str
+  project:
+    description: With I(catalog), only prune backups of this Harness Project.
+    required: False
+    type: str
+  keep_last:
+    description: Number of most recent backups to keep no matter how old they are.
+    default: 1
+    type: int
+  keep_daily:
+    description: Number of days for which the newest backup of the day is kept.
+    default: 7
+    type: int
+  keep_weekly:
+    description: Number of ISO weeks for which the newest backup of the week is kept.
+    default: 4
+    type: int
+  keep_monthly:
+    description: Number of months for which the newest backup of the month is kept.
+    default: 12
+    type: int
+  keep_yearly:
+    description: Number of years for which the newest backup of the year is kept.
+    default: 0
+    type: int
+  workers:
+    description: Number of deletes to run at the same time.
+    default: 8
+    type: int
+  s3_endpoint:
+    description:
+      - URL of the S3-compatible endpoint, for example C(http://minio.example.com:9000).
+      - Falls back to the C(AWS_ENDPOINT_URL) environment variable, then to AWS S3 in I(s3_region).
+    required: False
+    type: str
+  s3_access_key:
+    description: Access key for object storage. Falls back to the C(AWS_ACCESS_KEY_ID) environment variable.
+    required: False
+    type: str
+  s3_secret_key:
+    description: Secret key for object storage. Falls back to the C(AWS_SECRET_ACCESS_KEY) environment variable.
+    required: False
+    type: str
+  s3_region:
+    description: Region used to sign object storage requests.
+    default: us-east-1
+    type: str
+"""
+
+EXAMPLES = r"""
+- name: Keep a week of dailies, a month of weeklies and a year of monthlies.
+  karcadia.harness.backup_prune:
+    path: /tmp/backups/demo_project
+
+- name: Prune the backups of every project recorded in the backup catalog.
+  karcadia.harness.backup_prune:
+    catalog: /tmp/backups/catalog.db
+    keep_daily: 14
+    keep_yearly: 5
+
+- name: Show what would be pruned from a MinIO bucket.
+  karcadia.harness.backup_prune:
+    path: s3://backups/harness/demo_project/
+    s3_endpoint: http://minio.example.com:9000
+  check_mode: True
+  environment:
+    AWS_ACCESS_KEY_ID: abc123
+    AWS_SECRET_ACCESS_KEY: abc123
+"""
+
+RETURN = r"""
+kept:
+  description: Backups that were kept, with the retention rules that kept each one.
+  type: list
+deleted:
+  description: Backups that were deleted, or would have been deleted in check mode.
+  type: list
+"""
+
+# Internal Imports
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.backup import MANIFEST_NAME, read_manifest, shard_base
+from ansible_collections.karcadia.harness.plugins.module_utils.catalog import BackupCatalog
+from ansible_collections.karcadia.harness.plugins.module_utils.s3 import S3Client, S3Error, is_s3_url, parse_s3_url
+
+# Stdlib Imports
+from os import getenv, listdir, remove
+from os.path import join, isdir, isfile, getmtime, dirname
+from json import loads
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+def plan_retention(module, backups):
+  # Decide which backups of one series to keep, newest first, and why.
+  ordered = sorted(backups, key=lambda backup: backup['time'], reverse=True)
+  for backup in ordered:
+    backup['rules'] = []
+  for backup in ordered[:module.params['keep_last']]:
+    backup['rules'].append('last')
+  periods = (
+    ('daily', module.params['keep_daily'], lambda time: time.strftime('%Y-%m-%d')),
+    ('weekly', module.params['keep_weekly'], lambda time: time.isocalendar()[:2]),
+    ('monthly', module.params['keep_monthly'], lambda time: time.strftime('%Y-%m')),
+    ('yearly', module.params['keep_yearly'], lambda time: time.year),
+  )
+  for rule, count, period_of in periods:
+    seen = []
+    for backup in ordered:
+      period = period_of(backup['time'])
+      if period in seen:
+        continue
+      if len(seen) >= count:
+        break
+      seen.append(period)
+      backup['rules'].append(rule)
+  return ordered
+
+def scan_directory(module, path):
+  # Find the backups in a local directory. A manifest claims the shards it lists.
+  names = sorted(listdir(path))
+  backups = []
+  claimed = set()
+  for name in names:
+    if name.endswith('.' + MANIFEST_NAME):
+      manifest = read_manifest(join(path, name))
+      files = [name] + [shard['file'] for shard in manifest.get('shards', [])]
+      claimed.update(files)
+      backups.append(new_backup(join(path, name), getmtime(join(path, name)), [join(path, file_name) for file_name in files]))
+  for name in names:
+    if name.endswith(('.tar.gz', '.tgz')) and name not in claimed and isfile(join(path, name)):
+      backups.append(new_backup(join(path, name), getmtime(join(path, name)), [join(path, name)]))
+  return backups
+
+def scan_bucket(module, location):
+  # Find the backups under a bucket prefix. Manifests are small, so they are fetched in parallel to learn their shards.
+  bucket, prefix = parse_s3_url(location)
+  objects = module.s3_client.list_objects(bucket, prefix)
+  manifests = [item for item in objects if item['key'].endswith('.' + MANIFEST_NAME)]
+
+  def fetch_manifest(item):
+    return loads(module.s3_client.get_object(bucket, item['key']))
+
+  with ThreadPoolExecutor(max_workers=module.params['workers']) as executor:
+    contents = list(executor.map(fetch_manifest, manifests))
+  backups = []
+  claimed = set()
+  for item, manifest in zip(manifests, contents):
+    key_dir = dirname(item['key'])
+    keys = [item['key']] + [join(key_dir, shard['file']) for shard in manifest.get('shards', [])]
+    claimed.update(keys)
+    backups.append(new_backup(f's3://{bucket}/{item["key"]}', s3_time(item['last_modified']), [f's3://{bucket}/{key}' for key in keys]))
+  for item in objects:
+    if item['key'].endswith(('.tar.gz', '.tgz')) and item['key'] not in claimed:
+      backups.append(new_backup(f's3://{bucket}/{item["key"]}', s3_time(item['last_modified']), [f's3://{bucket}/{item["key"]}']))
+  return backups
+
+def scan_catalog(module):
+  # Find the backups recorded in the catalog, one series per project.
+  series = {}
+  for recorded in module.catalog.backups(module.params['org'], module.params['project']):
+    location = recorded['location']
+    files = [location]
+    if location.endswith('.' + MANIFEST_NAME):
+      shards = sorted(set(member['shard'] for member in module.catalog.members(recorded['id']) if member.get('shard')))
+      files += [f'{shard_base(location)}.{shard}.tar.gz' for shard in shards]
+    created = datetime.strptime(recorded['created'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    backup = new_backup(location, created.timestamp(), files)
+    backup['catalog_id'] = recorded['id']
+    series.setdefault((recorded['org'], recorded['project']), []).append(backup)
+  return list(series.values())
+
+def new_backup(location, timestamp, files):
+  return {'location': location, 'time': datetime.fromtimestamp(timestamp, timezone.utc), 'files': files}
+
+def s3_time(last_modified):
+  return datetime.strptime(last_modified[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+
+def delete_files(module, files):
+  # Delete local files and object storage keys in parallel. Keys are batched per bucket.
+  local_files = [file_name for file_name in files if not is_s3_url(file_name)]
+  batches = []
+  by_bucket = {}
+  for file_name in files:
+    if is_s3_url(file_name):
+      bucket, key = parse_s3_url(file_name)
+      by_bucket.setdefault(bucket, []).append(key)
+  for bucket, keys in by_bucket.items():
+    for start in range(0, len(keys), 1000):
+      batches.append((bucket, keys[start:start + 1000]))
+
+  def delete_local(file_name):
+    try:
+      remove(file_name)
+    except FileNotFoundError:
+      pass
+
+  def delete_batch(batch):
+    module.s3_client.delete_objects(*batch)
+
+  with ThreadPoolExecutor(max_workers=module.params['workers']) as executor:
+    futures = [executor.submit(delete_local, file_name) for file_name in local_files]
+    futures += [executor.submit(delete_batch, batch) for batch in batches]
+    for future in futures:
+      future.result()
+
+def prune_backups(module):
+  # Gather the backup series to work on.
+  path = module.params['path']
+  try:
+    if module.catalog:
+      all_series = scan_catalog(module)
+    elif is_s3_url(path):
+      all_series = [scan_bucket(module, path)]
+    else:
+      if not isdir(path):
+        module.fail_json(msg=f'Backup directory {path} does not exist.')
+      all_series = [scan_directory(module, path)]
+  except (S3Error, ValueError, OSError) as error:
+    module.fail_json(msg=f'Could not list the backups. {error}')
+
+  kept = []
+  pruned = []
+  for series in all_series:
+    for backup in plan_retention(module, series):
+      if backup['rules']:
+        kept.append(backup)
+      else:
+        pruned.append(backup)
+
+  # Never delete anything a kept backup still needs.
+  protected = set(file_name for backup in kept for file_name in backup['files'])
+  doomed = [file_name for backup in pruned for file_name in backup['files'] if file_name not in protected]
+  if module.s3_client is None and any(is_s3_url(file_name) for file_name in doomed):
+    module.fail_json(msg='Must provide s3_access_key and s3_secret_key to the module or AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY to the environment.')
+
+  kept_result = [{'location': backup['location'], 'time': backup['time'].strftime('%Y-%m-%dT%H:%M:%SZ'), 'rules': backup['rules']} for backup in kept]
+  deleted_result = [{'location': backup['location'], 'time': backup['time'].strftime('%Y-%m-%dT%H:%M:%SZ'), 'files': backup['files']} for backup in pruned]
+
+  if not pruned:
+    module.exit_json(changed=False, msg='No backups needed pruning.', kept=kept_result, deleted=[])
+
+  # Handle check mode by pretending we are done now.
+  if module.check_mode:
+    module.exit_json(changed=True, msg=f'{len(pruned)} backups have been pruned.', check_mode=True, kept=kept_result, deleted=deleted_result)
+
+  try:
+    delete_files(module, doomed)
+  except (S3Error, OSError) as error:
+    module.fail_json(msg=f'Pruning has failed. {error}')
+
+  # Forget the deleted backups in the catalog.
+  if module.catalog:
+    for backup in pruned:
+      module.catalog.forget_backup(backup['catalog_id'])
+
+  module.exit_json(changed=True, msg=f'{len(pruned)} backups have been pruned.', kept=kept_result, deleted=deleted_result)
+
+def main():
+    # Initialize the module and specify the argument spec.
+    module = AnsibleModule(
+      argument_spec = dict(
+          path=dict(type='str', required=False),
+          catalog=dict(type='path', required=False),
+          org=dict(type='str', required=False, aliases=['org_id']),
+          project=dict(type='str', required=False, aliases=['project_id']),
+          keep_last=dict(type='int', required=False, default=1),
+          keep_daily=dict(type='int', required=False, default=7),
+          keep_weekly=dict(type='int', required=False, default=4),
+          keep_monthly=dict(type='int', required=False, default=12),
+          keep_yearly=dict(type='int', required=False, default=0),
+          workers=dict(type='int', required=False, default=8),
+          s3_endpoint=dict(type='str', required=False),
+          s3_access_key=dict(type='str', required=False, no_log=True),
+          s3_secret_key=dict(type='str', required=False, no_log=True),
+          s3_region=dict(type='str', required=False, default='us-east-1'),
+      ),
+      mutually_exclusive = [('path', 'catalog')],
+      required_one_of = [('path', 'catalog')],
+      supports_check_mode = True
+    )
+
+    # Catch and fail on retention settings that cannot work.
+    for count in ('keep_last', 'keep_daily', 'keep_weekly', 'keep_monthly', 'keep_yearly'):
+      if module.params[count] < 0:
+        module.fail_json(msg=f'{count} may not be negative.')
+    if module.params['workers'] < 1:
+      module.fail_json(msg='workers must be at least 1.')
+
+    # Open the catalog when retention is driven by it.
+    module.catalog = None
+    if module.params['catalog']:
+      if not isfile(module.params['catalog']):
+        module.fail_json(msg=f'Backup catalog {module.params["catalog"]} does not exist.')
+      module.catalog = BackupCatalog(module.params['catalog'])
+
+    # Object storage credentials are only needed when a bucket may be involved.
+    s3_endpoint = module.params['s3_endpoint'] or getenv('AWS_ENDPOINT_URL')
+    if not s3_endpoint:
+      s3_endpoint = f"https://s3.{module.params['s3_region']}.amazonaws.com"
+    s3_access_key = module.params['s3_access_key'] or getenv('AWS_ACCESS_KEY_ID')
+    s3_secret_key = module.params['s3_secret_key'] or getenv('AWS_SECRET_ACCESS_KEY')
+    module.s3_client = None
+    if s3_access_key and s3_secret_key:
+      module.s3_client = S3Client(s3_endpoint, s3_access_key, s3_secret_key, module.params['s3_region'])
+    elif module.params['path'] and is_s3_url(module.params['path']):
+      module.fail_json(msg='Must provide s3_access_key and s3_secret_key to the module or AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY to the environment.')
+
+    # Call the prune function.
+    prune_backups(module)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = r"""
+---
+module: bulk_apply
+version_added: 0.10.0
+short_description: Reconcile many Harness objects of one type in a single task
+description:
+  - Bring a whole list of Harness Secrets, Variables or Connectors in one scope to their desired state.
+  - The scope is listed once, creates, updates and no-ops are worked out locally, and only the needed writes
+    are sent, several at a time.
+  - Each object takes the same shape as the options of M(karcadia.harness.secret), M(karcadia.harness.variable)
+    or M(karcadia.harness.connector), and is compared the same way those modules compare it.
+author:
+  - Justin McCormick (@karcadia)
+options:
+  object_type:
+    description: Type of the Harness objects in I(objects).
+    choices:
+      - secret
+      - variable
+      - connector
+    required: True
+    type: str
+  org:
+    description: Identifier of the Harness Organization to which the objects belong.
+    required: False
+    type: str
+  project:
+    description: Identifier of the Harness Project to which the objects belong.
+    required: False
+    type: str
+  objects:
+    description: The desired objects.
+    required: True
+    type: list
+    elements: dict
+    suboptions:
+      identifier:
+        description: Identifier of the Harness object.
+        required: True
+        type: str
+      name:
+        description: Name of the Harness object. Defaults to the identifier.
+        required: False
+        type: str
+      description:
+        description: A description to apply to the Harness object.
+        required: False
+        type: str
+      tags:
+        description: A dictionary of tags to add to the Harness object. Not used by Variables.
+        required: False
+        type: dict
+      spec:
+        description: The spec of the Harness object, as the single object module takes it.
+        required: False
+        type: dict
+      type:
+        description: Type of a Harness Variable.
+        required: False
+        type: str
+      state:
+        description: Desired state of the Harness object.
+        choices:
+          - absent
+          - present
+        default: present
+        type: str
+      force_update:
+        description: Update a Harness Secret even when it looks unchanged, for example to push a new value.
+        required: False
+        type: bool
+  workers:
+    description: Number of writes to send to Harness at the same time.
+    default: 8
+    type: int
+"""
+
+EXAMPLES = r"""
+- name: Reconcile all the Secrets of a project in one task.
+  karcadia.harness.bulk_apply:
+    object_type: secret
+    org: my_demo_org
+    project: my_demo_project
+    objects: "{{ project_secrets }}"
+
+- name: Create two Variables and delete a third.
+  karcadia.harness.bulk_apply:
+    object_type: variable
+    org: my_demo_org
+    objects:
+      - identifier: region
+        type: String
+        spec:
+          valueType: FIXED
+          fixedValue: us-east-1
+      - identifier: tier
+        type: String
+        spec:
+          valueType: FIXED
+          fixedValue: gold
+      - identifier: retired_variable
+        state: absent
+  environment:
+    HARNESS_ACCOUNT_ID: abc123
+    HARNESS_API_KEY: abc123
+"""
+
+RETURN = r"""
+created:
+  description: Identifiers of the objects that were created.
+  type: list
+updated:
+  description: Identifiers of the objects that were updated, with every changed path and the first of them as the component that triggered the update.
+  type: list
+deleted:
+  description: Identifiers of the objects that were deleted.
+  type: list
+unchanged:
+  description: Identifiers of the objects that were already in the desired state.
+  type: list
+"""
+
+# Internal Imports
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import HarnessApiError, paginate, paginate_ng, request
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import structural_diff
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
+
+# Stdlib Imports
+from os import getenv
+from json import dumps
+from concurrent.futures import ThreadPoolExecutor
+
+def list_scope(module):
+  # List every existing object in the scope once, keyed by identifier.
+  if module.object_type == 'variable':
+    existing_list = paginate_ng(module, module.list_url, title=f'Harness {module.object_title}')
+  else:
+    existing_list = paginate(module, module.list_url, title=f'Harness {module.object_title}')
+  return {existing[module.object_type]['identifier']: existing for existing in existing_list}
+
+def build_object(module, desired):
+  # Prepare the object with the required fields, just like the single object module does.
+  org_id = module.params['org']
+  project_id = module.params['project']
+  pre_json_object = {
+    module.object_type: {
+      "identifier": desired['identifier'],
+      "name": desired['name'] or desired['identifier'],
+      "spec": desired['spec'],
+    }
+  }
+  if module.object_type == 'variable':
+    pre_json_object[module.object_type]['type'] = desired['type']
+    org_key, project_key = 'orgIdentifier', 'projectIdentifier'
+  else:
+    pre_json_object[module.object_type]['tags'] = desired['tags']
+    org_key, project_key = 'org', 'project'
+
+  # Attach the org and project IDs as needed.
+  if module.object_scope == 'project':
+    pre_json_object[module.object_type][org_key] = org_id
+    pre_json_object[module.object_type][project_key] = project_id
+  elif module.object_scope == 'org':
+    pre_json_object[module.object_type][org_key] = org_id
+  pre_json_object[module.object_type]['description'] = desired['description']
+  return pre_json_object
+
+def find_update(module, desired, pre_json_object, existing):
+  # Return every path that needs an update. The schemas are shared with the single object modules.
+  changed_paths = structural_diff(module.object_type, pre_json_object, existing)
+  if desired['force_update']:
+    changed_paths.append('force_update')
+  return changed_paths
+
+def object_url(module, object_id):
+  # The read url of one object in our scope.
+  if module.object_type == 'variable':
+    return f'https://app.harness.io/ng/api/variables/{object_id}?{module.ng_scope}'
+  return f'{module.push_url}/{object_id}'
+
+def write_object(module, action):
+  # Send one write. Runs on a worker thread, so failures are raised rather than failing the module.
+  method, object_id, url, body = action
+  if body is None:
+    harness_response = request(method, url, headers=module.headers)
+  else:
+    harness_response = request(method, url, headers=module.headers, data=dumps(body))
+  if harness_response.status_code not in (200, 201, 204):
+    raise HarnessApiError(f'Harness {module.object_title} {object_id} {method} has failed. Status Code: {harness_response.status_code} {harness_response.text}')
+
+def reconcile(module):
+  try:
+    existing_objects = list_scope(module)
+  except HarnessApiError as error:
+    module.fail_json(msg=str(error))
+
+  # Work out every create, update and delete locally.
+  created = []
+  updated = []
+  deleted = []
+  unchanged = []
+  actions = []
+  seen = set()
+  for desired in module.params['objects']:
+    object_id = desired['identifier']
+    if '-' in object_id:
+      module.fail_json(msg=f'Harness Identifiers may not contain dashes. {object_id}')
+    if object_id in seen:
+      module.fail_json(msg=f'{module.object_title} {object_id} is listed more than once.')
+    seen.add(object_id)
+    existing = existing_objects.get(object_id)
+
+    if desired['state'] == 'absent':
+      if existing is None:
+        unchanged.append(object_id)
+      else:
+        deleted.append(object_id)
+        actions.append(('DELETE', object_id, object_url(module, object_id), None))
+      continue
+
+    if not desired['spec']:
+      module.fail_json(msg=f'The spec parameter must be provided when state is present. {object_id}')
+    pre_json_object = build_object(module, desired)
+    if existing is None:
+      created.append(object_id)
+      actions.append(('POST', object_id, module.push_url, pre_json_object))
+      continue
+    changed_paths = find_update(module, desired, pre_json_object, existing)
+    if not changed_paths:
+      unchanged.append(object_id)
+    else:
+      updated.append({'identifier': object_id, 'component_triggering_update': changed_paths[0], 'changed_paths': changed_paths})
+      # Variables are updated through the push url, the v1 objects through their own url.
+      url = module.push_url if module.object_type == 'variable' else object_url(module, object_id)
+      actions.append(('PUT', object_id, url, pre_json_object))
+
+  changed = bool(actions)
+  msg = f'{len(created)} created, {len(updated)} updated, {len(deleted)} deleted, {len(unchanged)} unchanged.'
+
+  # Handle check mode by reporting what we would have done.
+  if module.check_mode:
+    module.exit_json(changed=changed, msg=msg, check_mode=True, created=created, updated=updated, deleted=deleted, unchanged=unchanged)
+
+  # Send only the writes that are needed, several at a time, and report every failure together.
+  failures = []
+  with ThreadPoolExecutor(max_workers=module.params['workers']) as executor:
+    futures = [executor.submit(write_object, module, action) for action in actions]
+    for future in futures:
+      try:
+        future.result()
+      except HarnessApiError as error:
+        failures.append(str(error))
+  if failures:
+    module.fail_json(msg=failures, created=created, updated=updated, deleted=deleted, unchanged=unchanged)
+
+  module.exit_json(changed=changed, msg=msg, created=created, updated=updated, deleted=deleted, unchanged=unchanged)
+
+def main():
+    # Initialize the module and specify the argument spec.
+    module = AnsibleModule(
+      argument_spec = dict(
+          object_type=dict(type='str', required=True, choices=['secret', 'variable', 'connector']),
+          org=dict(type='str', required=False, aliases=['org_id']),
+          project=dict(type='str', required=False, aliases=['project_id']),
+          objects=dict(type='list', elements='dict', required=True, options=dict(
+              identifier=dict(type='str', required=True, aliases=['id']),
+              name=dict(type='str', required=False),
+              description=dict(type='str', required=False, aliases=['desc']),
+              tags=dict(type='dict', required=False),
+              spec=dict(type='dict', required=False),
+              type=dict(type='str', required=False),
+              state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
+              force_update=dict(type='bool', required=False),
+          )),
+          workers=dict(type='int', required=False, default=8),
+          api_key=dict(type='str', required=False),
+          account_id=dict(type='str', required=False),
+      ),
+      supports_check_mode = True
+    )
+
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
+    # Set the object type for this module.
+    module.object_type = module.params['object_type']
+    module.object_title = module.object_type.title()
+
+    # Catch and fail when we were given an ID with a dash in it.
+    org_id = module.params['org']
+    project_id = module.params['project']
+    if org_id and '-' in org_id:
+      module.fail_json(msg='Harness Identifiers may not contain dashes.')
+    if project_id and '-' in project_id:
+      module.fail_json(msg='Harness Identifiers may not contain dashes.')
+    if project_id and not org_id:
+      module.fail_json(msg='Org ID must be provided when project is provided.')
+    if module.params['workers'] < 1:
+      module.fail_json(msg='workers must be at least 1.')
+
+    # Pull the environment variables if they were provided.
+    env_harness_api_key = getenv('HARNESS_API_KEY')
+    env_harness_account_id = getenv('HARNESS_ACCOUNT_ID')
+
+    # Catch and fail if we don't have the auth information.
+    api_key = module.params['api_key']
+    account_id = module.params['account_id']
+    if not api_key and not env_harness_api_key:
+      module.fail_json(msg='Must provide api_key to the module or HARNESS_API_KEY to the environment.')
+    if not account_id and not env_harness_account_id:
+      module.fail_json(msg='Must provide account_id to the module or HARNESS_ACCOUNT_ID to the environment.')
+
+    # If we were not provided auth information to the module, pull it from the environment.
+    if api_key:
+      module.api_key = api_key
+    else:
+      module.api_key = env_harness_api_key
+    if account_id:
+      module.account_id = account_id
+    else:
+      module.account_id = env_harness_account_id
+
+    # Prepare to hit the Harness API.
+    headers = {}
+    headers['x-api-key'] = module.api_key
+    headers['Harness-Account'] = module.account_id
+    headers['Content-Type'] = 'application/json'
+    module.headers = headers
+
+    # Determine the scope of our objects.
+    if org_id and project_id:
+      module.object_scope = 'project'
+    elif org_id:
+      module.object_scope = 'org'
+    else:
+      module.object_scope = 'account'
+
+    # Prepare the Harness API URLs for this module.
+    if module.object_type == 'variable':
+      module.ng_scope = f'accountIdentifier={module.account_id}'
+      if module.object_scope in ('org', 'project'):
+        module.ng_scope += f'&orgIdentifier={org_id}'
+      if module.object_scope == 'project':
+        module.ng_scope += f'&projectIdentifier={project_id}'
+      module.push_url = f'https://app.harness.io/ng/api/variables?{module.ng_scope}'
+      module.list_url = module.push_url
+    else:
+      if module.object_scope == 'account':
+        module.push_url = f'https://app.harness.io/v1/{module.object_type}s'
+      elif module.object_scope == 'org':
+        module.push_url = f'https://app.harness.io/v1/orgs/{org_id}/{module.object_type}s'
+      else:
+        module.push_url = f'https://app.harness.io/v1/orgs/{org_id}/projects/{project_id}/{module.object_type}s'
+      module.list_url = module.push_url
+
+    # Call the reconcile function.
+    reconcile(module)
+
+if __name__ == "__main__":
+    main()
@@ -48,6 +48,14 @@ options:
     description: 
     required: 
     type: 
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
 """
 
 EXAMPLES = r"""
@@ -103,14 +111,15 @@ environmentGroup:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import diff_result, same_yaml
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     object_id   = module.params["identifier"]
@@ -128,7 +137,7 @@ def ensure_present(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -176,7 +185,7 @@ def ensure_present(module):
           needs_update = True
           component = 'color'
       if pre_json_object['yaml'] \
-        and pre_json_object['yaml'] != existing['yaml']:
+        and not same_yaml(pre_json_object['yaml'], existing['yaml']):
           needs_update = True
           component = 'yaml'
       if pre_json_object['name'] != existing['name']:
@@ -218,11 +227,7 @@ def ensure_present(module):
       if method == 'PUT':
         actioned = 'updated'
         msg = f'{module.object_title} {object_id} has been {actioned}.'
-        diff = {
-          'before': existing,
-          'after': pre_json_object
-        }
-        module.exit_json(changed=True, msg=msg, diff=diff, environment_group=object_resp_dict['data']['envGroup'], component_triggering_update=component)
+        module.exit_json(changed=True, msg=msg, **diff_result(module, existing, pre_json_object, yaml_fields=('yaml',)), environment_group=object_resp_dict['data']['envGroup'], component_triggering_update=component)
     else:
       # Try to extract the status_code to return with our failure.
       status_code = str(create_object_resp.status_code)
@@ -247,7 +252,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -304,6 +309,7 @@ def main():
           state=dict(type='str', choices=['present', 'absent'], default='present'),
           api_key=dict(type='str'),
           account_id=dict(type='str'),
+          existing=dict(type='dict', required=False),
           type=dict(type='str'),
           color=dict(type='str'),
           tags=dict(type='dict'),
@@ -315,6 +321,9 @@ def main():
       ]
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'environmentGroup'
     module.object_title = 'Environment Group'
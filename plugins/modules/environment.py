@@ -48,6 +48,41 @@ options:
     description: 
     required: 
     type: 
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
+  cache_ttl:
+    description:
+      - Answer the existence check from a listing of the whole scope, kept for this many seconds in a file on the
+        host running the module. The first run for a scope lists it once, and later runs in the same loop or in
+        other forks read the file, including for objects that do not exist.
+      - Every write drops its object from the listing, so that the next check of that object goes to the API.
+      - The files live in the directory named by the HARNESS_CACHE_DIR environment variable, or in a directory of the
+        user's own under the system temporary directory. The cache is off when that directory is not owned by the
+        user or is open to other users.
+      - C(0) turns the cache off.
+    default: 0
+    type: int
+  ledger:
+    description:
+      - Path of a SQLite ledger recording the desired state last applied to each object. Missing directories are created.
+      - When the options describe the same desired state as the ledger entry for this object, the module reports no
+        change without reading the object. The entry is trusted for I(ledger_ttl) seconds, and after that for as long as
+        the object's last modification time in the I(cache_ttl) scope listing matches the one recorded with it.
+      - Changes made to the object outside of this module are not seen while the entry is trusted.
+        Delete the ledger file to force a full comparison.
+    required: False
+    type: path
+  ledger_ttl:
+    description:
+      - Seconds for which a I(ledger) entry is trusted without any check against Harness.
+    default: 86400
+    type: int
 """
 
 EXAMPLES = r"""
@@ -103,14 +138,17 @@ environment:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import diff_result, same_yaml
+from ansible_collections.karcadia.harness.plugins.module_utils.cache import forget_object
+from ansible_collections.karcadia.harness.plugins.module_utils.ledger import forget_applied, ledger_converged, record_applied
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     object_id   = module.params["identifier"]
@@ -128,7 +166,7 @@ def ensure_present(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -187,7 +225,7 @@ def ensure_present(module):
           needs_update = True
           component = 'color'
       if pre_json_object['yaml'] \
-        and pre_json_object['yaml'] != existing['yaml']:
+        and not same_yaml(pre_json_object['yaml'], existing['yaml']):
           needs_update = True
           component = 'yaml'
       if pre_json_object['name'] != existing['name']:
@@ -203,6 +241,7 @@ def ensure_present(module):
           module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.', check_mode=True,
                            environment=pre_json_object, updated=True, component_triggering_update=component)
       else:
+        record_applied(module, loads(harness_response.text))
         module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
 
     if checked_and_absent:
@@ -218,10 +257,14 @@ def ensure_present(module):
     # Push the object into Harness.
     create_object_resp = request(method, url, headers=module.headers, data=dumps(pre_json_object))
 
+    # Whatever the outcome, the cached listing no longer knows this object.
+    forget_object(module)
+
     # Interpret the API response.
     if create_object_resp.status_code == 200:
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
+      record_applied(module, object_resp_dict)
       if method == 'POST':
         actioned = 'created'
         msg = f'{module.object_title} {object_id} has been {actioned}.'
@@ -229,11 +272,7 @@ def ensure_present(module):
       if method == 'PUT':
         actioned = 'updated'
         msg = f'{module.object_title} {object_id} has been {actioned}.'
-        diff = {
-          'before': existing,
-          'after': pre_json_object
-        }
-        module.exit_json(changed=True, msg=msg, diff=diff, environment=object_resp_dict['data']['environment'], component_triggering_update=component)
+        module.exit_json(changed=True, msg=msg, **diff_result(module, existing, pre_json_object, yaml_fields=('yaml',)), environment=object_resp_dict['data']['environment'], component_triggering_update=component)
     else:
       # Try to extract the status_code to return with our failure.
       status_code = str(create_object_resp.status_code)
@@ -258,7 +297,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -286,6 +325,8 @@ def ensure_absent(module):
 
       # Delete the Object.
       delete_object_resp = request("DELETE", module.read_url, headers=module.headers)
+      forget_object(module)
+      forget_applied(module)
 
       # Interpret the API response.
       if delete_object_resp.status_code == 200:
@@ -315,6 +356,10 @@ def main():
           state=dict(type='str', choices=['present', 'absent'], default='present'),
           api_key=dict(type='str'),
           account_id=dict(type='str'),
+          existing=dict(type='dict', required=False),
+          cache_ttl=dict(type='int', required=False, default=0),
+          ledger=dict(type='path', required=False),
+          ledger_ttl=dict(type='int', required=False, default=86400),
           description=dict(type='str', aliases=['desc']),
           type=dict(type='str'),
           color=dict(type='str'),
@@ -327,6 +372,9 @@ def main():
       ]
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'environment'
     module.object_title = module.object_type.title()
@@ -392,6 +440,8 @@ def main():
     # Run the appropriate function based on the state requested.
     state = module.params['state']
     if state == "present":
+      if ledger_converged(module):
+        module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
       ensure_present(module)
     elif state == "absent":
       ensure_absent(module)
@@ -37,6 +37,14 @@ options:
     description: 
     required: 
     type: 
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
 """
 
 EXAMPLES = r"""
@@ -91,16 +99,16 @@ freeze:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import diff_result
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
-from yaml import safe_load
 from copy import deepcopy
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     object_id   = module.params["identifier"]
@@ -117,7 +125,7 @@ def ensure_present(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -161,6 +169,8 @@ def ensure_present(module):
 
     if checked_and_present:
       # Determine if the existing object needs to be updated.
+      # yaml is only imported when there is an existing freeze to compare with.
+      from yaml import safe_load
       existing_yaml = loads(harness_response.text)['data']['yaml']
       existing = safe_load(existing_yaml)['freeze']
       needs_update = False
@@ -200,7 +210,7 @@ def ensure_present(module):
         url = module.read_url
         if module.check_mode:
           # Return success with the object that we would have created.
-          module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.', check_mode=True, diff=diff,
+          module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.', check_mode=True, **diff_result(module, existing, pre_json_object[module.object_type], yaml_fields=('yaml',)),
                            freeze=pre_json_object, updated=True, component_triggering_update=component)
       else:
         module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
@@ -209,7 +219,7 @@ def ensure_present(module):
       if module.check_mode:
         # Return success with the object that we would have created.
         module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been created.',
-                         check_mode=True, freeze=pre_json_object, diff=diff)
+                         check_mode=True, freeze=pre_json_object, **diff_result(module, {}, pre_json_object[module.object_type], yaml_fields=('yaml',)))
 
       # We will use a POST method to create the missing object.
       method = 'POST'
@@ -229,11 +239,7 @@ def ensure_present(module):
       if method == 'PUT':
         actioned = 'updated'
         msg = f'{module.object_title} {object_id} has been {actioned}.'
-        diff = {
-          'before': existing,
-          'after': pre_json_object[module.object_type]
-        }
-        module.exit_json(changed=True, msg=msg, diff=diff, freeze=object_resp_dict, component_triggering_update=component)
+        module.exit_json(changed=True, msg=msg, **diff_result(module, existing, pre_json_object[module.object_type], yaml_fields=('yaml',)), freeze=object_resp_dict, component_triggering_update=component)
     else:
       # Try to extract the status_code to return with our failure.
       status_code = str(create_object_resp.status_code)
@@ -258,7 +264,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -305,6 +311,7 @@ def main():
           state=dict(type='str', choices=['present', 'absent'], default='present'),
           api_key=dict(type='str'),
           account_id=dict(type='str'),
+          existing=dict(type='dict', required=False),
           description=dict(type='str'),
           tags=dict(type='dict'),
           status=dict(type='str', choices=['Disabled', 'Enabled']),
@@ -317,6 +324,9 @@ def main():
       ]
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'freeze'
     module.object_title = module.object_type.title()
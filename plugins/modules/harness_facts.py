@@ -0,0 +1,198 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = r"""
+---
+module: harness_facts
+version_added: 0.10.0
+short_description: Snapshot the objects of a Harness scope as facts
+description:
+  - List every object of the given types in a Harness account, org or project, all types at the same time,
+    and set them as the C(harness_facts) fact, keyed by type and identifier.
+  - Later tasks can look objects up in the fact instead of reading them from Harness one at a time.
+  - Secrets are listed with their metadata only. Harness never returns secret values.
+  - Infrastructures are keyed by environment identifier, then by infrastructure identifier.
+author:
+  - Justin McCormick (@karcadia)
+options:
+  org:
+    description: Identifier of the Harness Organization to snapshot, or in which the Project lives.
+    required: False
+    type: str
+  project:
+    description: Identifier of the Harness Project to snapshot.
+    required: False
+    type: str
+  types:
+    description: The object types to list. Defaults to all of them.
+    choices:
+      - services
+      - environments
+      - infrastructures
+      - connectors
+      - secrets
+      - templates
+      - variables
+      - roles
+      - resource_groups
+      - service_accounts
+    required: False
+    type: list
+    elements: str
+  workers:
+    description: Number of listings to run at the same time.
+    default: 8
+    type: int
+"""
+
+EXAMPLES = r"""
+- name: Snapshot a Harness Project.
+  karcadia.harness.harness_facts:
+    org: my_demo_org
+    project: my_demo_project
+
+- name: Only deploy when the connector exists.
+  karcadia.harness.pipeline:
+    identifier: deploy
+    org: my_demo_org
+    project: my_demo_project
+    pipeline_yaml: "{{ lookup('file', 'deploy.yaml') }}"
+  when: "'my_k8s' in harness_facts.connectors"
+
+- name: Snapshot the connectors and secrets of a Harness Organization.
+  karcadia.harness.harness_facts:
+    org: my_demo_org
+    types:
+      - connectors
+      - secrets
+  environment:
+    HARNESS_ACCOUNT_ID: abc123
+    HARNESS_API_KEY: abc123
+"""
+
+RETURN = r"""
+ansible_facts:
+  description: Facts to add to ansible_facts.
+  returned: always
+  type: complex
+  contains:
+    harness_facts:
+      description:
+        - The scope that was listed, under C(scope), and one dict per listed type, of objects by identifier.
+        - C(infrastructures) holds one dict per environment, of infrastructures by identifier.
+      type: dict
+"""
+
+# Internal Imports
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import HarnessApiError
+from ansible_collections.karcadia.harness.plugins.module_utils.snapshot import SCOPE_TYPES, entry_object, list_infrastructures
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
+
+# Stdlib Imports
+from os import getenv
+from concurrent.futures import ThreadPoolExecutor
+
+FACT_TYPES = list(SCOPE_TYPES) + ['infrastructures']
+
+def index_objects(object_key, entries):
+  objects = {}
+  for entry in entries:
+    harness_object = entry_object(object_key, entry)
+    objects[harness_object['identifier']] = harness_object
+  return objects
+
+def snapshot_scope(module, org_id, project_id, types):
+  # List every type at the same time, then the infrastructures of every environment at the same time.
+  # Raises HarnessApiError.
+  listed = [name for name in SCOPE_TYPES if name in types or (name == 'environments' and 'infrastructures' in types)]
+
+  def list_type(name):
+    lister, object_key = SCOPE_TYPES[name]
+    return index_objects(object_key, lister(module, org_id, project_id))
+
+  def list_environment_infrastructures(env_id):
+    return index_objects('infrastructure', list_infrastructures(module, org_id, project_id, env_id))
+
+  with ThreadPoolExecutor(max_workers=module.params['workers']) as executor:
+    facts = dict(zip(listed, executor.map(list_type, listed)))
+    if 'infrastructures' in types:
+      env_ids = list(facts['environments'])
+      facts['infrastructures'] = dict(zip(env_ids, executor.map(list_environment_infrastructures, env_ids)))
+  if 'environments' not in types:
+    facts.pop('environments', None)
+  return facts
+
+def main():
+    # Initialize the module and specify the argument spec.
+    module = AnsibleModule(
+      argument_spec = dict(
+          org=dict(type='str', required=False, aliases=['org_id']),
+          project=dict(type='str', required=False, aliases=['project_id']),
+          types=dict(type='list', elements='str', required=False, choices=FACT_TYPES),
+          workers=dict(type='int', default=8),
+          api_key=dict(type='str', required=False),
+          account_id=dict(type='str', required=False),
+      ),
+      supports_check_mode = True
+    )
+
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
+    # Catch and fail when we were given an ID with a dash in it.
+    org_id = module.params['org']
+    project_id = module.params['project']
+    if org_id and '-' in org_id:
+      module.fail_json(msg='Harness Identifiers may not contain dashes.')
+    if project_id and '-' in project_id:
+      module.fail_json(msg='Harness Identifiers may not contain dashes.')
+    if project_id and not org_id:
+      module.fail_json(msg='Org ID must be provided when project is provided.')
+    if module.params['workers'] < 1:
+      module.fail_json(msg='workers must be at least 1.')
+
+    # Pull the environment variables if they were provided.
+    env_harness_api_key = getenv('HARNESS_API_KEY')
+    env_harness_account_id = getenv('HARNESS_ACCOUNT_ID')
+
+    # Catch and fail if we don't have the auth information.
+    api_key = module.params['api_key']
+    account_id = module.params['account_id']
+    if not api_key and not env_harness_api_key:
+      module.fail_json(msg='Must provide api_key to the module or HARNESS_API_KEY to the environment.')
+    if not account_id and not env_harness_account_id:
+      module.fail_json(msg='Must provide account_id to the module or HARNESS_ACCOUNT_ID to the environment.')
+
+    # If we were not provided auth information to the module, pull it from the environment.
+    if api_key:
+      module.api_key = api_key
+    else:
+      module.api_key = env_harness_api_key
+    if account_id:
+      module.account_id = account_id
+    else:
+      module.account_id = env_harness_account_id
+
+    # Prepare to hit the Harness API.
+    headers = {}
+    headers['x-api-key'] = module.api_key
+    headers['Harness-Account'] = module.account_id
+    headers['Content-Type'] = 'application/json'
+    module.headers = headers
+
+    # Listings only read, so check mode lists too.
+    types = module.params['types'] or FACT_TYPES
+    try:
+      facts = snapshot_scope(module, org_id, project_id, types)
+    except HarnessApiError as error:
+      module.fail_json(msg=str(error))
+    facts['scope'] = {'account': module.account_id, 'org': org_id, 'project': project_id}
+
+    module.exit_json(changed=False, ansible_facts={'harness_facts': facts})
+
+if __name__ == "__main__":
+    main()
@@ -37,6 +37,14 @@ options:
     description: A description to apply to the Harness Org.
     required: False
     type: str
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
 """
 
 EXAMPLES = r"""
@@ -98,14 +106,14 @@ org:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     org_id   = module.params["identifier"]
@@ -125,7 +133,7 @@ def ensure_present(module):
 
     # Hit the Harness API and pull our Organization by ID.
     # https://apidocs.harness.io/tag/Organization#operation/get-organization
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -213,7 +221,7 @@ def ensure_absent(module):
 
     # Hit the Harness API and pull our Organization by ID.
     # https://apidocs.harness.io/tag/Organization#operation/get-organization
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -249,12 +257,16 @@ def main():
           state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
           api_key=dict(type='str', required=False),
           account_id=dict(type='str', required=False),
+          existing=dict(type='dict', required=False),
           description=dict(type='str', required=False, aliases=['desc']),
           tags=dict(type='dict', required=False),
       ),
       supports_check_mode = True
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'org'
     module.object_title = module.object_type.title()
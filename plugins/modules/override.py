@@ -48,6 +48,14 @@ options:
     description: 
     required: 
     type: 
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
 """
 
 EXAMPLES = r"""
@@ -103,14 +111,15 @@ serviceOverride:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import diff_result, structural_diff
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     object_id   = module.params["identifier"]
@@ -127,7 +136,7 @@ def ensure_present(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -172,53 +181,13 @@ def ensure_present(module):
     if checked_and_present:
       # Determine if the existing object needs to be updated.
       existing = loads(harness_response.text)['data']
-      needs_update = False
-      # Sanitize the spec object before comparing.
+      # Compare the spec against the Override schema, which knows the defaults the server fills in.
+      changed_paths = []
       if pre_json_object['spec']:
-        if 'variables' in pre_json_object['spec'].keys():
-          for var_iter in pre_json_object['spec']['variables']:
-            if 'default' not in var_iter.keys():
-              var_iter['default'] = None
-            if 'description' not in var_iter.keys():
-              var_iter['description'] = None
-            if 'required' not in var_iter.keys():
-              var_iter['required'] = False
-        else:
-          pre_json_object['spec']['variables'] = []
-        if 'configFiles' in pre_json_object['spec'].keys():
-          if pre_json_object['spec']['configFiles']:
-            for config_file_iter in pre_json_object['spec']['configFiles']:
-              if 'configFile' in config_file_iter.keys():
-                if 'spec' in config_file_iter['configFile'].keys():
-                  if 'store' in config_file_iter['configFile']['spec'].keys():
-                    if 'metadata' not in config_file_iter['configFile']['spec']['store'].keys():
-                      config_file_iter['configFile']['spec']['store']['metadata'] = None
-                    if 'spec' in config_file_iter['configFile']['spec']['store'].keys():
-                      if 'files' not in config_file_iter['configFile']['spec']['store']['spec'].keys():
-                        config_file_iter['configFile']['spec']['store']['spec']['files'] = None
-          else:
-            del pre_json_object['spec']['configFiles']
-        if 'manifests' in pre_json_object['spec'].keys():
-          if pre_json_object['spec']['manifests']:
-            for manifest_iter in pre_json_object['spec']['manifests']:
-              if 'manifest' in manifest_iter.keys():
-                if 'spec' in manifest_iter['manifest'].keys():
-                  if 'metadata' not in manifest_iter['manifest']['spec'].keys():
-                    manifest_iter['manifest']['spec']['metadata'] = None
-                  if 'store' in manifest_iter['manifest']['spec'].keys():
-                    if 'metadata' not in manifest_iter['manifest']['spec']['store'].keys():
-                      manifest_iter['manifest']['spec']['store']['metadata'] = None
-                    if 'spec' in manifest_iter['manifest']['spec']['store'].keys():
-                      if 'commitId' not in manifest_iter['manifest']['spec']['store']['spec'].keys():
-                        manifest_iter['manifest']['spec']['store']['spec']['commitId'] = None
-                      if 'folderPath' not in manifest_iter['manifest']['spec']['store']['spec'].keys():
-                        manifest_iter['manifest']['spec']['store']['spec']['folderPath'] = None
-          else:
-            del pre_json_object['spec']['manifests']
-
-        if pre_json_object['spec'] != existing['spec']:
-          needs_update = True
-          component = 'spec'
+        changed_paths = structural_diff(module.object_type, pre_json_object['spec'], existing['spec'], 'spec')
+      needs_update = bool(changed_paths)
+      if needs_update:
+        component = changed_paths[0]
       
       # Stop here if no updates are needed. Otherwise we'll use a PUT method to update the existing object.
       if needs_update:
@@ -227,7 +196,7 @@ def ensure_present(module):
         if module.check_mode:
           # Return success with the object that we would have created.
           module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.', check_mode=True,
-                           override=pre_json_object, updated=True, component_triggering_update=component)
+                           override=pre_json_object, updated=True, component_triggering_update=component, changed_paths=changed_paths)
       else:
         module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
 
@@ -255,11 +224,7 @@ def ensure_present(module):
       if method == 'PUT':
         actioned = 'updated'
         msg = f'{module.object_title} {object_id} has been {actioned}.'
-        diff = {
-          'before': existing,
-          'after': pre_json_object
-        }
-        module.exit_json(changed=True, msg=msg, diff=diff, override=object_resp_dict['data'], component_triggering_update=component)
+        module.exit_json(changed=True, msg=msg, **diff_result(module, existing, pre_json_object), override=object_resp_dict['data'], component_triggering_update=component, changed_paths=changed_paths)
     else:
       # Try to extract the status_code to return with our failure.
       status_code = str(create_object_resp.status_code)
@@ -284,7 +249,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -341,6 +306,7 @@ def main():
           state=dict(type='str', choices=['present', 'absent'], default='present'),
           api_key=dict(type='str'),
           account_id=dict(type='str'),
+          existing=dict(type='dict', required=False),
           type=dict(type='str'),
           tags=dict(type='dict'),
           spec=dict(type='dict'),
@@ -353,6 +319,9 @@ def main():
       ]
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'override'
     module.object_title = module.object_type.title()
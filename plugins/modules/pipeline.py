@@ -48,6 +48,30 @@ options:
     description:
     required:
     type:
+  write_mode:
+    description:
+      - How the Pipeline is written when I(state=present).
+      - C(read) fetches the Pipeline first and only writes when it differs from the desired state.
+      - C(upsert) skips the read. The Pipeline is updated in place, and created when the update finds nothing to update.
+        This saves a round trip and the download of a large body when the desired state is freshly rendered each run,
+        but every run writes.
+      - An upsert reports no change only when Harness answers it with the same modification time as the last upsert
+        of the object from this host, so that neither write changed the object. The time is kept in a ledger in the
+        user's own cache directory.
+      - Check mode always reads, as it cannot write.
+    choices:
+      - read
+      - upsert
+    default: read
+    type: str
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
 """
 
 EXAMPLES = r"""
@@ -68,6 +92,15 @@ EXAMPLES = r"""
     tags:
       purpose: demo
 
+- name: Push a freshly rendered Harness Pipeline without reading it first.
+  karcadia.harness.pipeline:
+    identifier: demo_pipeline
+    org: my_demo_org
+    project: my_demo_project
+    pipeline_yaml: "{{ lookup('template', 'demo_pipeline.yaml.j2') }}"
+    git_details: {}
+    write_mode: upsert
+
 - name: Delete a Harness Pipeline.
   karcadia.harness.pipeline:
     identifier: demo_pipeline
@@ -103,14 +136,16 @@ pipeline:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request, upsert
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import diff_result, same_yaml
+from ansible_collections.karcadia.harness.plugins.module_utils.ledger import forget_applied, record_upserted
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     object_id     = module.params["identifier"]
@@ -128,14 +163,19 @@ def ensure_present(module):
     checked_and_absent = False
     checked_and_present = False
 
+    # With write_mode upsert the write itself tells us whether the object existed, so skip the read.
+    # Check mode cannot write and still reads.
+    upsert_mode = module.params['write_mode'] == 'upsert' and not module.check_mode
+
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
-    if harness_response.status_code == 404:
-      checked_and_absent = True
-    elif harness_response.status_code == 200:
-      checked_and_present = True
-    else:
-      module.fail_json(msg='Harness response invalid or unexpected. Ensure your API Key is correct.')
+    if not upsert_mode:
+      harness_response = read_object(module)
+      if harness_response.status_code == 404:
+        checked_and_absent = True
+      elif harness_response.status_code == 200:
+        checked_and_present = True
+      else:
+        module.fail_json(msg='Harness response invalid or unexpected. Ensure your API Key is correct.')
 
     # Prepare the object with the required fields.
     pre_json_object = {
@@ -168,7 +208,7 @@ def ensure_present(module):
       if pre_json_object['tags'] and pre_json_object['tags'] != existing['tags']:
         needs_update = True
         component = 'tags'
-      if pre_json_object['pipeline_yaml'] != existing['pipeline_yaml']:
+      if not same_yaml(pre_json_object['pipeline_yaml'], existing['pipeline_yaml']):
         needs_update = True
         component = 'pipeline_yaml'
       if pre_json_object['name'] != existing['name']:
@@ -195,23 +235,30 @@ def ensure_present(module):
       url = module.push_url
 
     # Push the object into Harness.
-    create_object_resp = request(method, url, headers=module.headers, data=dumps(pre_json_object))
+    if upsert_mode:
+      create_object_resp = upsert(module, pre_json_object)
+      component = None
+    else:
+      create_object_resp = request(method, url, headers=module.headers, data=dumps(pre_json_object))
 
     # Interpret the API response.
     if create_object_resp.status_code == 200:
       actioned = 'updated'
       msg = f'{module.object_title} {object_id} has been {actioned}.'
-      diff = {
-        'before': existing,
-        'after': pre_json_object
-      }
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
-      module.exit_json(changed=True, msg=msg, diff=diff, pipeline=object_resp_dict, component_triggering_update=component)
+      if upsert_mode:
+        # The object was never read, so there is nothing to diff against. Harness tells whether the write changed it.
+        if not record_upserted(module, object_resp_dict):
+          module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.', pipeline=object_resp_dict)
+        module.exit_json(changed=True, msg=msg, pipeline=object_resp_dict, component_triggering_update=component)
+      module.exit_json(changed=True, msg=msg, **diff_result(module, existing, pre_json_object, yaml_fields=('pipeline_yaml',)), pipeline=object_resp_dict, component_triggering_update=component)
     elif create_object_resp.status_code == 201:
       actioned = 'created'
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
+      if upsert_mode:
+        record_upserted(module, object_resp_dict)
       module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', pipeline=object_resp_dict)
     else:
       # Try to extract the status_code to return with our failure.
@@ -237,7 +284,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -255,6 +302,7 @@ def ensure_absent(module):
 
       # Delete the Object.
       delete_object_resp = request("DELETE", module.read_url, headers=module.headers)
+      forget_applied(module)
 
       # Interpret the API response.
       if delete_object_resp.status_code == 204:
@@ -284,9 +332,11 @@ def main():
           state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
           api_key=dict(type='str', required=False),
           account_id=dict(type='str', required=False),
+          existing=dict(type='dict', required=False),
           description=dict(type='str', required=False, aliases=['desc']),
           pipeline_yaml=dict(type='str', required=False),
           git_details=dict(type='dict', required=False),
+          write_mode=dict(type='str', required=False, choices=['read', 'upsert'], default='read'),
           tags=dict(type='dict', required=False),
       ),
       supports_check_mode = True,
@@ -295,6 +345,9 @@ def main():
       ]
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'pipeline'
     module.object_title = module.object_type.title()
@@ -60,6 +60,14 @@ options:
     description: Boolean value for including all resources in the Harness Resource Group.
     required: False
     type: bool
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
 """
 
 EXAMPLES = r"""
@@ -115,14 +123,15 @@ resource_group:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import diff_result, structural_diff
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     object_id   = module.params["identifier"]
@@ -139,7 +148,7 @@ def ensure_present(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -185,28 +194,11 @@ def ensure_present(module):
     if checked_and_present:
       # Determine if the existing object needs to be updated.
       existing = loads(harness_response.text)
-      needs_update = False
-      if pjso['description'] and pjso['description'] != existing['description']:
-        needs_update = True
-        component = 'description'
-      if pjso['included_scope'] and pjso['included_scope'] != existing['included_scope']:
-        needs_update = True
-        component = 'included_scope'
-      if pjso['resource_filter'] and pjso['resource_filter'] != existing['resource_filter']:
-        needs_update = True
-        component = 'resource_filter'
-      if pjso['include_all_resources'] and pjso['include_all_resources'] != existing['include_all_resources']:
-        needs_update = True
-        component = 'include_all_resources'
-      if pjso['color'] and pjso['color'] != existing['color']:
-        needs_update = True
-        component = 'color'
-      if pjso['tags'] and pjso['tags'] != existing['tags']:
-        needs_update = True
-        component = 'tags'
-      if pjso['name'] != existing['name']:
-        needs_update = True
-        component = 'name'
+      # Compare against the Resource Group schema, in which scopes and resource filters are unordered.
+      changed_paths = structural_diff(module.object_type, pre_json_object, existing)
+      needs_update = bool(changed_paths)
+      if needs_update:
+        component = changed_paths[0]
       
       # Stop here if no updates are needed. Otherwise we'll use a PUT method to update the existing object.
       if needs_update:
@@ -214,12 +206,8 @@ def ensure_present(module):
         url = module.read_url
         if module.check_mode:
           # Return success with the object that we would have created.
-          diff = {
-            'before': existing,
-            'after': pre_json_object
-          }
           module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.',
-                           check_mode=True, resource_group=pre_json_object, updated=True, component_triggering_update=component, diff=diff)
+                           check_mode=True, resource_group=pre_json_object, updated=True, component_triggering_update=component, changed_paths=changed_paths, **diff_result(module, existing, pre_json_object))
       else:
         module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
 
@@ -239,14 +227,10 @@ def ensure_present(module):
     # Interpret the API response.
     if method == 'PUT':
       actioned = 'updated'
-      diff = {
-        'before': existing,
-        'after': pre_json_object
-      }
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
       module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.',
-                       resource_group=object_resp_dict, updated=True, component_triggering_update=component, diff=diff)
+                       resource_group=object_resp_dict, updated=True, component_triggering_update=component, changed_paths=changed_paths, **diff_result(module, existing, pre_json_object))
     elif method == 'POST':
       actioned = 'created'
       # Extract the object returned from the Harness API and return it with our successful module exit.
@@ -276,7 +260,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -329,6 +313,7 @@ def main():
           state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
           api_key=dict(type='str', required=False),
           account_id=dict(type='str', required=False),
+          existing=dict(type='dict', required=False),
           description=dict(type='str', required=False, aliases=['desc']),
           color=dict(type='str', required=False),
           tags=dict(type='dict', required=False),
@@ -339,6 +324,9 @@ def main():
       supports_check_mode = True
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'resource-group'
     module.object_title = module.object_type.title()
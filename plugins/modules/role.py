@@ -48,6 +48,14 @@ options:
     description: 
     required: 
     type: list
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
 """
 
 EXAMPLES = r"""
@@ -103,14 +111,15 @@ role:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import structural_diff
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
   # Pull in the module parameters.
   object_id   = module.params["identifier"]
@@ -132,7 +141,7 @@ def ensure_present(module):
   checked_and_present = False
 
   # Hit the Harness API and pull our object by ID.
-  harness_response = request("GET", module.read_url, headers=module.headers)
+  harness_response = read_object(module)
   if harness_response.status_code == 404:
     checked_and_absent = True
   elif harness_response.status_code == 200:
@@ -171,19 +180,11 @@ def ensure_present(module):
   if checked_and_present:
     # Determine if the existing object needs to be updated.
     existing = loads(harness_response.text)
-    needs_update = False
-    if pre_json_object['description'] and pre_json_object['description'] != existing['description']:
-      needs_update = True
-      component = 'description'
-    if pre_json_object['tags'] and pre_json_object['tags'] != existing['tags']:
-      needs_update = True
-      component = 'tags'
-    if pre_json_object['permissions'] != existing['permissions']:
-      needs_update = True
-      component = 'permissions'
-    if pre_json_object['name'] != existing['name']:
-      needs_update = True
-      component = 'name'
+    # Compare against the Role schema, in which permissions are unordered.
+    changed_paths = structural_diff(module.object_type, pre_json_object, existing)
+    needs_update = bool(changed_paths)
+    if needs_update:
+      component = changed_paths[0]
     
     # Stop here if no updates are needed. Otherwise we'll use a PUT method to update the existing object.
     if needs_update:
@@ -191,7 +192,7 @@ def ensure_present(module):
       url = module.read_url
       if module.check_mode:
         # Return success with the object that we would have created.
-        module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.', check_mode=True, role=pre_json_object, updated=True, component_triggering_update=component)
+        module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.', check_mode=True, role=pre_json_object, updated=True, component_triggering_update=component, changed_paths=changed_paths)
     else:
       module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
 
@@ -212,7 +213,7 @@ def ensure_present(module):
     actioned = 'updated'
     # Extract the object returned from the Harness API and return it with our successful module exit.
     object_resp_dict = loads(create_object_resp.text)
-    module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', role=object_resp_dict, updated=True, component_triggering_update=component)
+    module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', role=object_resp_dict, updated=True, component_triggering_update=component, changed_paths=changed_paths)
   elif create_object_resp.status_code == 201:
     actioned = 'created'
     # Extract the object returned from the Harness API and return it with our successful module exit.
@@ -243,7 +244,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -292,6 +293,7 @@ def main():
           state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
           api_key=dict(type='str', required=False),
           account_id=dict(type='str', required=False),
+          existing=dict(type='dict', required=False),
           description=dict(type='str', required=False, aliases=['desc']),
           permissions=dict(type='list', required=False),
           tags=dict(type='dict', required=False)
@@ -299,6 +301,9 @@ def main():
       supports_check_mode = True
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'role'
     module.object_title = module.object_type.title()
@@ -57,14 +57,12 @@ roles:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
-from yaml import dump
-
-# External Imports
-from requests import request
 
 def fetch_roles(module, org_id, project_id):
   # Fetch roles for given scope.
@@ -118,6 +116,9 @@ def main():
       supports_check_mode = True
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'role'
     module.object_title = module.object_type.title()
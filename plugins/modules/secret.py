@@ -48,6 +48,41 @@ options:
     description: 
     required: 
     type: 
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
+  cache_ttl:
+    description:
+      - Answer the existence check from a listing of the whole scope, kept for this many seconds in a file on the
+        host running the module. The first run for a scope lists it once, and later runs in the same loop or in
+        other forks read the file, including for objects that do not exist.
+      - Every write drops its object from the listing, so that the next check of that object goes to the API.
+      - The files live in the directory named by the HARNESS_CACHE_DIR environment variable, or in a directory of the
+        user's own under the system temporary directory. The cache is off when that directory is not owned by the
+        user or is open to other users.
+      - C(0) turns the cache off.
+    default: 0
+    type: int
+  ledger:
+    description:
+      - Path of a SQLite ledger recording the desired state last applied to each object. Missing directories are created.
+      - When the options describe the same desired state as the ledger entry for this object, the module reports no
+        change without reading the object. The entry is trusted for I(ledger_ttl) seconds, and after that for as long as
+        the object's last modification time in the I(cache_ttl) scope listing matches the one recorded with it.
+      - Changes made to the object outside of this module are not seen while the entry is trusted.
+        Use I(force_update) or delete the ledger file to force a full comparison.
+    required: False
+    type: path
+  ledger_ttl:
+    description:
+      - Seconds for which a I(ledger) entry is trusted without any check against Harness.
+    default: 86400
+    type: int
 """
 
 EXAMPLES = r"""
@@ -68,6 +103,14 @@ EXAMPLES = r"""
     tags:
       purpose: demo
 
+- name: Manage many Harness Secrets against a single listing of the Organization.
+  karcadia.harness.secret:
+    identifier: "{{ item.identifier }}"
+    org: my_demo_org
+    spec: "{{ item.spec }}"
+    existing: "{{ org_secrets | selectattr('secret.identifier', 'equalto', item.identifier) | first | default({}) }}"
+  loop: "{{ desired_secrets }}"
+
 - name: Delete a Harness Secret.
   karcadia.harness.secret:
     identifier: demo_secret
@@ -103,14 +146,17 @@ secret:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import structural_diff
+from ansible_collections.karcadia.harness.plugins.module_utils.cache import forget_object
+from ansible_collections.karcadia.harness.plugins.module_utils.ledger import forget_applied, ledger_converged, record_applied
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     object_id   = module.params["identifier"]
@@ -132,7 +178,7 @@ def ensure_present(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -165,27 +211,13 @@ def ensure_present(module):
     if checked_and_present:
       # Determine if the existing object needs to be updated.
       existing = loads(harness_response.text)
-      needs_update = False
-      if pre_json_object[module.object_type]['description'] and pre_json_object[module.object_type]['description'] != existing[module.object_type]['description']:
-        needs_update = True
-        component = 'description'
-      if pre_json_object[module.object_type]['tags'] and pre_json_object[module.object_type]['tags'] != existing[module.object_type]['tags']:
-        needs_update = True
-        component = 'tags'
-      if pre_json_object[module.object_type]['name'] != existing[module.object_type]['name']:
-        needs_update = True
-        component = 'name'
+      # Compare against the Secret schema, which leaves out the write only value and server managed fields.
+      changed_paths = structural_diff(module.object_type, pre_json_object, existing)
       if module.params["force_update"]:
-        needs_update = True
-        component = 'force_update'
-      # Sanitize spec before checking if it needs an update.
-      del existing[module.object_type]['spec']['additional_metadata']
-      del existing[module.object_type]['spec']['value']
-      user_provided_spec = pre_json_object[module.object_type]['spec']
-      del user_provided_spec['value']
-      if user_provided_spec != existing[module.object_type]['spec']:
-        needs_update = True
-        component = 'spec'
+        changed_paths.append('force_update')
+      needs_update = bool(changed_paths)
+      if needs_update:
+        component = changed_paths[0]
       
       # Stop here if no updates are needed. Otherwise we'll use a PUT method to update the existing object.
       if needs_update:
@@ -193,8 +225,9 @@ def ensure_present(module):
         url = module.read_url
         if module.check_mode:
           # Return success with the object that we would have created.
-          module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.', check_mode=True, secret=pre_json_object, updated=True, component_triggering_update=component)
+          module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.', check_mode=True, secret=pre_json_object, updated=True, component_triggering_update=component, changed_paths=changed_paths)
       else:
+        record_applied(module, loads(harness_response.text))
         module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
 
     if checked_and_absent:
@@ -209,16 +242,21 @@ def ensure_present(module):
     # Push the object into Harness.
     create_object_resp = request(method, url, headers=module.headers, data=dumps(pre_json_object))
 
+    # Whatever the outcome, the cached listing no longer knows this object.
+    forget_object(module)
+
     # Interpret the API response.
     if create_object_resp.status_code == 200:
       actioned = 'updated'
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
-      module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', secret=object_resp_dict, updated=True, component_triggering_update=component)
+      record_applied(module, object_resp_dict)
+      module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', secret=object_resp_dict, updated=True, component_triggering_update=component, changed_paths=changed_paths)
     if create_object_resp.status_code == 201:
       actioned = 'created'
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
+      record_applied(module, object_resp_dict)
       object_resp = object_resp_dict[module.object_type]
       module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', secret=object_resp)
     else:
@@ -245,7 +283,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -263,6 +301,8 @@ def ensure_absent(module):
 
       # Delete the Object.
       delete_object_resp = request("DELETE", module.read_url, headers=module.headers)
+      forget_object(module)
+      forget_applied(module)
 
       # Interpret the API response.
       if delete_object_resp.status_code == 200:
@@ -292,6 +332,10 @@ def main():
           state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
           api_key=dict(type='str', required=False),
           account_id=dict(type='str', required=False),
+          existing=dict(type='dict', required=False),
+          cache_ttl=dict(type='int', required=False, default=0),
+          ledger=dict(type='path', required=False),
+          ledger_ttl=dict(type='int', required=False, default=86400),
           description=dict(type='str', required=False, aliases=['desc']),
           spec=dict(type='dict', required=False),
           tags=dict(type='dict', required=False),
@@ -300,6 +344,9 @@ def main():
       supports_check_mode = True
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'secret'
     module.object_title = module.object_type.title()
@@ -368,6 +415,8 @@ def main():
     # Run the appropriate function based on the state requested.
     state = module.params['state']
     if state == "present":
+      if ledger_converged(module):
+        module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
       ensure_present(module)
     elif state == "absent":
       ensure_absent(module)
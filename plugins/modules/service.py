@@ -44,6 +44,57 @@ options:
     description: 
     required: 
     type: 
+  write_mode:
+    description:
+      - How the Service is written when I(state=present).
+      - C(read) fetches the Service first and only writes when it differs from the desired state.
+      - C(upsert) skips the read. The Service is updated in place, and created when the update finds nothing to update.
+        This saves a round trip and the download of a large body when the desired state is freshly rendered each run,
+        but every run writes.
+      - An upsert reports no change only when Harness answers it with the same modification time as the last upsert
+        of the object from this host, so that neither write changed the object. The time is kept in I(ledger) or,
+        without one, in a ledger in the user's own cache directory.
+      - Check mode always reads, as it cannot write.
+    choices:
+      - read
+      - upsert
+    default: read
+    type: str
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
+  cache_ttl:
+    description:
+      - Answer the existence check from a listing of the whole scope, kept for this many seconds in a file on the
+        host running the module. The first run for a scope lists it once, and later runs in the same loop or in
+        other forks read the file, including for objects that do not exist.
+      - Every write drops its object from the listing, so that the next check of that object goes to the API.
+      - The files live in the directory named by the HARNESS_CACHE_DIR environment variable, or in a directory of the
+        user's own under the system temporary directory. The cache is off when that directory is not owned by the
+        user or is open to other users.
+      - C(0) turns the cache off.
+    default: 0
+    type: int
+  ledger:
+    description:
+      - Path of a SQLite ledger recording the desired state last applied to each object. Missing directories are created.
+      - When the options describe the same desired state as the ledger entry for this object, the module reports no
+        change without reading the object. The entry is trusted for I(ledger_ttl) seconds, and after that for as long as
+        the object's last modification time in the I(cache_ttl) scope listing matches the one recorded with it.
+      - Changes made to the object outside of this module are not seen while the entry is trusted.
+        Delete the ledger file to force a full comparison.
+    required: False
+    type: path
+  ledger_ttl:
+    description:
+      - Seconds for which a I(ledger) entry is trusted without any check against Harness.
+    default: 86400
+    type: int
 """
 
 EXAMPLES = r"""
@@ -99,14 +150,17 @@ service:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request, upsert
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import same_yaml
+from ansible_collections.karcadia.harness.plugins.module_utils.cache import forget_object
+from ansible_collections.karcadia.harness.plugins.module_utils.ledger import forget_applied, ledger_converged, record_applied, record_upserted
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     object_id   = module.params["identifier"]
@@ -127,14 +181,19 @@ def ensure_present(module):
     checked_and_absent = False
     checked_and_present = False
 
+    # With write_mode upsert the write itself tells us whether the object existed, so skip the read.
+    # Check mode cannot write and still reads.
+    upsert_mode = module.params['write_mode'] == 'upsert' and not module.check_mode
+
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
-    if harness_response.status_code == 404:
-      checked_and_absent = True
-    elif harness_response.status_code == 200:
-      checked_and_present = True
-    else:
-      module.fail_json(msg='Harness response invalid or unexpected. Ensure your API Key is correct.')
+    if not upsert_mode:
+      harness_response = read_object(module)
+      if harness_response.status_code == 404:
+        checked_and_absent = True
+      elif harness_response.status_code == 200:
+        checked_and_present = True
+      else:
+        module.fail_json(msg='Harness response invalid or unexpected. Ensure your API Key is correct.')
 
     # Prepare the object with the required fields.
     pre_json_object = {
@@ -166,7 +225,7 @@ def ensure_present(module):
       if pre_json_object['tags'] and pre_json_object['tags'] != existing['tags']:
         needs_update = True
         component = 'tags'
-      if pre_json_object['yaml'] != existing['yaml']:
+      if not same_yaml(pre_json_object['yaml'], existing['yaml']):
         needs_update = True
         component = 'yaml'
       if pre_json_object['name'] != existing['name']:
@@ -181,6 +240,7 @@ def ensure_present(module):
           # Return success with the object that we would have created.
           module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been updated.', check_mode=True, service=pre_json_object, updated=True, component_triggering_update=component)
       else:
+        record_applied(module, loads(harness_response.text))
         module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
 
     if checked_and_absent:
@@ -193,18 +253,35 @@ def ensure_present(module):
       url = module.push_url
 
     # Push the object into Harness.
-    create_object_resp = request(method, url, headers=module.headers, data=dumps(pre_json_object))
+    if upsert_mode:
+      create_object_resp = upsert(module, pre_json_object)
+      component = None
+    else:
+      create_object_resp = request(method, url, headers=module.headers, data=dumps(pre_json_object))
+
+    # Whatever the outcome, the cached listing no longer knows this object.
+    forget_object(module)
 
     # Interpret the API response.
     if create_object_resp.status_code == 200:
       actioned = 'updated'
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
+      if upsert_mode:
+        # The object was never read, so Harness tells whether the write changed it.
+        if not record_upserted(module, object_resp_dict):
+          module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.', service=object_resp_dict)
+      else:
+        record_applied(module, object_resp_dict)
       module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', service=object_resp_dict, updated=True, component_triggering_update=component)
     elif create_object_resp.status_code == 201:
       actioned = 'created'
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
+      if upsert_mode:
+        record_upserted(module, object_resp_dict)
+      else:
+        record_applied(module, object_resp_dict)
       object_resp = object_resp_dict
       module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', service=object_resp)
     else:
@@ -231,7 +308,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -249,6 +326,8 @@ def ensure_absent(module):
 
       # Delete the Object.
       delete_object_resp = request("DELETE", module.read_url, headers=module.headers)
+      forget_object(module)
+      forget_applied(module)
 
       # Interpret the API response.
       if delete_object_resp.status_code == 200:
@@ -278,13 +357,21 @@ def main():
           state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
           api_key=dict(type='str', required=False),
           account_id=dict(type='str', required=False),
+          existing=dict(type='dict', required=False),
+          cache_ttl=dict(type='int', required=False, default=0),
+          ledger=dict(type='path', required=False),
+          ledger_ttl=dict(type='int', required=False, default=86400),
           description=dict(type='str', required=False, aliases=['desc']),
           yaml=dict(type='str', required=False),
+          write_mode=dict(type='str', required=False, choices=['read', 'upsert'], default='read'),
           tags=dict(required=False)
       ),
       supports_check_mode = True
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'service'
     module.object_title = module.object_type.title()
@@ -353,6 +440,8 @@ def main():
     # Run the appropriate function based on the state requested.
     state = module.params['state']
     if state == "present":
+      if ledger_converged(module):
+        module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.')
       ensure_present(module)
     elif state == "absent":
       ensure_absent(module)
@@ -52,6 +52,30 @@ options:
     description: The details about where to store the Template. Generally either INLINE or REMOTE. And if REMOTE then specify more details about the REMOTE target.
     required: True
     type: dict
+  write_mode:
+    description:
+      - How the Template is written when I(state=present).
+      - C(read) fetches the Template first and only writes when it differs from the desired state.
+      - C(upsert) skips the read. The Template is updated in place, and created when the update finds nothing to update.
+        This saves a round trip and the download of a large body when the desired state is freshly rendered each run,
+        but every run writes.
+      - An upsert reports no change only when Harness answers it with the same modification time as the last upsert
+        of the object from this host, so that neither write changed the object. The time is kept in a ledger in the
+        user's own cache directory.
+      - Check mode always reads, as it cannot write.
+    choices:
+      - read
+      - upsert
+    default: read
+    type: str
+  existing:
+    description:
+      - The live object, when the play has already fetched it, for example through an info module.
+        The module then skips its own read and goes straight to the comparison and the write.
+      - Either the body the Harness API returns for the object itself, or its entry from the list endpoint.
+      - An empty dictionary tells the module that the object does not exist.
+    required: False
+    type: dict
 """
 
 EXAMPLES = r"""
@@ -101,15 +125,17 @@ template:
 
 # Internal Imports
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.karcadia.harness.plugins.module_utils.api import request, upsert
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import read_object
+from ansible_collections.karcadia.harness.plugins.module_utils.diff import same_yaml
+from ansible_collections.karcadia.harness.plugins.module_utils.ledger import forget_applied, record_upserted
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import report_metrics
 
 # Stdlib Imports
 from os import getenv
 from json import dumps, loads
 from yaml import safe_load
 
-# External Imports
-from requests import request
-
 def ensure_present(module):
     # Pull in the module parameters.
     object_id     = module.params["identifier"]
@@ -126,14 +152,19 @@ def ensure_present(module):
     checked_and_absent = False
     checked_and_present = False
 
+    # With write_mode upsert the write itself tells us whether the object existed, so skip the read.
+    # Check mode cannot write and still reads.
+    upsert_mode = module.params['write_mode'] == 'upsert' and not module.check_mode
+
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
-    if harness_response.status_code == 404:
-      checked_and_absent = True
-    elif harness_response.status_code == 200:
-      checked_and_present = True
-    else:
-      module.fail_json(msg='Harness response invalid or unexpected. Ensure your API Key is correct.')
+    if not upsert_mode:
+      harness_response = read_object(module)
+      if harness_response.status_code == 404:
+        checked_and_absent = True
+      elif harness_response.status_code == 200:
+        checked_and_present = True
+      else:
+        module.fail_json(msg='Harness response invalid or unexpected. Ensure your API Key is correct.')
 
     # Prepare the object with the required fields.
     pre_json_object = {
@@ -164,7 +195,7 @@ def ensure_present(module):
       if pre_json_object['tags'] and pre_json_object['tags'] != existing[module.object_type]['tags']:
         needs_update = True
         component = 'tags'
-      if pre_json_object['template_yaml'] != existing[module.object_type]['yaml']:
+      if not same_yaml(pre_json_object['template_yaml'], existing[module.object_type]['yaml']):
         needs_update = True
         component = 'template_yaml'
       # Sanitize git_details before checking if it should trigger an update.
@@ -208,18 +239,26 @@ def ensure_present(module):
       url = module.push_url
 
     # Push the object into Harness.
-    create_object_resp = request(method, url, headers=module.headers, data=dumps(pre_json_object))
+    if upsert_mode:
+      create_object_resp = upsert(module, pre_json_object)
+      component = None
+    else:
+      create_object_resp = request(method, url, headers=module.headers, data=dumps(pre_json_object))
 
     # Interpret the API response.
     if create_object_resp.status_code == 200:
       actioned = 'updated'
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
+      if upsert_mode and not record_upserted(module, object_resp_dict):
+        module.exit_json(changed=False, msg=f'{module.object_title} {object_id} is already present and in the desired state.', project=object_resp_dict)
       module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', project=object_resp_dict, updated=True, component_triggering_update=component)
     elif create_object_resp.status_code == 201:
       actioned = 'created'
       # Extract the object returned from the Harness API and return it with our successful module exit.
       object_resp_dict = loads(create_object_resp.text)
+      if upsert_mode:
+        record_upserted(module, object_resp_dict)
       module.exit_json(changed=True, msg=f'{module.object_title} {object_id} has been {actioned}.', template=object_resp_dict)
     else:
       # Try to extract the status_code to return with our failure.
@@ -245,7 +284,7 @@ def ensure_absent(module):
     checked_and_present = False
 
     # Hit the Harness API and pull our object by ID.
-    harness_response = request("GET", module.read_url, headers=module.headers)
+    harness_response = read_object(module)
     if harness_response.status_code == 404:
       checked_and_absent = True
     elif harness_response.status_code == 200:
@@ -263,6 +302,7 @@ def ensure_absent(module):
 
       # Delete the Object.
       delete_object_resp = request("DELETE", module.read_url, headers=module.headers)
+      forget_applied(module)
 
       # Interpret the API response.
       if delete_object_resp.status_code == 204:
@@ -292,7 +332,9 @@ def main():
           state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
           api_key=dict(type='str', required=False),
           account_id=dict(type='str', required=False),
+          existing=dict(type='dict', required=False),
           template_yaml=dict(type='str', required=False),
+          write_mode=dict(type='str', required=False, choices=['read', 'upsert'], default='read'),
           git_details=dict(type='dict', required=False),
           is_stable=dict(type='bool', required=False),
           description=dict(type='str', required=False),
@@ -303,6 +345,9 @@ def main():
       supports_check_mode = True
     )
 
+    # Report the Harness API calls of this run with its result.
+    report_metrics(module)
+
     # Set the object type for this module.
     module.object_type = 'template'
     module.object_title = module.object_type.title()
@@ -377,6 +422,7 @@ def main():
         if 'template' not in template_yaml.keys() or 'versionLabel' not in template_yaml['template'].keys():
           module.fail_json(msg='Provided template_yaml must contain a top level template with a child versionLabel.')
         version_label = template_yaml['template']['versionLabel']
+    module.version_label = version_label
 
     # Prepare the Harness API URLs for this module.
     if module.object_scope == 'account':
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Run the modules of this collection in the controller process instead of shipping them.
+# Every module here only talks HTTP to Harness and runs against localhost, so packaging it through
+# AnsiballZ, copying it and starting a new interpreter for every task and loop item buys nothing.
+# The action plugins in plugins/action import the module once and call its main() with the task's
+# arguments, as AnsiballZ would, then read the result it prints on exit.
+# All the items of a loop run in the same worker process, so they share the requests session of
+# module_utils/api.py, the imports of requests and yaml, and the scope listings module_utils/cache.py
+# has already parsed.
+#
+# Looped tasks are planned as a whole by plugin_utils/loop_batch.py.
+#
+# Tasks that connect anywhere but the controller, become another user or run async ship the module
+# as usual. So does every task when the controller runs with HARNESS_IN_PROCESS=0.
+
+# Internal Imports
+from ansible.module_utils import basic
+from ansible.module_utils.common import warnings
+from ansible.module_utils.common.json import AnsibleJSONEncoder
+from ansible.plugins.action import ActionBase
+from ansible.utils.vars import merge_hash
+from ansible.vars.clean import remove_internal_keys
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import merge_metrics
+from ansible_collections.karcadia.harness.plugins.plugin_utils.loop_batch import loop_plan
+
+# Stdlib Imports
+from os import environ, getenv
+from io import StringIO
+from json import dumps
+from importlib import import_module
+from traceback import format_exc
+from contextlib import redirect_stdout
+
+MODULES_PACKAGE = 'ansible_collections.karcadia.harness.plugins.modules'
+
+def in_process_enabled():
+  return getenv('HARNESS_IN_PROCESS', '1').lower() not in ('0', 'false', 'no', 'off')
+
+def run_module(module_name, module_args, task_environment):
+  # Call the module's main() with module_args, as AnsiballZ would, in the task's environment.
+  # Returns what the module printed, and the traceback when it raised instead of exiting.
+  saved_environment = dict(environ)
+  environ.update({key: str(value) for key, value in task_environment.items()})
+  basic._ANSIBLE_ARGS = dumps({'ANSIBLE_MODULE_ARGS': module_args}, cls=AnsibleJSONEncoder, vault_to_text=True).encode('utf-8')
+  output = StringIO()
+  try:
+    with redirect_stdout(output):
+      import_module(f'{MODULES_PACKAGE}.{module_name}').main()
+  except SystemExit:
+    # exit_json and fail_json print the result and exit.
+    pass
+  except Exception:
+    return output.getvalue(), format_exc()
+  finally:
+    basic._ANSIBLE_ARGS = None
+    # Warnings are collected per process. Clear them, or the next run would report them again.
+    del warnings._global_warnings[:]
+    del warnings._global_deprecations[:]
+    environ.clear()
+    environ.update(saved_environment)
+  return output.getvalue(), None
+
+class ActionModule(ActionBase):
+
+  _supports_check_mode = True
+  _supports_async = True
+
+  def run(self, tmp=None, task_vars=None):
+    result = super(ActionModule, self).run(tmp, task_vars)
+    del tmp  # tmp no longer has any effect
+    if task_vars is None:
+      task_vars = dict()
+
+    if self._runs_in_process():
+      return merge_hash(result, self._execute_in_process(task_vars))
+
+    # Ship the module, exactly as the normal action plugin would.
+    wrap_async = self._task.async_val and not self._connection.has_native_async
+    result = merge_hash(result, self._execute_module(task_vars=task_vars, wrap_async=wrap_async))
+    if not wrap_async:
+      self._remove_tmp_path(self._connection._shell.tmpdir)
+    return result
+
+  def _runs_in_process(self):
+    if not in_process_enabled() or self._task.async_val or self._play_context.become:
+      return False
+    return self._connection.transport == 'local'
+
+  def _execute_in_process(self, task_vars):
+    module_name = (self._task.resolved_action or self._task.action).split('.')[-1]
+    module_args = self._task.args.copy()
+    self._update_module_args(module_name, module_args, task_vars)
+
+    # The module reads its credentials from the environment, so give it the task's environment while it runs.
+    task_environment = dict()
+    self._compute_environment_string(task_environment)
+
+    planned = None
+    if self._task.loop is not None and not self._task.loop_with:
+      planned = loop_plan(self, module_name, task_vars, task_environment, run_module).take(self._task.args)
+    if planned is not None and planned.output is not None:
+      output, exception = planned.output
+    else:
+      if planned is not None and planned.existing is not None:
+        module_args['existing'] = planned.existing
+      output, exception = run_module(module_name, module_args, task_environment)
+    if exception:
+      return dict(failed=True, msg=f'The {module_name} module failed in the controller process.', exception=exception)
+
+    data = self._parse_returned_data(dict(stdout=output))
+    remove_internal_keys(data)
+    if planned is not None and planned.metrics and 'harness_metrics' in data:
+      # The reads of the whole loop are counted with its first item.
+      merge_metrics(data['harness_metrics'], planned.metrics)
+    return data
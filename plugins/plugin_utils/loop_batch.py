@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Coalesce the items of a looped task that runs in the controller process (plugin_utils/in_process.py).
+# Ansible hands a loop to the action one item at a time, so every item reads its object on its own.
+# When the first item comes in, the whole loop is planned instead: the arguments of every item are
+# templated the way the task executor templates them, and the objects of all items are read with as
+# few requests as module_utils/batch.py can manage, one batch read or scope listing per scope.
+# Each item then gets its object through the existing option, and still runs and reports on its own.
+#
+# With harness_loop_workers set above 1, as a variable or HARNESS_LOOP_WORKERS in the controller's
+# environment, the items also run that many at a time, each in a forked child of the worker, and the
+# results are handed out as Ansible asks for each item. Items run at the same time must not depend on
+# each other, so loops naming an object twice, pausing or retrying with until run one item at a time.
+#
+# Only loops written with the loop keyword are planned. A loop the plan cannot reproduce exactly,
+# for example because of module_defaults, runs item by item as before.
+
+# Internal Imports
+from ansible.module_utils.common.json import AnsibleJSONEncoder
+from ansible.parsing.mod_args import ModuleArgsParser
+from ansible.template import Templar
+from ansible_collections.karcadia.harness.plugins.module_utils.api import HarnessAccount, HarnessApiError, reset_session
+from ansible_collections.karcadia.harness.plugins.module_utils.batch import bulk_existing
+from ansible_collections.karcadia.harness.plugins.module_utils.metrics import api_metrics, reset_metrics
+
+# Stdlib Imports
+from os import close, fdopen, fork, getenv, remove, waitpid, _exit
+from json import dump, dumps, load
+from tempfile import mkstemp
+
+# Modules whose objects can be read in bulk, with the object type and api their reads use.
+MODULE_READS = {
+  'secret': ('secret', 'v1'),
+  'service': ('service', 'v1'),
+  'connector': ('connector', 'v1'),
+  'legacy_connector': ('connector', 'ng'),
+  'variable': ('variable', 'ng'),
+  'environment': ('environment', 'ng'),
+  'service_account': ('serviceaccount', 'ng'),
+}
+
+# Plans by task, for the worker process running that task.
+_plans = {}
+
+def args_key(args):
+  return dumps(args, sort_keys=True, cls=AnsibleJSONEncoder, vault_to_text=True)
+
+class PlannedItem(object):
+  def __init__(self, args, runs):
+    self.key = args_key(args)
+    self.args = args
+    # Whether the task's when condition lets this item run.
+    self.runs = runs
+    self.existing = None
+    # What the module printed and any traceback, when the item already ran in a forked child.
+    self.output = None
+    # Counters of the reads the plan made, returned with the first item.
+    self.metrics = None
+    self.taken = False
+
+class LoopPlan(object):
+  def __init__(self, items=()):
+    self.items = list(items)
+
+  def take(self, args):
+    # The planned item for the arguments the action was called with, or None to run it as it comes.
+    key = args_key(args)
+    for item in self.items:
+      if not item.taken and item.key == key:
+        item.taken = True
+        return item
+    return None
+
+def loop_plan(action, module_name, task_vars, environment, run_module):
+  task = action._task
+  if task._uuid not in _plans:
+    try:
+      _plans[task._uuid] = build_plan(action, module_name, task_vars, environment, run_module)
+    except Exception as error:
+      # A loop we cannot plan runs item by item, exactly as it would without us.
+      action._display.vvv(f'Harness loop batching is off for this task: {error}')
+      _plans[task._uuid] = LoopPlan()
+  return _plans[task._uuid]
+
+def template_items(action, task_vars):
+  task = action._task
+  loop_control = task.loop_control
+  loop_var = loop_control.loop_var if loop_control else 'item'
+  index_var = loop_control.index_var if loop_control else None
+  extended = loop_control.extended if loop_control else False
+  # The action's copy of the task has its loop validated into a list around the expression,
+  # so the loop is templated from the task as written, as the executor saw it.
+  items = Templar(loader=action._loader, variables=task_vars).template(task.get_ds().get('loop', task.loop))
+  if not isinstance(items, list):
+    raise ValueError('the loop is not a list')
+  raw_args = ModuleArgsParser(task_ds=task.get_ds(), collection_list=task.collections).parse()[1]
+
+  planned = []
+  for index, item in enumerate(items):
+    item_vars = dict(task_vars)
+    item_vars[loop_var] = item
+    if index_var:
+      item_vars[index_var] = index
+    if extended:
+      item_vars['ansible_loop'] = {
+        'allitems': items, 'index': index + 1, 'index0': index, 'first': index == 0, 'last': index + 1 == len(items),
+        'length': len(items), 'revindex': len(items) - index, 'revindex0': len(items) - index - 1,
+      }
+      if index > 0:
+        item_vars['ansible_loop']['previtem'] = items[index - 1]
+      if index + 1 < len(items):
+        item_vars['ansible_loop']['nextitem'] = items[index + 1]
+    templar = Templar(loader=action._loader, variables=item_vars)
+    runs = task.evaluate_conditional(templar, item_vars) if task.when else True
+    planned.append(PlannedItem(templar.template(raw_args), runs))
+  return planned
+
+def read_target(module_name, api_key, account_id, org_id, project_id):
+  # Stands in for the module in module_utils/batch.py, with what its reads and listings look at.
+  object_type, api = MODULE_READS[module_name]
+  target = HarnessAccount(api_key, account_id)
+  target.object_type = object_type
+  target.object_title = object_type.title()
+  if api == 'ng':
+    target.push_url = target.read_url = f'https://app.harness.io/ng/api/{object_type}'
+  else:
+    base = 'https://app.harness.io/v1'
+    if org_id:
+      base += f'/orgs/{org_id}'
+    if project_id:
+      base += f'/projects/{project_id}'
+    target.push_url = target.read_url = f'{base}/{object_type}s'
+  return target
+
+def read_existing(module_name, items, environment):
+  # Read the objects of all items, one bulk read per account and scope, into their existing option.
+  scopes = {}
+  for item in items:
+    args = item.args
+    if args.get('existing') is not None or not args.get('identifier'):
+      continue
+    api_key = args.get('api_key') or environment.get('HARNESS_API_KEY') or getenv('HARNESS_API_KEY')
+    account_id = args.get('account_id') or environment.get('HARNESS_ACCOUNT_ID') or getenv('HARNESS_ACCOUNT_ID')
+    if not api_key or not account_id:
+      continue
+    scope = (api_key, account_id, args.get('org') or args.get('org_id'), args.get('project') or args.get('project_id'))
+    scopes.setdefault(scope, []).append(item)
+
+  for (api_key, account_id, org_id, project_id), scope_items in scopes.items():
+    identifiers = [str(item.args['identifier']) for item in scope_items]
+    target = read_target(module_name, api_key, account_id, org_id, project_id)
+    try:
+      existing = bulk_existing(target, identifiers, org_id, project_id)
+    except HarnessApiError:
+      # Every item reads its own object and reports its own errors.
+      continue
+    if existing is None:
+      continue
+    for item, identifier in zip(scope_items, identifiers):
+      # An object named twice may change between its items, so those read it themselves.
+      if identifiers.count(identifier) == 1:
+        item.existing = existing[identifier]
+
+def loop_workers(action, task_vars):
+  workers = task_vars.get('harness_loop_workers') or getenv('HARNESS_LOOP_WORKERS') or 1
+  return int(Templar(loader=action._loader, variables=task_vars).template(workers))
+
+def can_run_concurrently(action, items):
+  task = action._task
+  if task.until or (task.loop_control and task.loop_control.pause):
+    return False
+  # Items after the one that meets break_when must not run at all.
+  if task.loop_control and getattr(task.loop_control, 'break_when', None):
+    return False
+  loop_var = task.loop_control.loop_var if task.loop_control else 'item'
+  if task.environment and loop_var in str(task.environment):
+    return False
+  objects = [args_key([item.args.get('org'), item.args.get('project'), item.args.get('identifier')]) for item in items]
+  return len(set(objects)) == len(objects)
+
+def run_forked(jobs, workers, run_module):
+  # Run every job, workers at a time, each in a forked child. Returns what run_module returned for each.
+  # A child must not share the parent's connections, so it starts its own session.
+  outputs = [None] * len(jobs)
+  pending = list(enumerate(jobs))
+  running = {}
+  while pending or running:
+    while pending and len(running) < workers:
+      index, job = pending.pop(0)
+      fd, path = mkstemp(prefix='.harness-loop-')
+      pid = fork()
+      if pid == 0:
+        try:
+          reset_session()
+          output = run_module(*job)
+          with fdopen(fd, 'w') as fw:
+            dump(output, fw)
+        finally:
+          _exit(0)
+      close(fd)
+      running[pid] = (index, path)
+    # Collect whichever child ends first, so a slow item does not hold the next ones back.
+    pid, _ = waitpid(-1, 0)
+    if pid not in running:
+      continue
+    index, path = running.pop(pid)
+    try:
+      with open(path) as fr:
+        outputs[index] = tuple(load(fr))
+    except (OSError, ValueError):
+      outputs[index] = ('', 'The forked module run ended without a result.')
+    remove(path)
+  return outputs
+
+def build_plan(action, module_name, task_vars, environment, run_module):
+  items = template_items(action, task_vars)
+  # The first item Ansible runs must be one we planned, or our templating differs from the executor's.
+  if not any(item.runs and item.key == args_key(action._task.args) for item in items):
+    raise ValueError('the planned arguments do not match the task arguments')
+  running = [item for item in items if item.runs]
+
+  if module_name in MODULE_READS:
+    reset_metrics()
+    read_existing(module_name, running, environment)
+    if running:
+      running[0].metrics = api_metrics()
+
+  workers = loop_workers(action, task_vars)
+  if workers > 1 and len(running) > 1 and can_run_concurrently(action, running):
+    jobs = []
+    for item in running:
+      module_args = dict(item.args)
+      if item.existing is not None:
+        module_args['existing'] = item.existing
+      action._update_module_args(module_name, module_args, task_vars)
+      jobs.append((module_name, module_args, environment))
+    for item, output in zip(running, run_forked(jobs, workers, run_module)):
+      item.output = output
+  return LoopPlan(items)